@@ -0,0 +1,315 @@
+import argparse
+import logging
+import math
+import os
+import sys
+import threading
+import time
+import weakref
+from collections import deque
+from decouple import config
+from inference_scheduler import InferenceScheduler, INFERENCE_MAX_BATCH_SIZE
+from metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+# Constants
+ADMISSION_MAX_CONCURRENCY = config("ADMISSION_MAX_CONCURRENCY", default=INFERENCE_MAX_BATCH_SIZE, cast=int)  # 0 disables admission control
+ADMISSION_TARGET_LATENCY_MS = config("ADMISSION_TARGET_LATENCY_MS", default=100, cast=float)  # Queue wait before low-priority traffic is shed
+ADMISSION_MAX_WAIT_MS = config("ADMISSION_MAX_WAIT_MS", default=1000, cast=float)  # Longest queue wait for high-priority requests
+ADMISSION_MAX_QUEUE = config("ADMISSION_MAX_QUEUE", default=4 * INFERENCE_MAX_BATCH_SIZE, cast=int)  # Waiting requests per worker
+ADMISSION_DEGRADED_MODE = config("ADMISSION_DEGRADED_MODE", default=True, cast=bool)
+ADMISSION_DEGRADE_QUEUE_DEPTH = config("ADMISSION_DEGRADE_QUEUE_DEPTH", default=2 * INFERENCE_MAX_BATCH_SIZE, cast=int)
+PRIORITY_HEADER = config("PRIORITY_HEADER", default="X-Priority")
+
+HIGH = "high"
+LOW = "low"
+LANES = (HIGH, LOW)
+
+class Overloaded(Exception):
+    """
+    Raised when a request is shed; retry_after is the suggested wait in seconds.
+    """
+
+    def __init__(self, lane, retry_after):
+        super().__init__(f"Overloaded, {lane} priority request shed")
+        self.lane = lane
+        self.retry_after = retry_after
+
+class _Waiter:
+    """
+    A queued request. Waiters compare by identity, so equal arrival times stay distinct.
+    """
+
+    __slots__ = ("arrival",)
+
+    def __init__(self, arrival):
+        self.arrival = arrival
+
+class AdmissionController:
+    """
+    Bounds the requests a worker analyzes at once, queueing the rest in two priority lanes.
+
+    Without it, an overloaded worker accepts every request and all of them slow
+    down together until clients time out. The controller admits at most
+    max_concurrency requests; others wait, high-priority ones ahead of low-priority
+    ones. The queue delay is the age of the oldest waiting request:
+
+    - low-priority requests (batches, streams, or X-Priority: low) are shed as soon
+      as the queue delay exceeds the target, and wait at most the target;
+    - high-priority requests wait at most max_wait, and are shed when max_queue
+      high-priority requests are already waiting.
+
+    Admitted requests therefore never wait longer than max_wait, which bounds tail
+    latency however far the offered load exceeds capacity. Shed requests get a
+    Retry-After of about the current queue delay.
+
+    While the queue delay exceeds the target, or the inference scheduler holds
+    more than degrade_queue_depth texts, should_degrade() tells /analyze to answer
+    with the lexicon analyzers only, so admitted requests finish quickly and the
+    queue drains.
+    """
+
+    def __init__(self, max_concurrency=ADMISSION_MAX_CONCURRENCY, target_latency=ADMISSION_TARGET_LATENCY_MS / 1000,
+                 max_wait=ADMISSION_MAX_WAIT_MS / 1000, max_queue=ADMISSION_MAX_QUEUE,
+                 degraded_mode=ADMISSION_DEGRADED_MODE, degrade_queue_depth=ADMISSION_DEGRADE_QUEUE_DEPTH,
+                 clock=time.monotonic):
+        self.max_concurrency = max_concurrency
+        self.target_latency = target_latency
+        self.max_wait = max_wait
+        self.max_queue = max_queue
+        self.degraded_mode = degraded_mode
+        self.degrade_queue_depth = degrade_queue_depth
+        self._clock = clock
+        self._condition = threading.Condition()
+        self._waiting = {lane: deque() for lane in LANES}  # _Waiters, oldest first
+        self.in_flight = 0
+        self.admitted = {lane: 0 for lane in LANES}
+        self.shed = {lane: 0 for lane in LANES}
+        self.degraded = 0
+        # The lock belongs to the process that created it; a forked worker starts afresh
+        ref = weakref.ref(self)
+        os.register_at_fork(after_in_child=lambda: ref() is not None and ref()._reset_after_fork())
+
+    def _reset_after_fork(self):
+        self._condition = threading.Condition()
+        self._waiting = {lane: deque() for lane in LANES}
+        self.in_flight = 0
+
+    def queue_delay(self, now=None):
+        """
+        Returns how long, in seconds, the oldest waiting request has waited; 0 if none is waiting.
+        """
+        now = self._clock() if now is None else now
+        oldest = [waiting[0].arrival for waiting in self._waiting.values() if waiting]
+        return now - min(oldest) if oldest else 0.0
+
+    def acquire(self, lane=HIGH):
+        """
+        Waits for a slot in the lane's turn.
+
+        Args:
+            lane (str): HIGH or LOW.
+
+        Returns:
+            float: Seconds spent waiting.
+
+        Raises:
+            Overloaded: If the request is shed.
+        """
+        with self._condition:
+            start = self._clock()
+            waiting = self._waiting[lane]
+            if lane == LOW and self.queue_delay(start) > self.target_latency:
+                raise self._shed(lane, start)
+            if self.in_flight < self.max_concurrency and self._is_next(lane, None):
+                return self._admit(lane, start, start)
+            # Low-priority waiters don't take queue places from high-priority ones
+            queued = len(self._waiting[HIGH]) + (len(waiting) if lane == LOW else 0)
+            if queued >= self.max_queue:
+                raise self._shed(lane, start)
+
+            deadline = start + (self.max_wait if lane == HIGH else self.target_latency)
+            marker = _Waiter(start)
+            waiting.append(marker)
+            try:
+                while not (self.in_flight < self.max_concurrency and self._is_next(lane, marker)):
+                    remaining = deadline - self._clock()
+                    if remaining <= 0:
+                        raise self._shed(lane, start)
+                    self._condition.wait(remaining)
+            finally:
+                waiting.remove(marker)
+                self._condition.notify_all()  # The next waiter may be eligible now
+            return self._admit(lane, start, self._clock())
+
+    def release(self):
+        """
+        Frees the slot of a finished request.
+        """
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def should_degrade(self, transformers_pipeline=None):
+        """
+        Returns True if requests should skip the transformer: the admission queue is
+        over its target delay, or the inference scheduler's queue is saturated.
+        """
+        if not self.degraded_mode:
+            return False
+        with self._condition:
+            overloaded = self.queue_delay() > self.target_latency
+        if not overloaded and isinstance(transformers_pipeline, InferenceScheduler):
+            overloaded = transformers_pipeline.queue_depth >= self.degrade_queue_depth
+        if overloaded:
+            self.degraded += 1
+            get_metrics().inc("sentiment_requests_degraded_total")
+        return overloaded
+
+    def stats(self):
+        with self._condition:
+            return {
+                "in_flight": self.in_flight,
+                "waiting": {lane: len(waiting) for lane, waiting in self._waiting.items()},
+                "queue_delay": self.queue_delay(),
+                "admitted": dict(self.admitted),
+                "shed": dict(self.shed),
+                "degraded": self.degraded
+            }
+
+    def _is_next(self, lane, marker):
+        """
+        Returns True if no waiter is ahead: high-priority waiters go first, then arrival order.
+        """
+        high = self._waiting[HIGH]
+        if lane == HIGH:
+            return not high or high[0] is marker
+        low = self._waiting[LOW]
+        return not high and (not low or low[0] is marker)
+
+    def _admit(self, lane, start, now):
+        self.in_flight += 1
+        self.admitted[lane] += 1
+        get_metrics().observe("sentiment_admission_wait_seconds", now - start, lane=lane)
+        return now - start
+
+    def _shed(self, lane, now):
+        self.shed[lane] += 1
+        get_metrics().inc("sentiment_requests_shed_total", lane=lane)
+        retry_after = max(1, math.ceil(self.queue_delay(now)))
+        logger.debug(f"Shedding {lane} priority request, queue delay {self.queue_delay(now):.3f}s")
+        return Overloaded(lane, retry_after)
+
+_admission_controller = None
+_admission_controller_lock = threading.Lock()
+
+def get_admission_controller():
+    """
+    Returns the process-wide admission controller, or None if ADMISSION_MAX_CONCURRENCY is 0.
+
+    Environment Variables:
+        ADMISSION_MAX_CONCURRENCY (int): Requests analyzed at once per worker. Defaults to
+                                         INFERENCE_MAX_BATCH_SIZE; 0 disables admission control.
+        ADMISSION_TARGET_LATENCY_MS (float): Queue delay above which low-priority requests are
+                                             shed and /analyze degrades. Defaults to 100.
+        ADMISSION_MAX_WAIT_MS (float): Longest queue wait for high-priority requests. Defaults to 1000.
+        ADMISSION_MAX_QUEUE (int): Waiting requests beyond which new ones are shed.
+        ADMISSION_DEGRADED_MODE (bool): Answer with the lexicon analyzers only under overload. Defaults to True.
+        ADMISSION_DEGRADE_QUEUE_DEPTH (int): Inference scheduler queue depth that counts as saturated.
+    """
+    global _admission_controller
+    if ADMISSION_MAX_CONCURRENCY <= 0:
+        return None
+    if _admission_controller is None:
+        with _admission_controller_lock:
+            if _admission_controller is None:
+                _admission_controller = AdmissionController()
+    return _admission_controller
+
+def request_lane(priority):
+    """
+    Returns the lane for a priority header value; clients may only lower their own priority.
+    """
+    return LOW if priority and priority.strip().lower() == LOW else HIGH
+
+def simulate(controller, overload, service_time, duration):
+    """
+    Offers a controller overload times the traffic it can serve, from one thread per
+    request, alternating between the high and low lanes.
+
+    Args:
+        controller (AdmissionController): The controller under test.
+        overload (float): Offered load as a multiple of capacity.
+        service_time (float): Seconds each admitted request takes.
+        duration (float): Seconds of traffic to offer.
+
+    Returns:
+        dict: Per lane, the requests admitted and shed and the p50/p99 latency of admitted requests.
+    """
+    capacity = controller.max_concurrency / service_time
+    interval = 1 / (capacity * overload)
+    latencies = {lane: [] for lane in LANES}
+    shed = {lane: 0 for lane in LANES}
+    lock = threading.Lock()
+
+    def request(lane):
+        start = time.monotonic()
+        try:
+            controller.acquire(lane)
+        except Overloaded:
+            with lock:
+                shed[lane] += 1
+            return
+        try:
+            time.sleep(service_time)
+        finally:
+            controller.release()
+        with lock:
+            latencies[lane].append(time.monotonic() - start)
+
+    threads = []
+    start = time.monotonic()
+    count = 0
+    while time.monotonic() - start < duration:
+        lane = LANES[count % 2]
+        thread = threading.Thread(target=request, args=(lane,))
+        thread.start()
+        threads.append(thread)
+        count += 1
+        time.sleep(max(0.0, start + count * interval - time.monotonic()))
+    for thread in threads:
+        thread.join()
+
+    report = {}
+    for lane in LANES:
+        ordered = sorted(latencies[lane])
+        report[lane] = {
+            "admitted": len(ordered),
+            "shed": shed[lane],
+            "p50": ordered[len(ordered) // 2] if ordered else None,
+            "p99": ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] if ordered else None
+        }
+    return report
+
+def main(argv=None):
+    """
+    Simulates overload against an admission controller and prints the latency each lane sees.
+    """
+    parser = argparse.ArgumentParser(description="Admission control overload simulation")
+    parser.add_argument("--overload", type=float, default=3.0, help="Offered load as a multiple of capacity")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--service-ms", type=float, default=20.0)
+    parser.add_argument("--duration", type=float, default=5.0)
+    args = parser.parse_args(argv)
+
+    controller = AdmissionController(max_concurrency=args.concurrency, max_queue=4 * args.concurrency)
+    report = simulate(controller, args.overload, args.service_ms / 1000, args.duration)
+    for lane, figures in report.items():
+        p50 = "-" if figures["p50"] is None else f"{figures['p50'] * 1000:.1f} ms"
+        p99 = "-" if figures["p99"] is None else f"{figures['p99'] * 1000:.1f} ms"
+        print(f"{lane:>4}: {figures['admitted']} admitted, {figures['shed']} shed, p50 {p50}, p99 {p99}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,194 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from decouple import config
+
+logger = logging.getLogger(__name__)
+
+# Constants
+ANALYZER_TIMEOUT = config("ANALYZER_TIMEOUT", default=10, cast=float)  # Seconds per analyzer call
+ANALYZER_THREAD_WORKERS = config("ANALYZER_THREAD_WORKERS", default=min(32, (os.cpu_count() or 1) + 4), cast=int)
+ANALYZER_PROCESS_WORKERS = config("ANALYZER_PROCESS_WORKERS", default=os.cpu_count() or 1, cast=int)
+ANALYZER_PROCESS_START_METHOD = config("ANALYZER_PROCESS_START_METHOD", default="forkserver")
+TEXTBLOB_EXECUTOR = config("TEXTBLOB_EXECUTOR", default="process")
+NLTK_EXECUTOR = config("NLTK_EXECUTOR", default="thread")
+TRANSFORMERS_EXECUTOR = config("TRANSFORMERS_EXECUTOR", default="thread")
+
+EXECUTOR_KINDS = ("inline", "thread", "process")
+
+class AnalyzerExecutor:
+    """
+    Dispatches analyzer calls to a thread pool or a process pool, per analyzer,
+    so the three analyzers of a request actually run in parallel.
+
+    Threads suit torch, which releases the GIL during inference. Processes suit
+    pure-Python analyzers such as TextBlob, which would otherwise serialize on
+    the GIL. "inline" runs the call on the event loop thread.
+
+    Every call is bounded by a timeout. Queued work is cancelled when its
+    timeout expires. Work that is already running in the process pool is
+    stopped by terminating and replacing the pool, which also fails any other
+    calls in flight on that pool. Running threads cannot be interrupted, so a
+    timed-out thread call is abandoned and its result discarded.
+    """
+
+    def __init__(self, kinds=None, thread_workers=ANALYZER_THREAD_WORKERS,
+                 process_workers=ANALYZER_PROCESS_WORKERS, timeout=ANALYZER_TIMEOUT,
+                 start_method=ANALYZER_PROCESS_START_METHOD):
+        self.kinds = {
+            "textblob": TEXTBLOB_EXECUTOR,
+            "nltk": NLTK_EXECUTOR,
+            "transformers": TRANSFORMERS_EXECUTOR
+        }
+        self.kinds.update(kinds or {})
+        for analyzer, kind in self.kinds.items():
+            if kind not in EXECUTOR_KINDS:
+                raise ValueError(f"Invalid executor '{kind}' for {analyzer}; expected one of {EXECUTOR_KINDS}")
+        if self.kinds["transformers"] == "process":
+            raise ValueError("The transformers pipeline cannot be sent to a process pool; use 'thread'")
+        self.thread_workers = thread_workers
+        self.process_workers = process_workers
+        self.timeout = timeout
+        self.start_method = start_method
+        self._thread_pool = None
+        self._process_pool = None
+        self._lock = threading.Lock()
+        self.timeouts = 0
+        self.process_pool_restarts = 0
+        # Pools belong to the process that created them; a forked worker starts its own
+        ref = weakref.ref(self)
+        os.register_at_fork(after_in_child=lambda: ref() is not None and ref()._reset_after_fork())
+
+    def _reset_after_fork(self):
+        self._thread_pool = None
+        self._process_pool = None
+        self._lock = threading.Lock()
+
+    def kind(self, analyzer):
+        return self.kinds.get(analyzer, "thread")
+
+    async def run(self, analyzer, fn, *args, timeout=None):
+        """
+        Runs fn(*args) on the executor configured for an analyzer.
+
+        Args:
+            analyzer (str): The analyzer name ("textblob", "nltk" or "transformers").
+            fn (callable): The function to run. Must be picklable for process executors.
+            *args: Arguments for fn.
+            timeout (float): Seconds to wait, defaulting to the executor's timeout.
+
+        Returns:
+            The return value of fn.
+
+        Raises:
+            TimeoutError: If the call does not finish in time.
+        """
+        kind = self.kind(analyzer)
+        if kind == "inline":
+            return fn(*args)
+
+        pool = self._get_process_pool() if kind == "process" else self._get_thread_pool()
+        future = pool.submit(fn, *args)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout or self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            logger.error(f"{analyzer} analyzer timed out after {timeout or self.timeout}s")
+            if not future.cancel() and kind == "process":
+                self._restart_process_pool(pool)
+            raise
+        except BrokenProcessPool:
+            self._restart_process_pool(pool)  # A worker died; the pool can't be reused
+            raise
+
+    async def map_chunks(self, analyzer, fn, items, timeout=None):
+        """
+        Splits items into one chunk per worker and runs fn(chunk) for every chunk
+        concurrently on the analyzer's executor.
+
+        Args:
+            analyzer (str): The analyzer name.
+            fn (callable): A function taking a list of items and returning a list of results.
+            items (list): The items to process.
+            timeout (float): Seconds to wait per chunk, defaulting to the executor's timeout.
+
+        Returns:
+            list: The concatenated results, in input order.
+        """
+        if not items:
+            return []
+        workers = self.process_workers if self.kind(analyzer) == "process" else self.thread_workers
+        chunk_size = max(1, -(-len(items) // max(1, workers)))
+        chunks = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+        results = await asyncio.gather(*(self.run(analyzer, fn, chunk, timeout=timeout) for chunk in chunks))
+        return [result for chunk_results in results for result in chunk_results]
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            if self._thread_pool is not None:
+                self._thread_pool.shutdown(wait=wait, cancel_futures=True)
+                self._thread_pool = None
+            if self._process_pool is not None:
+                self._process_pool.shutdown(wait=wait, cancel_futures=True)
+                self._process_pool = None
+
+    def _get_thread_pool(self):
+        if self._thread_pool is None:
+            with self._lock:
+                if self._thread_pool is None:
+                    self._thread_pool = ThreadPoolExecutor(
+                        max_workers=self.thread_workers, thread_name_prefix="analyzer"
+                    )
+        return self._thread_pool
+
+    def _get_process_pool(self):
+        if self._process_pool is None:
+            with self._lock:
+                if self._process_pool is None:
+                    self._process_pool = ProcessPoolExecutor(
+                        max_workers=self.process_workers,
+                        mp_context=multiprocessing.get_context(self.start_method)
+                    )
+        return self._process_pool
+
+    def _restart_process_pool(self, pool):
+        with self._lock:
+            if self._process_pool is not pool:
+                return  # Another call already replaced it
+            self._process_pool = None
+            self.process_pool_restarts += 1
+        # ProcessPoolExecutor has no public way to stop running work before Python 3.14
+        workers = dict(getattr(pool, "_processes", None) or {})
+        pool.shutdown(wait=False, cancel_futures=True)
+        for worker in workers.values():
+            worker.terminate()
+        logger.warning(f"Replaced the analyzer process pool, terminating {len(workers)} workers")
+
+_analyzer_executor = None
+_analyzer_executor_lock = threading.Lock()
+
+def get_analyzer_executor():
+    """
+    Returns the process-wide analyzer executor, creating it from configuration on first use.
+
+    Environment Variables:
+        TEXTBLOB_EXECUTOR (str): "inline", "thread" or "process". Defaults to "process".
+        NLTK_EXECUTOR (str): "inline", "thread" or "process". Defaults to "thread".
+        TRANSFORMERS_EXECUTOR (str): "inline" or "thread". Defaults to "thread".
+        ANALYZER_TIMEOUT (float): Seconds allowed per analyzer call. Defaults to 10.
+        ANALYZER_THREAD_WORKERS (int): Thread pool size. Defaults to min(32, CPU count + 4).
+        ANALYZER_PROCESS_WORKERS (int): Process pool size. Defaults to the CPU count; server_launcher
+                                        divides it across its workers.
+        ANALYZER_PROCESS_START_METHOD (str): multiprocessing start method. Defaults to "forkserver".
+    """
+    global _analyzer_executor
+    if _analyzer_executor is None:
+        with _analyzer_executor_lock:
+            if _analyzer_executor is None:
+                _analyzer_executor = AnalyzerExecutor()
+    return _analyzer_executor
@@ -0,0 +1,470 @@
+from limits import parse
+from admission_control import (
+    get_admission_controller, request_lane, Overloaded, PRIORITY_HEADER, LOW,
+    ADMISSION_MAX_CONCURRENCY, ADMISSION_MAX_QUEUE
+)
+from sentiment_analysis import analyze_sentiment_combined
+from inference_scheduler import InferenceScheduler
+from model_registry import get_model_registry
+from metrics import get_metrics, CONTENT_TYPE as METRICS_CONTENT_TYPE
+from rate_limiting import get_rate_limiter, API_KEY_HEADER
+from result_format import compact, negotiate, encode, JSON
+from stream_processing import (
+    parse_jsonl_record, analyze_records, inference_backlogged, ndjson_lines, InvalidRecord,
+    STREAM_BATCH_SIZE, STREAM_WORKERS, STREAM_MAX_LINE_BYTES
+)
+from utils import MAX_INPUT_LENGTH
+from decouple import config
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs
+import logging
+import asyncio
+import functools
+import json
+import math
+import time
+
+# ----------------------------- #
+# App Initialization
+# ----------------------------- #
+
+# Constants
+RATE_LIMIT = parse(config("RATE_LIMIT", default="10 per minute"))
+BATCH_RATE_LIMIT = parse(config("BATCH_RATE_LIMIT", default="20000 per minute"))  # Counted per item
+REQUEST_TIMEOUT = config("REQUEST_TIMEOUT", default=15, cast=int)
+# Transport cap only: a character may take 12 bytes as a JSON-escaped surrogate pair
+# (\ud83d\ude00); MAX_INPUT_LENGTH is enforced on the parsed text, as in flask_api.
+MAX_BODY_BYTES = config("MAX_BODY_BYTES", default=MAX_INPUT_LENGTH * 12 + 4096, cast=int)
+
+# Rate Limiting Setup, the same limiter and backends as flask_api
+rate_limiter = get_rate_limiter()
+
+# Admission waits block on the controller's condition variable, so they get their
+# own threads rather than tying up the event loop's default executor
+_admission_waiters = ThreadPoolExecutor(max_workers=max(1, ADMISSION_MAX_CONCURRENCY + ADMISSION_MAX_QUEUE),
+                                        thread_name_prefix="admission")
+_PRIORITY_HEADER = PRIORITY_HEADER.lower().encode("latin-1")
+
+async def get_pipeline():
+    """
+    Returns the worker's pipeline from the model registry, waiting off the event
+    loop if it is still loading. Every in-flight request shares the same model.
+    """
+    registry = get_model_registry()
+    if registry.ready:
+        return registry.get()
+    return await asyncio.get_running_loop().run_in_executor(None, registry.get)
+
+# ----------------------------- #
+# Helpers
+# ----------------------------- #
+
+class HTTPError(Exception):
+    def __init__(self, status, message, headers=None):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.headers = headers or []
+
+async def send_json(send, status, payload, headers=None, media_type=JSON):
+    body = encode(payload, media_type)
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", media_type.encode("ascii")),
+            (b"content-length", str(len(body)).encode("ascii")),
+            *(headers or [])
+        ]
+    })
+    await send({"type": "http.response.body", "body": body})
+
+def error_trailer(error):
+    """
+    Returns the NDJSON trailer that reports an HTTPError raised after a stream's response started.
+    """
+    trailer = {"error": error.message}
+    for name, value in error.headers:
+        if name == b"retry-after":
+            trailer["retry_after"] = int(value)
+    return trailer
+
+async def read_body(receive):
+    chunks = []
+    size = 0
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            raise ConnectionError("Client disconnected")
+        chunk = message.get("body", b"")
+        size += len(chunk)
+        if size > MAX_BODY_BYTES:
+            raise HTTPError(413, "Request body too large")
+        chunks.append(chunk)
+        if not message.get("more_body", False):
+            return b"".join(chunks)
+
+async def receive_lines(receive, max_line_bytes=STREAM_MAX_LINE_BYTES):
+    """
+    Yields the lines of a streamed request body as they arrive.
+
+    The body is only read when the consumer asks for the next line, so a
+    consumer that stops asking leaves the rest in the server's buffers and,
+    past those, in the client's socket.
+
+    Yields:
+        str or InvalidRecord: Each line decoded as UTF-8, or an InvalidRecord for
+        a line longer than max_line_bytes, which is discarded rather than buffered.
+    """
+    buffer = b""
+    oversized = False
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            raise ConnectionError("Client disconnected")
+        buffer += message.get("body", b"")
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if oversized:
+                oversized = False
+                yield InvalidRecord(f"Line exceeds {max_line_bytes} bytes")
+            elif len(line) > max_line_bytes:
+                yield InvalidRecord(f"Line exceeds {max_line_bytes} bytes")
+            else:
+                yield line.decode("utf-8", errors="replace")
+        if len(buffer) > max_line_bytes:
+            oversized = True
+            buffer = b""
+        if not message.get("more_body", False):
+            if oversized:
+                yield InvalidRecord(f"Line exceeds {max_line_bytes} bytes")
+            elif buffer:
+                yield buffer.decode("utf-8", errors="replace")
+            return
+
+async def receive_records(lines, count):
+    """
+    Returns the next count records from receive_lines, skipping blank lines. Fewer means the body ended.
+    """
+    records = []
+    async for line in lines:
+        if isinstance(line, InvalidRecord):
+            records.append(line)
+        elif line.strip():
+            records.append(parse_jsonl_record(line))
+        if len(records) >= count:
+            break
+    return records
+
+def query_flag(scope, name, default=True):
+    values = parse_qs(scope.get("query_string", b"").decode("latin-1")).get(name)
+    if not values:
+        return default
+    return values[-1].lower() not in ("false", "0", "no")
+
+def client_address(scope):
+    client = scope.get("client")
+    return client[0] if client else "127.0.0.1"
+
+_API_KEY_HEADER = API_KEY_HEADER.lower().encode("latin-1")
+
+def header(scope, name):
+    for key, value in scope.get("headers", []):
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+def api_key(scope):
+    return header(scope, _API_KEY_HEADER)
+
+async def check_rate_limit(scope, name, limit, cost=1):
+    """
+    Raises a 429 HTTPError with Retry-After when the request is over the limit.
+    Network backends are called off the event loop.
+    """
+    args = (name, client_address(scope), limit, cost, api_key(scope))
+    if rate_limiter.backend.blocking:
+        result = await asyncio.get_running_loop().run_in_executor(None, rate_limiter.hit, *args)
+    else:
+        result = rate_limiter.hit(*args)
+    if not result.allowed:
+        raise HTTPError(429, f"Rate limit exceeded: {limit}",
+                        [(b"retry-after", str(math.ceil(result.retry_after)).encode("ascii"))])
+
+def admitted(lane):
+    """
+    Queues requests behind the admission controller, like flask_api.admitted,
+    shedding them with 503 and Retry-After. The slot is held until the handler
+    has sent its response, for streams until the stream ends.
+
+    Args:
+        lane (str | callable): HIGH or LOW, or a function of the scope returning the request's lane.
+    """
+    def decorator(handler):
+        @functools.wraps(handler)
+        async def wrapper(scope, receive, send):
+            controller = get_admission_controller()
+            if controller is None:
+                return await handler(scope, receive, send)
+            waiting = asyncio.get_running_loop().run_in_executor(
+                _admission_waiters, controller.acquire, lane(scope) if callable(lane) else lane
+            )
+            try:
+                await asyncio.shield(waiting)
+            except Overloaded as e:
+                raise HTTPError(503, "Server overloaded, retry later",
+                                [(b"retry-after", str(e.retry_after).encode("ascii"))])
+            except asyncio.CancelledError:
+                # The wait goes on in its thread; give back a slot it wins after the client left
+                waiting.add_done_callback(lambda future: future.exception() is None and controller.release())
+                raise
+            try:
+                return await handler(scope, receive, send)
+            finally:
+                controller.release()
+        return wrapper
+    return decorator
+
+def _analyze_lane(scope):
+    return request_lane(header(scope, _PRIORITY_HEADER))
+
+# ----------------------------- #
+# Routes
+# ----------------------------- #
+
+async def analyze_sentiment_asgi(scope, receive, send):
+    """
+    Analyze sentiment from input text.
+    Same request/response contract as flask_api.analyze_sentiment_api:
+    POST {"text": "..."} returns the analyze_sentiment_combined result as JSON,
+    or as MessagePack when the Accept header prefers it. Requests are admitted
+    and shed, and degrade to the lexicon analyzers, as in flask_api.
+    """
+    await check_rate_limit(scope, "analyze", RATE_LIMIT)
+    await _analyze_admitted(scope, receive, send)
+
+@admitted(_analyze_lane)
+async def _analyze_admitted(scope, receive, send):
+    """
+    The part of analyze_sentiment_asgi that runs holding an admission slot.
+    """
+    try:
+        data = json.loads(await read_body(receive))
+    except ValueError as e:
+        logging.error(f"Invalid JSON payload: {e}")
+        raise HTTPError(400, "Invalid JSON payload")
+
+    if not isinstance(data, dict) or 'text' not in data:
+        logging.warning("Missing 'text' in request")
+        raise HTTPError(400, "Missing 'text' in request")
+
+    text = data['text']
+
+    if not isinstance(text, str):
+        logging.warning("Invalid type for 'text'")
+        raise HTTPError(400, "'text' must be a string")
+
+    if len(text) > MAX_INPUT_LENGTH:
+        logging.warning("Text too long")
+        raise HTTPError(400, f"Text exceeds {MAX_INPUT_LENGTH} characters")
+
+    include_chunks = data.get('include_chunks', False)
+    if not isinstance(include_chunks, bool):
+        raise HTTPError(400, "'include_chunks' must be a boolean")
+
+    include_text = data.get('include_text', True)
+    if not isinstance(include_text, bool):
+        raise HTTPError(400, "'include_text' must be a boolean")
+
+    # Under overload, answer from the lexicon analyzers rather than queue for the transformer
+    pipeline = await get_pipeline()
+    controller = get_admission_controller()
+    mode = "lexicon" if controller is not None and controller.should_degrade(pipeline) else None
+
+    try:
+        result = await asyncio.wait_for(
+            analyze_sentiment_combined(text, pipeline, mode=mode, include_chunks=include_chunks),
+            REQUEST_TIMEOUT
+        )
+    except asyncio.TimeoutError:
+        logging.error("Request timed out")
+        raise HTTPError(504, "Request timed out")
+    except Exception as e:
+        logging.exception("Unexpected error during analysis")
+        raise HTTPError(500, "Internal server error")
+
+    with get_metrics().time("sentiment_stage_seconds", stage="serialize"):
+        media_type = negotiate(header(scope, b"accept"))
+        await send_json(send, 200, compact(result, include_text), [(b"vary", b"Accept")], media_type)
+
+@admitted(LOW)
+async def analyze_stream_asgi(scope, receive, send):
+    """
+    Analyze sentiment for a stream of texts, like flask_api.analyze_sentiment_stream_api.
+
+    The NDJSON body is read in batches of STREAM_BATCH_SIZE lines, and results
+    are sent as a chunked NDJSON response in input order as batches complete.
+    At most STREAM_WORKERS * 2 batches are in flight, and while the inference
+    scheduler's queue is backlogged the oldest batch is awaited first; until
+    then receive() is not called, so the server stops reading the socket and
+    TCP flow control pushes back on the client.
+    """
+    include_text = query_flag(scope, "include_text")
+    lines = receive_lines(receive, STREAM_MAX_LINE_BYTES)
+    batch = await receive_records(lines, STREAM_BATCH_SIZE)
+    await check_rate_limit(scope, "batch", BATCH_RATE_LIMIT, max(1, len(batch)))
+    pipeline = await get_pipeline()
+
+    await send({
+        "type": "http.response.start",
+        "status": 200,
+        "headers": [(b"content-type", b"application/x-ndjson")]
+    })
+    in_flight = deque()
+    written = 0
+
+    async def send_oldest():
+        nonlocal written
+        results = await in_flight.popleft()
+        await send({"type": "http.response.body", "body": ndjson_lines(written, results, include_text),
+                    "more_body": True})
+        written += len(results)
+
+    error = None
+    try:
+        while batch:
+            in_flight.append(asyncio.ensure_future(analyze_records(batch, pipeline)))
+            while in_flight and (len(in_flight) > STREAM_WORKERS * 2 or in_flight[0].done()
+                                 or inference_backlogged(pipeline)):
+                await send_oldest()
+            batch = await receive_records(lines, STREAM_BATCH_SIZE)
+            if batch:
+                try:
+                    await check_rate_limit(scope, "batch", BATCH_RATE_LIMIT, len(batch))
+                except HTTPError as e:
+                    # Stop reading, but send the batches already charged, like flask_api's metered_records
+                    error = error_trailer(e)
+                    break
+        while in_flight:
+            await send_oldest()
+    except HTTPError as e:
+        error = error_trailer(e)
+    except ConnectionError:
+        raise
+    except Exception:
+        logging.exception("Unexpected error during stream analysis")
+        error = {"error": "Internal server error"}
+    finally:
+        for task in in_flight:
+            task.cancel()
+    if error is not None:
+        await send({"type": "http.response.body", "body": encode(error) + b"\n", "more_body": True})
+    await send({"type": "http.response.body", "body": b""})
+
+async def health_asgi(scope, receive, send):
+    """
+    Report whether the sentiment model is loaded, like flask_api.health.
+    """
+    registry = get_model_registry()
+    await send_json(send, 200 if registry.ready else 503, registry.health())
+
+async def metrics_asgi(scope, receive, send):
+    """
+    Expose request, stage, cache and model metrics for Prometheus, like flask_api.metrics_endpoint.
+    """
+    body = get_metrics().render().encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": 200,
+        "headers": [
+            (b"content-type", METRICS_CONTENT_TYPE.encode("ascii")),
+            (b"content-length", str(len(body)).encode("ascii"))
+        ]
+    })
+    await send({"type": "http.response.body", "body": body})
+
+ROUTES = {
+    ("POST", "/analyze"): analyze_sentiment_asgi,
+    ("POST", "/analyze/stream"): analyze_stream_asgi,
+    ("GET", "/health"): health_asgi,
+    ("GET", "/metrics"): metrics_asgi
+}
+
+# ----------------------------- #
+# ASGI Application
+# ----------------------------- #
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            # Accept connections while the model loads; /health reports "loading" until then
+            get_model_registry().warm_up(background=True)
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            registry = get_model_registry()
+            if registry.ready and isinstance(registry.get(), InferenceScheduler):
+                registry.get().close(timeout=5)
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+async def app(scope, receive, send):
+    """
+    ASGI entry point. Serves the API on a single long-lived event loop per worker,
+    so slow clients cost a coroutine rather than a thread.
+    """
+    if scope["type"] == "lifespan":
+        await lifespan(receive, send)
+        return
+    if scope["type"] != "http":
+        return
+
+    handler = ROUTES.get((scope["method"], scope["path"]))
+    metrics = get_metrics()
+    status = 500
+
+    async def send_recording_status(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        await send(message)
+
+    start = time.perf_counter()
+    metrics.add_gauge("sentiment_requests_in_flight", 1)
+    try:
+        if handler is None:
+            if any(path == scope["path"] for _, path in ROUTES):
+                raise HTTPError(405, "Method not allowed")
+            raise HTTPError(404, "Not found")
+        await handler(scope, receive, send_recording_status)
+    except HTTPError as e:
+        await send_json(send_recording_status, e.status, {"error": e.message}, e.headers)
+    except ConnectionError:
+        logging.info("Client disconnected before the request was read")
+    finally:
+        metrics.add_gauge("sentiment_requests_in_flight", -1)
+        endpoint = scope["path"] if handler is not None else "unmatched"
+        metrics.observe("sentiment_request_seconds", time.perf_counter() - start, endpoint=endpoint)
+        metrics.inc("sentiment_requests_total", endpoint=endpoint, status=status)
+
+# ----------------------------- #
+# Entry Point
+# ----------------------------- #
+
+def start_asgi_server():
+    import uvicorn
+
+    uvicorn.run(
+        "asgi_api:app",
+        host=config("HOST", default="0.0.0.0"),
+        port=config("PORT", default=5000, cast=int),
+        workers=config("WORKERS", default=1, cast=int),
+        ssl_certfile=config("SSL_CERT_PATH", default="cert.pem"),
+        ssl_keyfile=config("SSL_KEY_PATH", default="key.pem"),
+        log_level=config("LOG_LEVEL", default="INFO").lower()
+    )
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    start_asgi_server()
@@ -0,0 +1,337 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import ssl
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from decouple import config
+from utils import sanitize_input, detect_language_code, MAX_INPUT_LENGTH
+from sentiment_analysis import textblob_label, nltk_label, get_transformers_sentiment
+from inference_scheduler import InferenceScheduler
+
+logger = logging.getLogger(__name__)
+
+# Constants
+BENCHMARK_SEED = config("BENCHMARK_SEED", default=1234, cast=int)
+REGRESSION_THRESHOLD = config("REGRESSION_THRESHOLD", default=0.2, cast=float)  # Allowed relative slowdown
+
+# Target length in characters and share of traffic, shaped like review traffic:
+# mostly short texts with a long tail up to MAX_INPUT_LENGTH
+LENGTH_DISTRIBUTION = [(80, 0.5), (400, 0.3), (2000, 0.15), (9000, 0.05)]
+STAGES = ("sanitize", "detect_language", "textblob", "vader", "transformer")
+
+_WORDS = {
+    "positive": ["great", "love", "excellent", "comfortable", "fast", "reliable", "beautiful", "happy"],
+    "negative": ["terrible", "broken", "slow", "disappointing", "cheap", "noisy", "refund", "awful"],
+    "neutral": ["the", "battery", "screen", "delivery", "box", "price", "colour", "size", "week", "app"]
+}
+
+def generate_texts(count, seed=BENCHMARK_SEED, distribution=LENGTH_DISTRIBUTION):
+    """
+    Generates reproducible review-like texts whose lengths follow a distribution.
+
+    Every text is unique, so neither the result cache nor the language cache
+    turns repeated work into hits.
+
+    Args:
+        count (int): Number of texts.
+        seed (int): Random seed.
+        distribution (list): (target characters, share) pairs.
+
+    Returns:
+        list: (length bucket, text) pairs.
+    """
+    rng = random.Random(seed)
+    targets = [target for target, _ in distribution]
+    weights = [share for _, share in distribution]
+    texts = []
+    for i in range(count):
+        bucket = rng.choices(targets, weights)[0]
+        length = min(int(bucket * rng.uniform(0.75, 1.25)), MAX_INPUT_LENGTH)
+        tone = rng.choice(["positive", "negative"])
+        words = [f"Order {seed}-{i}:"]
+        size = len(words[0])
+        while size < length:
+            sentence = " ".join(
+                rng.choice(_WORDS[tone] if rng.random() < 0.3 else _WORDS["neutral"])
+                for _ in range(rng.randint(5, 12))
+            ).capitalize() + "."
+            words.append(sentence)
+            size += len(sentence) + 1
+        texts.append((bucket, " ".join(words)[:length]))
+    return texts
+
+def summarize(samples):
+    """
+    Returns count, mean and p50/p95/p99 of latency samples given in seconds, in milliseconds.
+    """
+    if not samples:
+        return {"count": 0, "mean_ms": 0.0, "p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0}
+    ordered = sorted(samples)
+
+    def percentile(p):
+        return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))] * 1000
+
+    return {
+        "count": len(ordered),
+        "mean_ms": sum(ordered) / len(ordered) * 1000,
+        "p50_ms": percentile(50),
+        "p95_ms": percentile(95),
+        "p99_ms": percentile(99)
+    }
+
+def bench_stages(texts, transformers_pipeline):
+    """
+    Times each analysis stage on every text, one call at a time.
+
+    The transformer stage goes through get_transformers_sentiment, so long texts
+    are chunked as they are in production. An InferenceScheduler is unwrapped
+    first: its batching wait is queueing, not model latency.
+
+    Args:
+        texts (list): (length bucket, text) pairs from generate_texts.
+        transformers_pipeline (callable): The pipeline timed as the transformer stage.
+
+    Returns:
+        dict: Per stage, the summarize() figures, texts_per_second and a
+              by_length breakdown of the same figures per length bucket.
+    """
+    if isinstance(transformers_pipeline, InferenceScheduler):
+        transformers_pipeline = transformers_pipeline.pipeline
+    loop = asyncio.new_event_loop()
+    stage_functions = {
+        "sanitize": sanitize_input,
+        "detect_language": detect_language_code,
+        "textblob": textblob_label,
+        "vader": nltk_label,
+        "transformer": lambda text: loop.run_until_complete(get_transformers_sentiment(text, transformers_pipeline))
+    }
+    sanitized = [(bucket, sanitize_input(text)) for bucket, text in texts]
+    results = {}
+    try:
+        for stage in STAGES:
+            function = stage_functions[stage]
+            inputs = texts if stage == "sanitize" else sanitized
+            samples = []
+            by_length = {}
+            for bucket, text in inputs:
+                start = time.perf_counter()
+                function(text)
+                elapsed = time.perf_counter() - start
+                samples.append(elapsed)
+                by_length.setdefault(bucket, []).append(elapsed)
+            total = sum(samples)
+            results[stage] = {
+                **summarize(samples),
+                "texts_per_second": len(samples) / total if total else 0.0,
+                "by_length": {str(bucket): summarize(values) for bucket, values in sorted(by_length.items())}
+            }
+    finally:
+        loop.close()
+    return results
+
+def run_load(send, texts, concurrency):
+    """
+    Sends every text through send() from a number of concurrent clients.
+
+    Args:
+        send (callable): Sends one text and returns the HTTP status code.
+        texts (list): The texts to send, one request each.
+        concurrency (int): Concurrent clients.
+
+    Returns:
+        dict: Latency figures, throughput_rps, and the count of non-200 responses as errors.
+    """
+    pending = iter(texts)
+    lock = threading.Lock()
+    latencies = []
+    errors = 0
+
+    def client():
+        nonlocal errors
+        while True:
+            with lock:
+                text = next(pending, None)
+            if text is None:
+                return
+            start = time.perf_counter()
+            try:
+                status = send(text)
+            except Exception as e:
+                logger.debug(f"Request failed: {e!r}")
+                status = None
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                errors += status != 200
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for _ in range(concurrency):
+            pool.submit(client)
+    elapsed = time.perf_counter() - start
+    return {
+        "concurrency": concurrency,
+        **summarize(latencies),
+        "throughput_rps": len(latencies) / elapsed if elapsed else 0.0,
+        "errors": errors
+    }
+
+def flask_sender():
+    """
+    Returns a send() that posts to /analyze in-process, with rate limiting and
+    admission control off, so shed requests don't count as errors.
+    """
+    import admission_control
+    from flask_api import app, limiter
+
+    limiter.enabled = False
+    admission_control.ADMISSION_MAX_CONCURRENCY = 0  # get_admission_controller() then returns None
+    clients = threading.local()
+
+    def send(text):
+        if not hasattr(clients, "client"):
+            clients.client = app.test_client()
+        return clients.client.post("/analyze", json={"text": text}).status_code
+
+    return send
+
+def http_sender(url, timeout=30, verify_tls=True):
+    """
+    Returns a send() that posts to a running server's /analyze endpoint.
+    """
+    context = None
+    if url.startswith("https") and not verify_tls:
+        context = ssl._create_unverified_context()  # Local servers use self-signed certificates
+
+    def send(text):
+        request = urllib.request.Request(
+            url, data=json.dumps({"text": text}).encode("utf-8"),
+            headers={"Content-Type": "application/json"}, method="POST"
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=timeout, context=context) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as e:
+            return e.code
+
+    return send
+
+def compare(results, baseline, threshold=REGRESSION_THRESHOLD):
+    """
+    Lists the figures that are worse than the baseline by more than threshold.
+
+    Stage and load latencies (p50/p95) regress when they grow; load throughput
+    regresses when it drops. Figures missing from either side are skipped.
+
+    Returns:
+        list: A human-readable description per regression.
+    """
+    regressions = []
+
+    def check(name, current, previous, higher_is_better=False):
+        if not previous:
+            return
+        change = (current - previous) / previous
+        if (change < -threshold) if higher_is_better else (change > threshold):
+            regressions.append(f"{name}: {previous:.3f} -> {current:.3f} ({change:+.0%})")
+
+    for stage, figures in results.get("stages", {}).items():
+        previous = baseline.get("stages", {}).get(stage, {})
+        for key in ("p50_ms", "p95_ms"):
+            check(f"stage {stage} {key}", figures[key], previous.get(key))
+    for level, figures in results.get("load", {}).items():
+        previous = baseline.get("load", {}).get(level, {})
+        check(f"load c={level} throughput_rps", figures["throughput_rps"], previous.get("throughput_rps"),
+              higher_is_better=True)
+        check(f"load c={level} p95_ms", figures["p95_ms"], previous.get("p95_ms"))
+    return regressions
+
+def _levels(value):
+    return [int(level) for level in value.split(",")]
+
+def main(argv=None):
+    """
+    Runs the stage benchmark and the /analyze load test, writes JSON results and
+    compares them with a baseline.
+
+    Example:
+        python benchmark.py --output results.json
+        python benchmark.py --baseline results.json        # exits 1 on regressions
+        python benchmark.py --url https://localhost:5000/analyze --insecure --skip-stages
+
+    Returns:
+        int: 0, or 1 if a regression against the baseline was found.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the sentiment analysis pipeline")
+    parser.add_argument("--backend", default="stub",
+                        help="INFERENCE_BACKEND for this run; the default stub runs offline without a model")
+    parser.add_argument("--texts", type=int, default=200, help="Texts per stage benchmark")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per concurrency level")
+    parser.add_argument("--concurrency", type=_levels, default=[1, 4, 16])
+    parser.add_argument("--url", help="Load test a running server instead of the in-process app")
+    parser.add_argument("--insecure", action="store_true", help="Don't verify the server's TLS certificate")
+    parser.add_argument("--skip-stages", action="store_true")
+    parser.add_argument("--skip-load", action="store_true")
+    parser.add_argument("--seed", type=int, default=BENCHMARK_SEED)
+    parser.add_argument("-o", "--output", help="Write results as JSON to this file")
+    parser.add_argument("--baseline", help="Compare with results previously written by --output")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    # Backends are imported when the model is first loaded, so this takes effect for the whole run
+    os.environ["INFERENCE_BACKEND"] = args.backend
+    from model_registry import get_pipeline
+
+    results = {
+        "environment": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "backend": args.backend,
+            "target": args.url or "in-process",
+            "seed": args.seed,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+        }
+    }
+    if not args.skip_stages:
+        results["stages"] = bench_stages(generate_texts(args.texts, args.seed), get_pipeline())
+    if not args.skip_load:
+        send = http_sender(args.url, verify_tls=not args.insecure) if args.url else flask_sender()
+        results["load"] = {}
+        for index, concurrency in enumerate(args.concurrency):
+            texts = [text for _, text in generate_texts(args.requests, args.seed + index + 1)]
+            results["load"][str(concurrency)] = run_load(send, texts, concurrency)
+
+    for stage, figures in results.get("stages", {}).items():
+        print(f"{stage:<16} p50 {figures['p50_ms']:9.3f} ms  p95 {figures['p95_ms']:9.3f} ms  "
+              f"p99 {figures['p99_ms']:9.3f} ms  {figures['texts_per_second']:9.1f} texts/s")
+    for level, figures in results.get("load", {}).items():
+        print(f"concurrency {level:<4} {figures['throughput_rps']:8.1f} req/s  p50 {figures['p50_ms']:8.2f} ms  "
+              f"p95 {figures['p95_ms']:8.2f} ms  p99 {figures['p99_ms']:8.2f} ms  errors {figures['errors']}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        results["regressions"] = regressions
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    sys.exit(main())
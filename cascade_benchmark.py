@@ -0,0 +1,168 @@
+import argparse
+import asyncio
+import json
+import logging
+import time
+from sentiment_analysis import (
+    textblob_polarity, nltk_compound, needs_transformer, polarity_label, get_transformers_sentiment_many,
+    CASCADE_VADER_BAND, CASCADE_TEXTBLOB_BAND
+)
+from inference_scheduler import INFERENCE_MAX_BATCH_SIZE
+
+logger = logging.getLogger(__name__)
+
+# Constants
+DEFAULT_VADER_BANDS = [0.0, 0.25, 0.5, 0.75]
+DEFAULT_TEXTBLOB_BANDS = [0.0, 0.1, 0.2]
+
+def read_labelled_texts(stream, text_field="text", label_field="label"):
+    """
+    Reads JSONL records with a text and an optional reference label.
+
+    Returns:
+        tuple: (texts, labels), where labels is None unless every record has one.
+    """
+    texts, labels = [], []
+    for line in stream:
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        texts.append(record[text_field])
+        labels.append(record.get(label_field))
+    if any(label is None for label in labels):
+        return texts, None
+    return texts, [str(label).capitalize() for label in labels]
+
+def score_texts(texts, transformers_pipeline, batch_size=INFERENCE_MAX_BATCH_SIZE):
+    """
+    Runs every tier once per text and records how long each tier took.
+
+    Transformer labels come from get_transformers_sentiment_many, so long texts
+    are chunked and aggregated as in production. Transformer time is measured
+    per batch and split evenly across its texts, which is how the batched
+    serving paths pay for it.
+
+    Returns:
+        list: A dict per text with polarity, compound, transformers_label,
+              lexicon_seconds and transformers_seconds.
+    """
+    scored = []
+    for text in texts:
+        start = time.perf_counter()
+        polarity = textblob_polarity(text)
+        compound = nltk_compound(text)
+        scored.append({
+            "polarity": polarity,
+            "compound": compound,
+            "lexicon_seconds": time.perf_counter() - start
+        })
+
+    loop = asyncio.new_event_loop()
+    try:
+        for offset in range(0, len(texts), batch_size):
+            batch = texts[offset:offset + batch_size]
+            start = time.perf_counter()
+            results = loop.run_until_complete(get_transformers_sentiment_many(batch, transformers_pipeline))
+            per_text = (time.perf_counter() - start) / len(batch)
+            for item, (label, _) in zip(scored[offset:offset + batch_size], results):
+                item["transformers_label"] = label
+                item["transformers_seconds"] = per_text
+    finally:
+        loop.close()
+    return scored
+
+def sweep(scored, labels=None, vader_bands=DEFAULT_VADER_BANDS, textblob_bands=DEFAULT_TEXTBLOB_BANDS):
+    """
+    Evaluates the cascade at each pair of uncertainty bands.
+
+    Args:
+        scored (list): The output of score_texts.
+        labels (list): Reference labels. Defaults to the transformer's own labels,
+                       so accuracy is then agreement with full mode.
+        vader_bands (list): CASCADE_VADER_BAND values to try.
+        textblob_bands (list): CASCADE_TEXTBLOB_BAND values to try.
+
+    Returns:
+        list: A row per band pair with transformer_rate, accuracy, texts_per_second
+              and speedup over always running the transformer.
+    """
+    if labels is None:
+        labels = [item["transformers_label"] for item in scored]
+    lexicon_seconds = sum(item["lexicon_seconds"] for item in scored)
+    full_seconds = lexicon_seconds + sum(item["transformers_seconds"] for item in scored)
+
+    rows = []
+    for vader_band in vader_bands:
+        for textblob_band in textblob_bands:
+            escalated = 0
+            correct = 0
+            seconds = lexicon_seconds
+            for item, label in zip(scored, labels):
+                if needs_transformer(item["polarity"], item["compound"], vader_band, textblob_band):
+                    escalated += 1
+                    seconds += item["transformers_seconds"]
+                    predicted = item["transformers_label"]
+                else:
+                    predicted = polarity_label(item["polarity"])  # Both lexicon tiers agree
+                correct += predicted == label
+            rows.append({
+                "vader_band": vader_band,
+                "textblob_band": textblob_band,
+                "transformer_rate": escalated / len(scored) if scored else 0.0,
+                "accuracy": correct / len(scored) if scored else 0.0,
+                "texts_per_second": len(scored) / seconds if seconds else 0.0,
+                "speedup": full_seconds / seconds if seconds else 0.0
+            })
+    return rows
+
+def format_table(rows):
+    lines = ["vader_band  textblob_band  transformer_rate  accuracy  texts/s  speedup"]
+    for row in rows:
+        lines.append(
+            f"{row['vader_band']:>10.2f}  {row['textblob_band']:>13.2f}  {row['transformer_rate']:>16.1%}  "
+            f"{row['accuracy']:>8.1%}  {row['texts_per_second']:>7.0f}  {row['speedup']:>6.2f}x"
+        )
+    return "\n".join(lines)
+
+def _bands(value):
+    return [float(band) for band in value.split(",")]
+
+def main(argv=None, transformers_pipeline=None):
+    """
+    Reports the accuracy/throughput trade-off of cascade mode at several uncertainty bands.
+
+    Example:
+        python cascade_benchmark.py -i reviews.jsonl --vader-bands 0.25,0.5 --textblob-bands 0.1
+    """
+    parser = argparse.ArgumentParser(description="Cascade mode accuracy/throughput benchmark")
+    parser.add_argument("-i", "--input", required=True,
+                        help="JSONL file with a text field and, optionally, a reference label field")
+    parser.add_argument("--text-field", default="text")
+    parser.add_argument("--label-field", default="label")
+    parser.add_argument("--vader-bands", type=_bands, default=DEFAULT_VADER_BANDS)
+    parser.add_argument("--textblob-bands", type=_bands, default=DEFAULT_TEXTBLOB_BANDS)
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+    args = parser.parse_args(argv)
+
+    with open(args.input, encoding="utf-8") as f:
+        texts, labels = read_labelled_texts(f, args.text_field, args.label_field)
+    if transformers_pipeline is None:
+        from model_registry import get_pipeline
+        transformers_pipeline = get_pipeline()
+
+    rows = sweep(score_texts(texts, transformers_pipeline), labels, args.vader_bands, args.textblob_bands)
+    if args.json:
+        print(json.dumps({
+            "texts": len(texts),
+            "reference": "labels" if labels else "transformers",
+            "configured": {"vader_band": CASCADE_VADER_BAND, "textblob_band": CASCADE_TEXTBLOB_BAND},
+            "results": rows
+        }, indent=2))
+    else:
+        print(f"{len(texts)} texts, accuracy against {'reference labels' if labels else 'full-mode transformer labels'}")
+        print(format_table(rows))
+    return rows
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    main()
@@ -3,21 +3,48 @@ from sentiment_analysis import analyze_sentiment_combined
 from utils import MAX_INPUT_LENGTH
 import logging
 import asyncio
-from transformers import pipeline
+import sys
+import os
+from model_registry import get_pipeline
+from stream_processing import (
+    read_records, process_stream, read_checkpoint, checkpoint_output_bytes, ResultWriter,
+    INPUT_FORMATS, OUTPUT_FORMATS, STREAM_BATCH_SIZE, STREAM_WORKERS
+)
 
 logging.basicConfig(level=logging.INFO)
 
-def cli(transformers_pipeline):
+def cli(transformers_pipeline=None):
     parser = argparse.ArgumentParser(description="Sentiment Analysis Tool")
-    parser.add_argument("text", type=str, help="Input text to analyze")
+    parser.add_argument("text", type=str, nargs="?", help="Input text to analyze")
+    parser.add_argument("-i", "--input", help="Stream records from a file, or '-' for stdin")
+    parser.add_argument("--input-format", choices=INPUT_FORMATS, default="text",
+                        help="One text per line, JSONL or CSV (default: text)")
+    parser.add_argument("--field", default="text", help="JSONL field holding the text (default: text)")
+    parser.add_argument("--column", help="CSV column name or position holding the text (default: first)")
+    parser.add_argument("-o", "--output", help="Write results to a file instead of stdout")
+    parser.add_argument("--output-format", choices=OUTPUT_FORMATS, default="jsonl",
+                        help="Result format (default: jsonl)")
+    parser.add_argument("--batch-size", type=int, default=STREAM_BATCH_SIZE, help="Records per batch")
+    parser.add_argument("--workers", type=int, default=STREAM_WORKERS, help="Batches analyzed concurrently")
+    parser.add_argument("--resume-from", type=int, help="Skip this many leading records")
+    parser.add_argument("--checkpoint", help="File recording progress; resumes from it if present")
     args = parser.parse_args()
 
+    if args.input is not None:
+        stream_cli(args, transformers_pipeline)
+        return
+
+    if args.text is None:
+        parser.error("either text or --input is required")
+
     if len(args.text) > MAX_INPUT_LENGTH:
         logging.warning(f"Input exceeds max length of {MAX_INPUT_LENGTH}")
         print(f"Error: Input text exceeds {MAX_INPUT_LENGTH} characters")
         return
 
     try:
+        if transformers_pipeline is None:
+            transformers_pipeline = get_pipeline()  # Loaded only once the input is known to be valid
         result = asyncio.run(analyze_sentiment_combined(args.text, transformers_pipeline))
         if "error" in result:
             print(f"Error: {result['error']}")
@@ -26,12 +53,53 @@ def cli(transformers_pipeline):
             print(f"- Text: {result['text']}")
             print(f"- TextBlob: {result['textblob']}")
             print(f"- NLTK: {result['nltk']}")
-            print(f"- Transformers: {result['transformers']['label']} "
-                  f"(Confidence: {result['transformers']['confidence']:.2f})\n")
+            if result["transformers"] is None:
+                # Cascade mode skips the transformer when the lexicon tiers are confident
+                print(f"- Transformers: skipped (tiers: {', '.join(result.get('tiers', []))})\n")
+            else:
+                print(f"- Transformers: {result['transformers']['label']} "
+                      f"(Confidence: {result['transformers']['confidence']:.2f})\n")
     except Exception as e:
         logging.exception("CLI execution failed")
         print(f"Unexpected error: {e}")
 
+def stream_cli(args, transformers_pipeline=None):
+    """
+    Runs the streaming mode: reads records from a file or stdin and writes one result per record.
+    """
+    start_offset = args.resume_from if args.resume_from is not None else read_checkpoint(args.checkpoint)
+    append = start_offset > 0 and args.output is not None
+    if append and args.resume_from is None:
+        # Results written after the checkpoint are produced again, so drop them first
+        output_bytes = checkpoint_output_bytes(args.checkpoint)
+        if output_bytes is not None and os.path.exists(args.output) and os.path.getsize(args.output) > output_bytes:
+            logging.info(f"Truncating {args.output} to the checkpointed {output_bytes} bytes")
+            os.truncate(args.output, output_bytes)
+
+    input_stream = sys.stdin if args.input == "-" else open(args.input, newline="", encoding="utf-8")
+    output_stream = sys.stdout if args.output is None else open(
+        args.output, "a" if append else "w", newline="", encoding="utf-8"
+    )
+    try:
+        if transformers_pipeline is None:
+            transformers_pipeline = get_pipeline()
+        records = read_records(input_stream, args.input_format, field=args.field, column=args.column)
+        writer = ResultWriter(output_stream, args.output_format, write_header=not append)
+        if start_offset:
+            logging.info(f"Resuming after {start_offset} records")
+        process_stream(
+            records, writer, transformers_pipeline,
+            batch_size=args.batch_size, workers=args.workers,
+            start_offset=start_offset, checkpoint_path=args.checkpoint
+        )
+    except Exception as e:
+        logging.exception("Streaming CLI execution failed")
+        print(f"Unexpected error: {e}", file=sys.stderr)
+    finally:
+        if input_stream is not sys.stdin:
+            input_stream.close()
+        if output_stream is not sys.stdout:
+            output_stream.close()
+
 if __name__ == "__main__":
-    transformers_pipeline = pipeline("sentiment-analysis")
-    cli(transformers_pipeline)
+    cli()
@@ -1,10 +1,8 @@
-from api import app
 from cli import cli
 import sys
 import logging
 from decouple import config
-from ssl_certificate import load_ssl_context
-from transformers import pipeline
+from model_registry import get_model_registry
 
 def main():
     """
@@ -21,6 +19,8 @@ def main():
         PORT (int): Port number for the Flask server. Defaults to 5000.
         SSL_CERT_PATH (str): Path to the SSL certificate file. Defaults to "cert.pem".
         SSL_KEY_PATH (str): Path to the SSL key file. Defaults to "key.pem".
+        WORKERS (int): Number of API worker processes. Defaults to 1 (the Flask development server);
+                       larger values start the pre-fork launcher (see server_launcher).
 
     Example Usage:
         # Run CLI mode
@@ -33,18 +33,30 @@ def main():
     logging.basicConfig(level=config("LOG_LEVEL", default="INFO"), format="%(asctime)s - %(levelname)s - %(message)s")
     logger = logging.getLogger(__name__)
 
-    # Initialize the transformers pipeline
-    transformers_pipeline = pipeline("sentiment-analysis")
-
     logger.info("Starting application...")
     if len(sys.argv) > 1:  # If arguments are provided, run CLI
-        cli(transformers_pipeline)
+        cli()  # Loads the model through the registry only when it is needed
     else:  # Otherwise, start Flask server
+        # Imported here so CLI mode doesn't pay for Flask, Swagger and the limiter
+        from flask_api import app  # The module server_launcher.preload() imports, so there is one app and limiter
+        from ssl_certificate import load_ssl_context
+        from server_launcher import Launcher, create_listener, preload
+        from job_queue import get_job_queue
+
         ssl_context = load_ssl_context()
         if ssl_context is None:
             logger.error("Failed to load SSL certificates. Exiting...")
             return
 
+        workers = config("WORKERS", default=1, cast=int)
+        if workers > 1:
+            listener = create_listener(config("HOST", default="0.0.0.0"), config("PORT", default=5000, cast=int))
+            Launcher(preload(), listener, workers=workers, ssl_context=ssl_context).run()
+            return
+
+        # Accept connections while the model loads; /health reports "loading" until then
+        get_model_registry().warm_up(background=True)
+        get_job_queue().start()  # Resumes jobs interrupted by the last shutdown
         app.run(
             ssl_context=ssl_context,
             host=config("HOST", default="0.0.0.0"),
@@ -1,14 +1,26 @@
-from flask import Flask, request, jsonify, abort, make_response
-from flask_limiter import Limiter
-from flask_limiter.util import get_remote_address
+from flask import Flask, Response, request, jsonify, abort, make_response, g, stream_with_context, send_file, url_for
 from flasgger import Swagger
-from sentiment_analysis import analyze_sentiment_combined
+from limits import parse
+from sentiment_analysis import analyze_sentiment_combined, analyze_sentiment_batch
+from model_registry import get_model_registry, get_pipeline
+from metrics import get_metrics, CONTENT_TYPE as METRICS_CONTENT_TYPE
+from rate_limiting import get_rate_limiter, API_KEY_HEADER
+from admission_control import get_admission_controller, request_lane, Overloaded, PRIORITY_HEADER, LOW
+from result_format import compact, negotiate, encode
+from stream_processing import (
+    read_lines, read_records, analyze_stream, ndjson_lines, STREAM_BATCH_SIZE, STREAM_WORKERS
+)
+from job_queue import get_job_queue, job_summary, UploadTooLarge, COMPLETED, FINISHED, UPLOAD_CHUNK_BYTES
 from utils import MAX_INPUT_LENGTH
 from ssl_certificate import load_ssl_context
-from transformers import pipeline
 from decouple import config
 import logging
 import asyncio
+import functools
+import itertools
+import json
+import math
+import time
 
 # ----------------------------- #
 # App Initialization
@@ -30,15 +42,17 @@ Swagger(app, template={
     "produces": ["application/json"]
 })
 
-# Rate Limiting Setup
-limiter = Limiter(
-    key_func=get_remote_address,
-    default_limits=[config("RATE_LIMIT", default="10 per minute")]
-)
-limiter.init_app(app)
+# Constants
+RATE_LIMIT = parse(config("RATE_LIMIT", default="10 per minute"))
+BATCH_MAX_ITEMS = config("BATCH_MAX_ITEMS", default=10000, cast=int)
+BATCH_RATE_LIMIT = parse(config("BATCH_RATE_LIMIT", default="20000 per minute"))  # Counted per item
+BATCH_REQUEST_TIMEOUT = config("BATCH_REQUEST_TIMEOUT", default=300, cast=int)
+
+# Dataset formats inferred from an upload's content type when no "format" is given
+UPLOAD_FORMATS = {"text/csv": "csv", "application/x-ndjson": "jsonl", "application/jsonl": "jsonl", "text/plain": "text"}
 
-# Load sentiment model
-transformers_pipeline = pipeline("sentiment-analysis")
+# Rate Limiting Setup, shared by the workers when RATE_LIMIT_BACKEND is "shm" or "redis"
+limiter = get_rate_limiter()
 
 # ----------------------------- #
 # Middleware
@@ -48,19 +62,135 @@ transformers_pipeline = pipeline("sentiment-analysis")
 def enforce_global_timeout():
     request.environ['REQUEST_TIMEOUT'] = config("REQUEST_TIMEOUT", default=15, cast=int)
 
+@app.before_request
+def start_request_metrics():
+    g.request_start = time.perf_counter()
+    get_metrics().add_gauge("sentiment_requests_in_flight", 1)
+
+@app.after_request
+def record_request_metrics(response):
+    metrics = get_metrics()
+    endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+    if "request_start" in g:
+        metrics.observe("sentiment_request_seconds", time.perf_counter() - g.request_start, endpoint=endpoint)
+    metrics.inc("sentiment_requests_total", endpoint=endpoint, status=response.status_code)
+    return response
+
+@app.teardown_request
+def finish_request_metrics(exc):
+    if g.pop("request_start", None) is not None:
+        get_metrics().add_gauge("sentiment_requests_in_flight", -1)
+
+def encoded_response(payload):
+    """
+    Encodes a payload as JSON, or as MessagePack when the Accept header prefers it.
+    """
+    media_type = negotiate(request.headers.get("Accept"))
+    response = Response(encode(payload, media_type), content_type=media_type)
+    response.vary.add("Accept")
+    return response
+
+def rate_limit_exceeded(result, limit):
+    """
+    Returns the 429 response for a rejected rate-limit hit, with Retry-After in whole seconds.
+    """
+    response = make_response(jsonify(error=f"Rate limit exceeded: {limit}"), 429)
+    response.headers["Retry-After"] = str(math.ceil(result.retry_after))
+    return response
+
+def rate_limited(scope, limit, cost=None):
+    """
+    Rejects requests over the limit with 429 and a Retry-After header.
+
+    Args:
+        scope (str): The bucket name shared by the decorated routes.
+        limit (limits.RateLimitItem): The limit for clients without an API key quota.
+        cost (callable): Returns the tokens a request takes. Defaults to one.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            result = limiter.hit(
+                scope, request.remote_addr or "127.0.0.1", limit,
+                cost() if cost else 1, request.headers.get(API_KEY_HEADER)
+            )
+            if not result.allowed:
+                logging.warning(f"Rate limit exceeded for {scope}")
+                return rate_limit_exceeded(result, limit)
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def overloaded(error):
+    """
+    Returns the 503 response for a request shed by admission control, with Retry-After in whole seconds.
+    """
+    response = make_response(jsonify(error="Server overloaded, retry later"), 503)
+    response.headers["Retry-After"] = str(error.retry_after)
+    return response
+
+def admitted(lane):
+    """
+    Queues requests behind the admission controller, shedding them with 503 and Retry-After.
+    The slot is held until the response is sent, for streamed responses until the stream ends.
+
+    Args:
+        lane (str | callable): HIGH or LOW, or a function returning the request's lane.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            controller = get_admission_controller()
+            if controller is None:
+                return view(*args, **kwargs)
+            try:
+                controller.acquire(lane() if callable(lane) else lane)
+            except Overloaded as e:
+                return overloaded(e)
+            try:
+                response = make_response(view(*args, **kwargs))
+            except BaseException:
+                controller.release()
+                raise
+            if response.is_streamed:
+                response.call_on_close(controller.release)
+            else:
+                controller.release()
+            return response
+        return wrapper
+    return decorator
+
+def _analyze_lane():
+    return request_lane(request.headers.get(PRIORITY_HEADER))
+
 # ----------------------------- #
 # Routes
 # ----------------------------- #
 
 @app.route('/analyze', methods=['POST'])
-@limiter.limit(config("RATE_LIMIT", default="10 per minute"))
+@rate_limited("analyze", RATE_LIMIT)
+@admitted(_analyze_lane)
 def analyze_sentiment_api():
     """
     Analyze sentiment from input text.
     ---
     tags:
       - Sentiment Analysis
+    produces:
+      - application/json
+      - application/msgpack
     parameters:
+      - name: X-API-Key
+        in: header
+        required: false
+        type: string
+        description: An API key with its own quota, shared by /analyze and /analyze/batch.
+      - name: X-Priority
+        in: header
+        required: false
+        type: string
+        enum: [high, low]
+        description: Send "low" for traffic that can be shed first under overload. Defaults to high.
       - name: body
         in: body
         required: true
@@ -70,6 +200,12 @@ def analyze_sentiment_api():
             text:
               type: string
               example: "I love this product!"
+            include_chunks:
+              type: boolean
+              description: Include the transformer score of each chunk of a long text.
+            include_text:
+              type: boolean
+              description: Echo the sanitized text in the result. Defaults to true.
     responses:
       200:
         description: Sentiment analysis results.
@@ -89,10 +225,27 @@ def analyze_sentiment_api():
                   type: string
                 confidence:
                   type: number
+                chunks:
+                  type: array
+                  items:
+                    type: object
+            tiers:
+              type: array
+              items:
+                type: string
+            degraded:
+              type: boolean
+              description: >
+                Present and true when the server was overloaded and answered with
+                TextBlob and VADER only; "transformers" is then null.
       400:
         description: Invalid request.
+      429:
+        description: Rate limit exceeded. Retry-After gives the seconds to wait.
       500:
         description: Internal server error.
+      503:
+        description: Overloaded; the request was shed. Retry-After gives the seconds to wait.
     """
     try:
         data = request.get_json(force=True)
@@ -114,9 +267,26 @@ def analyze_sentiment_api():
         logging.warning("Text too long")
         abort(make_response(jsonify(error=f"Text exceeds {MAX_INPUT_LENGTH} characters"), 400))
 
+    include_chunks = data.get('include_chunks', False)
+    if not isinstance(include_chunks, bool):
+        abort(make_response(jsonify(error="'include_chunks' must be a boolean"), 400))
+
+    include_text = data.get('include_text', True)
+    if not isinstance(include_text, bool):
+        abort(make_response(jsonify(error="'include_text' must be a boolean"), 400))
+
+    # Under overload, answer from the lexicon analyzers rather than queue for the transformer
+    pipeline = get_pipeline()
+    controller = get_admission_controller()
+    mode = "lexicon" if controller is not None and controller.should_degrade(pipeline) else None
+
     try:
-        result = asyncio.run(analyze_sentiment_combined(text, transformers_pipeline))
-        return jsonify(result)
+        result = asyncio.run(asyncio.wait_for(
+            analyze_sentiment_combined(text, pipeline, mode=mode, include_chunks=include_chunks),
+            request.environ['REQUEST_TIMEOUT']
+        ))
+        with get_metrics().time("sentiment_stage_seconds", stage="serialize"):
+            return encoded_response(compact(result, include_text))
     except TimeoutError:
         logging.error("Request timed out")
         abort(make_response(jsonify(error="Request timed out"), 504))
@@ -124,6 +294,449 @@ def analyze_sentiment_api():
         logging.exception("Unexpected error during analysis")
         abort(make_response(jsonify(error="Internal server error"), 500))
 
+@app.route('/health', methods=['GET'])
+def health():
+    """
+    Report whether the sentiment model is loaded.
+    ---
+    tags:
+      - Health
+    responses:
+      200:
+        description: The model is loaded and requests are served immediately.
+        schema:
+          type: object
+          properties:
+            status:
+              type: string
+              example: "ready"
+            load_seconds:
+              type: number
+            startup_seconds:
+              type: number
+      503:
+        description: The model is still loading, or failed to load.
+    """
+    registry = get_model_registry()
+    return jsonify(registry.health()), 200 if registry.ready else 503
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """
+    Expose request, stage, cache and model metrics for Prometheus.
+    ---
+    tags:
+      - Health
+    produces:
+      - text/plain
+    responses:
+      200:
+        description: Metrics in the Prometheus text exposition format.
+    """
+    return Response(get_metrics().render(), content_type=METRICS_CONTENT_TYPE)
+
+def _parse_batch_texts():
+    """
+    Parses the texts of a batch request, caching them on flask.g.
+    Accepts a JSON body ({"texts": [...]} or a bare list) or NDJSON, one JSON
+    string or {"text": ...} object per line.
+
+    Returns:
+        list: The submitted texts, or None if the payload is malformed.
+    """
+    if "batch_texts" in g:
+        return g.batch_texts
+
+    texts = None
+    try:
+        if request.mimetype in ("application/x-ndjson", "application/jsonl"):
+            texts = []
+            for line in request.get_data(as_text=True).splitlines():
+                if line.strip():
+                    item = json.loads(line)
+                    texts.append(item.get("text") if isinstance(item, dict) else item)
+        else:
+            data = request.get_json(force=True, silent=True)
+            texts = data.get("texts") if isinstance(data, dict) else data
+            if not isinstance(texts, list):
+                texts = None
+    except ValueError as e:
+        logging.error(f"Invalid batch payload: {e}")
+        texts = None
+
+    g.batch_texts = texts
+    return texts
+
+def _batch_include_text():
+    """
+    Reads include_text from a JSON object body, else from the query string. Defaults to True.
+    """
+    data = request.get_json(force=True, silent=True)  # None for NDJSON bodies
+    if isinstance(data, dict) and isinstance(data.get("include_text"), bool):
+        return data["include_text"]
+    return request.args.get("include_text", "true").lower() not in ("false", "0", "no")
+
+def _batch_cost():
+    """
+    Charges batch calls one rate-limit hit per submitted text.
+    """
+    texts = _parse_batch_texts()
+    return max(1, len(texts)) if texts else 1
+
+@app.route('/analyze/batch', methods=['POST'])
+@rate_limited("batch", BATCH_RATE_LIMIT, cost=_batch_cost)
+@admitted(LOW)
+def analyze_sentiment_batch_api():
+    """
+    Analyze sentiment for many texts in one call.
+    ---
+    tags:
+      - Sentiment Analysis
+    consumes:
+      - application/json
+      - application/x-ndjson
+    produces:
+      - application/json
+      - application/msgpack
+    parameters:
+      - name: X-API-Key
+        in: header
+        required: false
+        type: string
+        description: An API key with its own quota, shared by /analyze and /analyze/batch.
+      - name: include_text
+        in: query
+        required: false
+        type: boolean
+        description: Echo each sanitized text in its result. Defaults to true; a "include_text" field in a JSON object body takes precedence.
+      - name: body
+        in: body
+        required: true
+        description: A JSON object with a "texts" list, or NDJSON with one text per line.
+        schema:
+          type: object
+          properties:
+            texts:
+              type: array
+              items:
+                type: string
+              example: ["I love this product!", "This is terrible."]
+            include_text:
+              type: boolean
+    responses:
+      200:
+        description: One result per input text, in input order. Invalid items carry an "error".
+        schema:
+          type: object
+          properties:
+            results:
+              type: array
+              items:
+                type: object
+      400:
+        description: Invalid request.
+      429:
+        description: Rate limit exceeded. Each text counts as one request; Retry-After gives the seconds to wait.
+      500:
+        description: Internal server error.
+      503:
+        description: Overloaded; batches are shed before single requests. Retry-After gives the seconds to wait.
+    """
+    texts = _parse_batch_texts()
+    if texts is None:
+        logging.warning("Invalid batch payload")
+        abort(make_response(jsonify(error="Expected a JSON list of texts or NDJSON"), 400))
+
+    if not texts:
+        abort(make_response(jsonify(error="No texts provided"), 400))
+
+    if len(texts) > BATCH_MAX_ITEMS:
+        logging.warning("Batch too large")
+        abort(make_response(jsonify(error=f"Batch exceeds {BATCH_MAX_ITEMS} items"), 400))
+
+    # Validate each item, keeping per-item errors instead of failing the whole batch
+    results = [None] * len(texts)
+    valid_indices = []
+    for i, text in enumerate(texts):
+        if not isinstance(text, str):
+            results[i] = {"error": "'text' must be a string"}
+        elif len(text) > MAX_INPUT_LENGTH:
+            results[i] = {"error": f"Text exceeds {MAX_INPUT_LENGTH} characters"}
+        else:
+            valid_indices.append(i)
+
+    try:
+        analyzed = asyncio.run(asyncio.wait_for(
+            analyze_sentiment_batch([texts[i] for i in valid_indices], get_pipeline()),
+            BATCH_REQUEST_TIMEOUT
+        ))
+    except TimeoutError:
+        logging.error("Batch request timed out")
+        abort(make_response(jsonify(error="Request timed out"), 504))
+    except Exception as e:
+        logging.exception("Unexpected error during batch analysis")
+        abort(make_response(jsonify(error="Internal server error"), 500))
+
+    for i, result in zip(valid_indices, analyzed):
+        results[i] = result
+    with get_metrics().time("sentiment_stage_seconds", stage="serialize"):
+        include_text = _batch_include_text()
+        return encoded_response({"results": [compact(result, include_text) for result in results]})
+
+@app.route('/analyze/stream', methods=['POST'])
+@admitted(LOW)
+def analyze_sentiment_stream_api():
+    """
+    Analyze sentiment for a stream of texts, returning results as they complete.
+    ---
+    tags:
+      - Sentiment Analysis
+    consumes:
+      - application/x-ndjson
+    produces:
+      - application/x-ndjson
+    parameters:
+      - name: X-API-Key
+        in: header
+        required: false
+        type: string
+        description: An API key with its own quota, shared by /analyze and /analyze/batch.
+      - name: include_text
+        in: query
+        required: false
+        type: boolean
+        description: Echo each sanitized text in its result. Defaults to true.
+      - name: body
+        in: body
+        required: true
+        description: NDJSON, one JSON string or {"text": ...} object per line. Any number of lines; the body may be sent chunked.
+        schema:
+          type: string
+          example: "{\"text\": \"I love this product!\"}\n{\"text\": \"This is terrible.\"}\n"
+    responses:
+      200:
+        description: >
+          A chunked NDJSON response with one {"index": ..., ...} result per input
+          line, in input order, written as each batch completes. Invalid lines
+          carry an "error". If the stream stops early, its last line is an
+          {"error": ...} object without an index.
+      429:
+        description: >
+          Rate limit exceeded. Each line counts as one request against the batch
+          limit; if the limit is reached mid-stream, the response ends with an error line.
+      503:
+        description: Overloaded; streams are shed before single requests. Retry-After gives the seconds to wait.
+    """
+    include_text = request.args.get("include_text", "true").lower() not in ("false", "0", "no")
+    client = request.remote_addr or "127.0.0.1"
+    key = request.headers.get(API_KEY_HEADER)
+    records = read_records(read_lines(request.stream), "jsonl")
+
+    # Charge the first batch before answering, so an exhausted client gets a plain 429
+    first_batch = list(itertools.islice(records, STREAM_BATCH_SIZE))
+    result = limiter.hit("batch", client, BATCH_RATE_LIMIT, max(1, len(first_batch)), key)
+    if not result.allowed:
+        logging.warning("Rate limit exceeded for batch")
+        return rate_limit_exceeded(result, BATCH_RATE_LIMIT)
+
+    stopped = {}
+
+    def metered_records():
+        yield from first_batch
+        while True:
+            batch = list(itertools.islice(records, STREAM_BATCH_SIZE))
+            if not batch:
+                return
+            result = limiter.hit("batch", client, BATCH_RATE_LIMIT, len(batch), key)
+            if not result.allowed:
+                stopped["error"] = f"Rate limit exceeded: {BATCH_RATE_LIMIT}"
+                stopped["retry_after"] = math.ceil(result.retry_after)
+                return
+            yield from batch
+
+    def generate():
+        written = 0
+        try:
+            for results in analyze_stream(metered_records(), get_pipeline(), STREAM_BATCH_SIZE, STREAM_WORKERS):
+                yield ndjson_lines(written, results, include_text)
+                written += len(results)
+        except Exception:
+            logging.exception("Unexpected error during stream analysis")
+            stopped["error"] = "Internal server error"
+        if stopped:
+            yield encode(stopped) + b"\n"
+
+    # Chunks are written as they are yielded; a client that reads slowly stalls
+    # the generator, which stops reading the request body
+    return Response(stream_with_context(generate()), content_type="application/x-ndjson")
+
+def _job_or_404(job_id):
+    job = get_job_queue().store.get(job_id)
+    if job is None:
+        abort(make_response(jsonify(error="Job not found"), 404))
+    return job
+
+@app.route('/jobs', methods=['POST'])
+@rate_limited("jobs", RATE_LIMIT)
+def create_job_api():
+    """
+    Submit a dataset for offline scoring.
+    ---
+    tags:
+      - Jobs
+    consumes:
+      - multipart/form-data
+      - application/x-ndjson
+      - text/csv
+      - text/plain
+      - application/json
+    parameters:
+      - name: format
+        in: query
+        required: false
+        type: string
+        enum: [text, jsonl, csv]
+        description: The dataset format. Defaults to the one implied by the upload's content type, else "text".
+      - name: field
+        in: query
+        required: false
+        type: string
+        description: The JSONL field or CSV column holding the text. Defaults to "text" and the first column.
+      - name: file
+        in: formData
+        required: false
+        type: file
+        description: The dataset, as a multipart upload. It may also be sent as the raw request body.
+      - name: body
+        in: body
+        required: false
+        description: A JSON object naming a file in one of the server's JOB_INPUT_DIRS instead of uploading it.
+        schema:
+          type: object
+          properties:
+            path:
+              type: string
+              example: /data/reviews.jsonl
+            format:
+              type: string
+              example: jsonl
+            field:
+              type: string
+    responses:
+      202:
+        description: The job was queued. Location points at its status.
+      400:
+        description: Invalid request.
+      403:
+        description: The path is outside JOB_INPUT_DIRS.
+      413:
+        description: The upload exceeds JOB_MAX_UPLOAD_BYTES.
+      429:
+        description: Rate limit exceeded.
+    """
+    queue = get_job_queue()
+    try:
+        if request.mimetype == "application/json":
+            data = request.get_json(silent=True)
+            if not isinstance(data, dict) or not isinstance(data.get("path"), str):
+                abort(make_response(jsonify(error="Expected a JSON object with a 'path'"), 400))
+            job = queue.submit_path(data["path"], data.get("format", "text"), data.get("field"))
+        else:
+            upload = request.files.get("file") if request.mimetype == "multipart/form-data" else None
+            if request.mimetype == "multipart/form-data" and upload is None:
+                abort(make_response(jsonify(error="Missing 'file' in upload"), 400))
+            stream = upload.stream if upload else request.stream
+            input_format = request.args.get("format") or UPLOAD_FORMATS.get(
+                upload.mimetype if upload else request.mimetype, "text")
+            job = queue.submit_upload(iter(functools.partial(stream.read, UPLOAD_CHUNK_BYTES), b""),
+                                      input_format, request.args.get("field"))
+    except UploadTooLarge as e:
+        abort(make_response(jsonify(error=str(e)), 413))
+    except PermissionError as e:
+        abort(make_response(jsonify(error=str(e)), 403))
+    except ValueError as e:
+        abort(make_response(jsonify(error=str(e)), 400))
+
+    queue.start()
+    response = make_response(jsonify(job_summary(job)), 202)
+    response.headers["Location"] = url_for("get_job_api", job_id=job["id"])
+    return response
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job_api(job_id):
+    """
+    Report a job's status and progress.
+    ---
+    tags:
+      - Jobs
+    parameters:
+      - name: job_id
+        in: path
+        required: true
+        type: string
+    responses:
+      200:
+        description: >
+          The job's status (queued, running, completed, failed or cancelled),
+          records processed out of the total, and any error.
+      404:
+        description: No such job.
+    """
+    return jsonify(job_summary(_job_or_404(job_id)))
+
+@app.route('/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job_api(job_id):
+    """
+    Cancel a job. A queued job is cancelled at once; a running one stops after its current batch.
+    ---
+    tags:
+      - Jobs
+    parameters:
+      - name: job_id
+        in: path
+        required: true
+        type: string
+    responses:
+      200:
+        description: The job, with cancel_requested set.
+      404:
+        description: No such job.
+      409:
+        description: The job already finished.
+    """
+    job = _job_or_404(job_id)
+    if job["status"] in FINISHED:
+        abort(make_response(jsonify(error=f"Job already {job['status']}"), 409))
+    return jsonify(job_summary(get_job_queue().store.cancel(job_id)))
+
+@app.route('/jobs/<job_id>/results', methods=['GET'])
+def job_results_api(job_id):
+    """
+    Download a completed job's results.
+    ---
+    tags:
+      - Jobs
+    produces:
+      - application/x-ndjson
+    parameters:
+      - name: job_id
+        in: path
+        required: true
+        type: string
+    responses:
+      200:
+        description: NDJSON, one {"index": ..., ...} result per input record, in input order.
+      404:
+        description: No such job.
+      409:
+        description: The job has not completed.
+    """
+    job = _job_or_404(job_id)
+    if job["status"] != COMPLETED:
+        abort(make_response(jsonify(error=f"Job is {job['status']}"), 409))
+    return send_file(job["result_path"], mimetype="application/x-ndjson",
+                     as_attachment=True, download_name=f"{job_id}.jsonl")
+
 # ----------------------------- #
 # Entry Point
 # ----------------------------- #
@@ -134,6 +747,10 @@ def start_flask_server():
         logging.error("Failed to load SSL certificates.")
         return
 
+    # Accept connections while the model loads; /health reports "loading" until then
+    get_model_registry().warm_up(background=True)
+    get_job_queue().start()  # Resumes jobs interrupted by the last shutdown
+
     app.run(
         ssl_context=ssl_context,
         host=config("HOST", default="0.0.0.0"),
@@ -0,0 +1,159 @@
+import os
+import logging
+import time
+import weakref
+from types import SimpleNamespace
+import numpy as np
+from decouple import config
+from model_registry import SENTIMENT_TASK
+
+logger = logging.getLogger(__name__)
+
+# Constants
+INFERENCE_BACKEND = config("INFERENCE_BACKEND", default="torch")  # "torch", "onnx", "onnx-int8" or "stub"
+SENTIMENT_MODEL = config("SENTIMENT_MODEL", default="distilbert/distilbert-base-uncased-finetuned-sst-2-english")
+ONNX_MODEL_DIR = config("ONNX_MODEL_DIR", default="onnx_model")
+ONNX_INTRA_OP_THREADS = config("ONNX_INTRA_OP_THREADS", default=0, cast=int)  # 0 follows OMP_NUM_THREADS
+ONNX_MAX_LENGTH = config("ONNX_MAX_LENGTH", default=512, cast=int)
+STUB_BATCH_MS = config("STUB_BATCH_MS", default=5.0, cast=float)  # Simulated cost of a forward pass
+STUB_TEXT_MS = config("STUB_TEXT_MS", default=1.0, cast=float)  # Simulated cost per text in it
+
+BACKENDS = ("torch", "onnx", "onnx-int8", "stub")
+ONNX_FILENAMES = {"onnx": "model.onnx", "onnx-int8": "model.int8.onnx"}
+
+class OnnxSentimentPipeline:
+    """
+    A text-classification pipeline backed by an exported ONNX graph.
+
+    It is called like a transformers pipeline, with one text or a list of
+    texts and an optional batch_size, and returns a list of
+    {"label": ..., "score": ...} dicts, so the scheduler, the executors and
+    the chunking stage work with it unchanged. Neither torch nor a GPU is
+    needed at inference time.
+    """
+
+    def __init__(self, session_factory, tokenizer, id2label, name_or_path):
+        self._session_factory = session_factory
+        self.session = session_factory()
+        self.tokenizer = tokenizer
+        self.id2label = {int(i): label for i, label in id2label.items()}
+        # model_identity reads model.name_or_path, so each backend gets its own cache entries
+        self.model = SimpleNamespace(name_or_path=name_or_path)
+        self._input_names = [graph_input.name for graph_input in self.session.get_inputs()]
+        # onnxruntime's thread pools don't survive fork, so a preloaded session is rebuilt in each worker
+        ref = weakref.ref(self)
+        os.register_at_fork(after_in_child=lambda: ref() is not None and ref()._reset_session())
+
+    def _reset_session(self):
+        self.session = self._session_factory()
+
+    def __call__(self, inputs, batch_size=None, **kwargs):
+        texts = [inputs] if isinstance(inputs, str) else list(inputs)
+        batch_size = batch_size or len(texts) or 1
+        results = []
+        for offset in range(0, len(texts), batch_size):
+            results.extend(self._forward(texts[offset:offset + batch_size]))
+        return results
+
+    def _forward(self, texts):
+        encoded = self.tokenizer(texts, padding=True, truncation=True, max_length=ONNX_MAX_LENGTH, return_tensors="np")
+        feeds = {name: np.asarray(encoded[name], dtype=np.int64) for name in self._input_names}
+        logits = self.session.run(None, feeds)[0]
+        probabilities = _softmax(logits)
+        best = probabilities.argmax(axis=-1)
+        return [
+            {"label": self.id2label[int(index)], "score": float(row[index])}
+            for index, row in zip(best, probabilities)
+        ]
+
+class StubSentimentPipeline:
+    """
+    A model-free pipeline for offline benchmarks and load tests.
+
+    Labels come from a few keywords, and each call sleeps for a fixed
+    per-batch cost plus a per-text cost, so batching and concurrency
+    behave like they do with a real model.
+    """
+
+    POSITIVE_WORDS = frozenset(["love", "great", "excellent", "good", "happy", "best", "amazing"])
+
+    def __init__(self, batch_ms=STUB_BATCH_MS, text_ms=STUB_TEXT_MS):
+        self.batch_ms = batch_ms
+        self.text_ms = text_ms
+        self.tokenizer = None
+        self.model = SimpleNamespace(name_or_path="stub")
+
+    def __call__(self, inputs, batch_size=None, **kwargs):
+        texts = [inputs] if isinstance(inputs, str) else list(inputs)
+        time.sleep((self.batch_ms + self.text_ms * len(texts)) / 1000)
+        return [
+            {"label": "POSITIVE" if self.POSITIVE_WORDS.intersection(text.lower().split()) else "NEGATIVE",
+             "score": 0.9}
+            for text in texts
+        ]
+
+def _softmax(logits):
+    shifted = np.exp(logits - logits.max(axis=-1, keepdims=True))
+    return shifted / shifted.sum(axis=-1, keepdims=True)
+
+def onnx_model_path(backend, model_dir=ONNX_MODEL_DIR):
+    """
+    Returns the path of the ONNX graph used by an ONNX backend.
+    """
+    return os.path.join(model_dir, ONNX_FILENAMES[backend])
+
+def load_backend(backend=INFERENCE_BACKEND, model_name=SENTIMENT_MODEL, model_dir=ONNX_MODEL_DIR):
+    """
+    Loads the sentiment pipeline for an inference backend.
+
+    Args:
+        backend (str): "torch" for the transformers pipeline, "onnx" for the exported
+                       fp32 graph, "onnx-int8" for the dynamically quantized graph, or
+                       "stub" for a model-free stand-in used by benchmarks.
+        model_name (str): The Hugging Face model the backends are built from.
+        model_dir (str): Directory written by `python model_export.py export`.
+
+    Returns:
+        Pipeline or OnnxSentimentPipeline: A callable with the transformers pipeline interface.
+
+    Raises:
+        ValueError: If the backend is unknown.
+        FileNotFoundError: If an ONNX backend is selected but the model was not exported.
+
+    Environment Variables:
+        INFERENCE_BACKEND (str): Defaults to "torch".
+        SENTIMENT_MODEL (str): Defaults to the sentiment-analysis task's default model.
+        ONNX_MODEL_DIR (str): Defaults to "onnx_model".
+        ONNX_INTRA_OP_THREADS (int): onnxruntime intra-op threads. Defaults to OMP_NUM_THREADS,
+                                     which the pre-fork launcher sets per worker.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unsupported inference backend: {backend}. Choose one of {', '.join(BACKENDS)}")
+
+    if backend == "torch":
+        from transformers import pipeline
+        return pipeline(SENTIMENT_TASK, model=model_name)
+    if backend == "stub":
+        return StubSentimentPipeline()
+
+    path = onnx_model_path(backend, model_dir)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"{path} not found; run `python model_export.py export` first")
+
+    # Neither import pulls in torch
+    import onnxruntime
+    from transformers import AutoConfig, AutoTokenizer
+
+    threads = ONNX_INTRA_OP_THREADS or int(os.environ.get("OMP_NUM_THREADS", "0"))
+
+    def create_session():
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = threads
+        return onnxruntime.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+
+    model_config = AutoConfig.from_pretrained(model_dir)
+    logger.info(f"Loading {backend} sentiment model from {path}")
+    return OnnxSentimentPipeline(
+        create_session, AutoTokenizer.from_pretrained(model_dir), model_config.id2label, f"{model_name}:{backend}"
+    )
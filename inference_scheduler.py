@@ -0,0 +1,187 @@
+import bisect
+import logging
+import os
+import queue
+import threading
+import time
+import weakref
+from concurrent.futures import Future
+from decouple import config
+from text_chunking import PIPELINE_TRUNCATION
+
+logger = logging.getLogger(__name__)
+
+# Constants
+INFERENCE_MAX_BATCH_SIZE = config("INFERENCE_MAX_BATCH_SIZE", default=32, cast=int)
+INFERENCE_MAX_WAIT_MS = config("INFERENCE_MAX_WAIT_MS", default=5, cast=float)
+INFERENCE_PAD_RATIO = config("INFERENCE_PAD_RATIO", default=2.0, cast=float)  # Longest/shortest text per forward pass
+
+HISTOGRAM_BOUNDS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+_STOP = object()
+
+class Histogram:
+    """
+    A fixed-bucket histogram of observed integer values.
+    """
+
+    def __init__(self, bounds=HISTOGRAM_BOUNDS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # Last bucket is +Inf
+        self.total = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1  # First bound >= value, else +Inf
+        self.total += value
+        self.count += 1
+
+    def snapshot(self):
+        buckets = {str(bound): count for bound, count in zip(self.bounds, self.counts)}
+        buckets["+Inf"] = self.counts[-1]
+        return {"buckets": buckets, "count": self.count, "sum": self.total}
+
+class InferenceScheduler:
+    """
+    Collects concurrent transformer requests into micro-batches and runs them
+    through the pipeline on a single background thread.
+
+    A batch is dispatched once it holds max_batch_size items or the oldest item
+    has waited max_wait_ms. Items are sorted by length and split wherever the
+    longest text would exceed pad_ratio times the shortest, so each forward
+    pass pads to a similar length.
+
+    The scheduler can be passed anywhere a pipeline is expected: calling it
+    blocks until the results are ready, while submit() returns a future.
+    """
+
+    def __init__(self, transformers_pipeline, max_batch_size=INFERENCE_MAX_BATCH_SIZE,
+                 max_wait_ms=INFERENCE_MAX_WAIT_MS, pad_ratio=INFERENCE_PAD_RATIO):
+        self.pipeline = transformers_pipeline
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000.0
+        self.pad_ratio = pad_ratio
+        self.batch_sizes = Histogram()
+        self.queue_depths = Histogram()
+        self.requests = 0
+        self.batches = 0
+        self.forward_passes = 0
+        self._start()
+        # Threads don't survive fork, so a preloaded scheduler restarts in each worker
+        ref = weakref.ref(self)
+        os.register_at_fork(after_in_child=lambda: ref() is not None and ref()._start())
+
+    def _start(self):
+        self._queue = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="inference-scheduler", daemon=True)
+        self._thread.start()
+
+    @property
+    def model(self):
+        return getattr(self.pipeline, "model", None)
+
+    @property
+    def tokenizer(self):
+        return getattr(self.pipeline, "tokenizer", None)
+
+    @property
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def submit(self, text):
+        """
+        Queues a text for inference.
+
+        Args:
+            text (str): The input text to analyze.
+
+        Returns:
+            concurrent.futures.Future: Resolves to the pipeline's result dict for the text.
+        """
+        future = Future()
+        self._queue.put((text, future))
+        return future
+
+    def __call__(self, inputs, **kwargs):
+        if isinstance(inputs, str):
+            return [self.submit(inputs).result()]
+        futures = [self.submit(text) for text in inputs]
+        return [future.result() for future in futures]
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                "queue_depth": self.queue_depth,
+                "requests": self.requests,
+                "batches": self.batches,
+                "forward_passes": self.forward_passes,
+                "batch_size": self.batch_sizes.snapshot(),
+                "queue_depth_at_dispatch": self.queue_depths.snapshot()
+            }
+
+    def close(self, timeout=None):
+        """
+        Stops the scheduler after draining queued requests.
+        """
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def _collect(self):
+        first = self._queue.get()
+        if first is _STOP:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                self._queue.put(_STOP)  # Handle it after this batch
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            with self._stats_lock:
+                self.requests += len(batch)
+                self.batches += 1
+                self.batch_sizes.observe(len(batch))
+                self.queue_depths.observe(self._queue.qsize())
+            # Skip requests whose callers already gave up
+            batch = [item for item in batch if item[1].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            for group in self._length_buckets(batch):
+                self._forward(group)
+
+    def _length_buckets(self, batch):
+        batch = sorted(batch, key=lambda item: len(item[0]))
+        group = [batch[0]]
+        for item in batch[1:]:
+            if len(item[0]) > max(1, len(group[0][0])) * self.pad_ratio:
+                yield group
+                group = []
+            group.append(item)
+        yield group
+
+    def _forward(self, group):
+        texts = [text for text, _ in group]
+        try:
+            results = self.pipeline(texts, batch_size=len(texts), **PIPELINE_TRUNCATION)
+        except Exception as e:
+            logger.error(f"Batched inference failed for {len(texts)} texts: {e}")
+            for _, future in group:
+                future.set_exception(e)
+            return
+        with self._stats_lock:
+            self.forward_passes += 1
+        for (_, future), result in zip(group, results):
+            future.set_result(result)
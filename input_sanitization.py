@@ -1,6 +1,9 @@
 import re
 import logging
-from langdetect import detect, LangDetectException
+import hashlib
+import threading
+from collections import OrderedDict
+from langdetect import detect, DetectorFactory, LangDetectException
 from decouple import config
 
 # Configure logging globally
@@ -11,6 +14,133 @@ logger = logging.getLogger(__name__)
 MAX_INPUT_LENGTH = config("MAX_INPUT_LENGTH", default=10000, cast=int)
 SUPPORTED_LANGUAGES = config("SUPPORTED_LANGUAGES", default="en,es,fr").split(",")  # Configurable supported languages
 STRICT_LANGUAGE_CHECK = config("STRICT_LANGUAGE_CHECK", default=False, cast=bool)  # Configurable strict language check
+LANGUAGE_SAMPLE_CHARS = config("LANGUAGE_SAMPLE_CHARS", default=500, cast=int)  # Prefix examined by langdetect
+LANGUAGE_CACHE_SIZE = config("LANGUAGE_CACHE_SIZE", default=10000, cast=int)
+
+# langdetect samples n-grams randomly; a fixed seed makes its answer deterministic
+DetectorFactory.seed = config("LANGUAGE_DETECTION_SEED", default=0, cast=int)
+
+_language_cache = OrderedDict()  # sample hash -> language code, or None if detection failed
+_language_cache_lock = threading.Lock()
+
+_TAG_PATTERN = re.compile(r"<[^>]+>")
+
+class SanitizerEngine:
+    """
+    Input sanitizer that truncates before doing any work.
+
+    Only a window of roughly max_length characters is cleaned. The window
+    boundary is moved past any tag that starts inside it, so a tag crossing
+    the cut is still removed whole. The window grows only when markup and
+    whitespace shrink it below max_length. The output is identical to
+    removing tags from the whole input, replacing CR/LF with spaces, trimming,
+    and then truncating.
+
+    Instead of logging every call, the engine keeps counters, available from stats().
+    """
+
+    def __init__(self, max_length=MAX_INPUT_LENGTH):
+        self.max_length = max_length
+        self.inputs = 0
+        self.invalid = 0
+        self.truncated = 0
+        self.chars_removed = 0
+        self.chars_truncated = 0
+
+    def sanitize(self, text):
+        """
+        Sanitizes one text.
+
+        Args:
+            text (str): The input text to sanitize.
+
+        Returns:
+            str: The sanitized text, or None if the input is invalid or empty.
+        """
+        return self.sanitize_with_stats(text)[0]
+
+    def stats(self):
+        """
+        Returns counters for the inputs seen so far.
+        """
+        return {
+            "inputs": self.inputs,
+            "invalid": self.invalid,
+            "truncated": self.truncated,
+            "chars_removed": self.chars_removed,
+            "chars_truncated": self.chars_truncated
+        }
+
+    def sanitize_many(self, texts):
+        """
+        Sanitizes a batch of texts.
+
+        Args:
+            texts (list): The input texts to sanitize.
+
+        Returns:
+            list: The sanitized text for each input, or None where it is invalid or empty.
+        """
+        return [self.sanitize_with_stats(text)[0] for text in texts]
+
+    def sanitize_with_stats(self, text):
+        """
+        Sanitizes one text and reports how much of it was dropped.
+
+        Args:
+            text (str): The input text to sanitize.
+
+        Returns:
+            tuple: (sanitized text or None, characters removed as markup or surrounding
+                   whitespace, characters cut off past max_length).
+        """
+        self.inputs += 1
+        if not text or not isinstance(text, str) or text.isspace():
+            self.invalid += 1
+            return None, 0, 0
+
+        sanitized, truncated = self._clean(text)
+        if truncated:
+            self.truncated += 1
+            self.chars_truncated += truncated
+        removed = len(text) - truncated - len(sanitized)
+        self.chars_removed += removed
+        return sanitized, removed, truncated
+
+    def _clean(self, text):
+        """
+        Returns the sanitized text and the number of characters cut off past max_length.
+        """
+        limit = self.max_length
+        length = len(text)
+        cleaned = ""
+        start = 0
+        step = limit + 1
+        while True:
+            end = start + step
+            window = text[start:end]
+            if "<" in window:
+                if end < length and window.rfind("<") > window.rfind(">"):
+                    # A tag starts inside the window; move the boundary past its end
+                    closing = text.find(">", end)
+                    if closing != -1:
+                        end = closing + 1
+                        window = text[start:end]
+                window = _TAG_PATTERN.sub("", window)
+            window = window.replace("\n", " ").replace("\r", " ")
+            if end >= length:
+                cleaned = (cleaned + window).strip()
+                if len(cleaned) > limit:
+                    return cleaned[:limit], len(cleaned) - limit
+                return cleaned, 0
+            cleaned = cleaned + window if cleaned else window.lstrip()
+            if len(cleaned) > limit and not cleaned[limit:].isspace():
+                return cleaned[:limit], len(cleaned) - limit + length - end
+            # Markup or whitespace left too little text; clean the next, larger window
+            start = end
+            step *= 2
+
+default_sanitizer = SanitizerEngine()
 
 def sanitize_input(text):
     """
@@ -26,28 +156,79 @@ def sanitize_input(text):
     Returns:
         str: The sanitized text, or None if the input is invalid or empty.
     """
-    if not text or not isinstance(text, str) or text.strip() == "":
-        logger.warning("Invalid or empty input text provided")
-        return None
+    return default_sanitizer.sanitize(text)
 
-    # Remove HTML tags
-    text = re.sub(r'<[^>]+>', '', text)
+def sanitize_many(texts):
+    """
+    Batch version of sanitize_input.
 
-    # Escape special characters (optional, depending on use case)
-    text = text.replace('\n', ' ').replace('\r', ' ').strip()
+    Args:
+        texts (list): The input texts to sanitize.
 
-    # Limit input length to prevent abuse
-    if len(text) > MAX_INPUT_LENGTH:
-        logger.warning(f"Input text truncated to {MAX_INPUT_LENGTH} characters")
-        text = text[:MAX_INPUT_LENGTH]
+    Returns:
+        list: The sanitized text for each input, or None where it is invalid or empty.
+    """
+    return default_sanitizer.sanitize_many(texts)
 
-    return text
+def _language_sample(text):
+    """
+    Returns the bounded prefix of text used for language detection, cut at a word boundary.
+    """
+    if len(text) <= LANGUAGE_SAMPLE_CHARS:
+        return text
+    sample = text[:LANGUAGE_SAMPLE_CHARS]
+    boundary = sample.rfind(" ")
+    return sample[:boundary] if boundary > 0 else sample
+
+def detect_language_code(text):
+    """
+    Detects the language of the input text from a bounded prefix, caching results by text hash.
+
+    Args:
+        text (str): The input text to analyze.
+
+    Returns:
+        str: The detected language code (e.g. "en"), or None if detection failed.
+    """
+    sample = _language_sample(text)
+    key = hashlib.blake2b(sample.encode("utf-8"), digest_size=16).digest()
+    with _language_cache_lock:
+        if key in _language_cache:
+            _language_cache.move_to_end(key)
+            return _language_cache[key]
+
+    try:
+        language = detect(sample)
+    except LangDetectException as e:
+        logger.debug(f"Language detection failed: {e}")
+        language = None
+
+    with _language_cache_lock:
+        _language_cache[key] = language
+        if len(_language_cache) > LANGUAGE_CACHE_SIZE:
+            _language_cache.popitem(last=False)
+    return language
+
+def detect_languages(texts):
+    """
+    Detects the language of many texts, detecting each distinct text once.
+
+    Args:
+        texts (list): The input texts to analyze.
+
+    Returns:
+        list: The detected language code for each text, or None where detection failed.
+    """
+    detected = {}
+    return [detected[text] if text in detected else detected.setdefault(text, detect_language_code(text))
+            for text in texts]
 
 def detect_language(text):
     """
     Detects the language of the input text.
     Returns True if the language is supported, False otherwise.
-    If strict language checks are disabled, returns True as a fallback.
+    If strict language checks are disabled, returns True without running detection,
+    since the result would be ignored.
 
     Args:
         text (str): The input text to analyze.
@@ -61,21 +242,32 @@ def detect_language(text):
                                    Example: "en,es,fr,de" to add German.
         STRICT_LANGUAGE_CHECK (bool): If True, rejects unsupported languages. If False, allows processing as a fallback.
                                       Defaults to False.
+        LANGUAGE_SAMPLE_CHARS (int): Number of leading characters examined. Defaults to 500.
+        LANGUAGE_CACHE_SIZE (int): Number of detection results cached. Defaults to 10000.
+        LANGUAGE_DETECTION_SEED (int): Seed for langdetect's sampling. Defaults to 0.
     """
-    try:
-        language = detect(text)
-        if language not in SUPPORTED_LANGUAGES:
-            logger.warning(f"Unsupported language detected: {language}")
-            if STRICT_LANGUAGE_CHECK:
-                return False  # Strict check: reject unsupported languages
-            else:
-                logger.info("Strict language check is disabled. Allowing processing as a fallback.")
-                return True  # Fallback: allow processing even if language is unsupported
-        return True
-    except LangDetectException as e:
-        logger.error(f"Language detection failed: {e}")
-        if STRICT_LANGUAGE_CHECK:
-            return False  # Strict check: reject if language detection fails
-        else:
-            logger.info("Strict language check is disabled. Allowing processing as a fallback.")
-            return True  # Fallback: allow processing if language detection fails
+    if not STRICT_LANGUAGE_CHECK:
+        return True  # Fallback: every language is allowed, so skip detection entirely
+
+    language = detect_language_code(text)
+    if language is None:
+        logger.error("Language detection failed")
+        return False  # Strict check: reject if language detection fails
+    if language not in SUPPORTED_LANGUAGES:
+        logger.warning(f"Unsupported language detected: {language}")
+        return False  # Strict check: reject unsupported languages
+    return True
+
+def detect_language_many(texts):
+    """
+    Batch version of detect_language.
+
+    Args:
+        texts (list): The input texts to analyze.
+
+    Returns:
+        list: A bool per text, True if the language is supported or strict checks are disabled.
+    """
+    if not STRICT_LANGUAGE_CHECK:
+        return [True] * len(texts)
+    return [language in SUPPORTED_LANGUAGES for language in detect_languages(texts)]
@@ -0,0 +1,515 @@
+import argparse
+import itertools
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+import weakref
+from contextlib import closing
+from decouple import config, Csv
+from stream_processing import read_records, analyze_stream, ResultWriter, INPUT_FORMATS, STREAM_BATCH_SIZE
+
+logger = logging.getLogger(__name__)
+
+# Constants
+JOB_DB_PATH = config("JOB_DB_PATH", default="jobs.sqlite3")
+JOB_DATA_DIR = config("JOB_DATA_DIR", default="job_data")  # Uploaded datasets and result files
+JOB_WORKERS = config("JOB_WORKERS", default=1, cast=int)  # Job threads per process; 0 only accepts jobs
+JOB_BATCH_SIZE = config("JOB_BATCH_SIZE", default=STREAM_BATCH_SIZE, cast=int)
+JOB_BATCH_CONCURRENCY = config("JOB_BATCH_CONCURRENCY", default=1, cast=int)  # Batches in flight per job
+JOB_INPUT_DIRS = config("JOB_INPUT_DIRS", default="", cast=Csv())  # Where local-path jobs may read; empty disables them
+JOB_MAX_UPLOAD_BYTES = config("JOB_MAX_UPLOAD_BYTES", default=1 << 30, cast=int)
+JOB_POLL_INTERVAL = config("JOB_POLL_INTERVAL", default=2.0, cast=float)  # Seconds between checks for new jobs
+JOB_STALE_SECONDS = config("JOB_STALE_SECONDS", default=300.0, cast=float)  # Running jobs silent this long are resumed
+JOB_HEARTBEAT_INTERVAL = config("JOB_HEARTBEAT_INTERVAL", default=30.0, cast=float)  # Must be well below JOB_STALE_SECONDS
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED = (COMPLETED, FAILED, CANCELLED)
+
+UPLOAD_CHUNK_BYTES = 1 << 20
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    input_path TEXT NOT NULL,
+    input_format TEXT NOT NULL,
+    field TEXT,
+    result_path TEXT NOT NULL,
+    total INTEGER,
+    processed INTEGER NOT NULL DEFAULT 0,
+    result_bytes INTEGER NOT NULL DEFAULT 0,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    heartbeat_at REAL,
+    claim_token TEXT,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at);
+"""
+
+class JobCancelled(Exception):
+    pass
+
+class JobInterrupted(Exception):
+    pass
+
+class JobLost(Exception):
+    """
+    Raised when a worker finds that its job was claimed again by another worker.
+    """
+
+class UploadTooLarge(ValueError):
+    pass
+
+# Appended to updates made by a job's worker; a None token skips the ownership check
+_OWNED = " AND (? IS NULL OR claim_token = ?)"
+
+class JobStore:
+    """
+    Job state in a local SQLite database, shared by every process that opens the same file.
+
+    Each call opens its own connection, so the store can be used from any
+    thread and survives fork. Claims run in an IMMEDIATE transaction, so two
+    workers never take the same job. Every claim gets a new claim token, and
+    updates from a worker only apply while its token is current, so a worker
+    whose stale job was claimed again cannot overwrite the new owner's progress.
+    """
+
+    def __init__(self, path=JOB_DB_PATH):
+        self.path = path
+        with closing(self._connect()) as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(_SCHEMA)
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        connection.row_factory = sqlite3.Row
+        return connection
+
+    def _execute(self, sql, params=()):
+        with closing(self._connect()) as connection:
+            return connection.execute(sql, params).rowcount
+
+    def create(self, input_path, input_format, field, result_path, job_id=None):
+        """
+        Records a queued job and returns it.
+        """
+        job_id = job_id or uuid.uuid4().hex
+        self._execute(
+            "INSERT INTO jobs (id, status, input_path, input_format, field, result_path, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (job_id, QUEUED, input_path, input_format, field, result_path, time.time())
+        )
+        return self.get(job_id)
+
+    def get(self, job_id):
+        """
+        Returns a job as a dict, or None if there is no such job.
+        """
+        with closing(self._connect()) as connection:
+            row = connection.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row else None
+
+    def claim(self, stale_seconds=JOB_STALE_SECONDS):
+        """
+        Marks the oldest queued job, or a running job whose worker stopped
+        heartbeating (e.g. the server restarted), as running and returns it.
+
+        Returns:
+            dict: The claimed job, or None if there is nothing to do.
+        """
+        now = time.time()
+        claim_token = uuid.uuid4().hex
+        with closing(self._connect()) as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                row = connection.execute(
+                    "SELECT * FROM jobs WHERE status = ? OR (status = ? AND heartbeat_at < ?) "
+                    "ORDER BY created_at LIMIT 1",
+                    (QUEUED, RUNNING, now - stale_seconds)
+                ).fetchone()
+                if row is not None:
+                    connection.execute(
+                        "UPDATE jobs SET status = ?, started_at = COALESCE(started_at, ?), heartbeat_at = ?, "
+                        "claim_token = ? WHERE id = ?",
+                        (RUNNING, now, now, claim_token, row["id"])
+                    )
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+        if row is None:
+            return None
+        if row["status"] == RUNNING:
+            logger.warning(f"Resuming job {row['id']} after {row['processed']} records")
+        return {**dict(row), "status": RUNNING, "claim_token": claim_token}
+
+    def set_total(self, job_id, total, claim_token=None):
+        self._execute("UPDATE jobs SET total = ? WHERE id = ?" + _OWNED, (total, job_id, claim_token, claim_token))
+
+    def heartbeat(self, job_id, claim_token):
+        """
+        Marks a running job as alive. Returns False if the job is no longer held under claim_token.
+        """
+        return self._execute(
+            "UPDATE jobs SET heartbeat_at = ? WHERE id = ? AND status = ?" + _OWNED,
+            (time.time(), job_id, RUNNING, claim_token, claim_token)
+        ) > 0
+
+    def record_progress(self, job_id, processed, result_bytes, claim_token=None):
+        """
+        Checkpoints a running job and returns True if cancellation was requested.
+
+        Raises:
+            JobLost: If claim_token is given and the job has been claimed again since.
+        """
+        with closing(self._connect()) as connection:
+            updated = connection.execute(
+                "UPDATE jobs SET processed = ?, result_bytes = ?, heartbeat_at = ? WHERE id = ?" + _OWNED,
+                (processed, result_bytes, time.time(), job_id, claim_token, claim_token)
+            ).rowcount
+            row = connection.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if not updated:
+            raise JobLost(job_id)
+        return bool(row and row["cancel_requested"])
+
+    def finish(self, job_id, status, error=None, claim_token=None):
+        self._execute(
+            "UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE id = ?" + _OWNED,
+            (status, error, time.time(), job_id, claim_token, claim_token)
+        )
+
+    def requeue(self, job_id, claim_token=None):
+        """
+        Returns a running job to the queue, to be resumed from its last checkpoint.
+        """
+        self._execute(
+            "UPDATE jobs SET status = ? WHERE id = ? AND status = ?" + _OWNED,
+            (QUEUED, job_id, RUNNING, claim_token, claim_token)
+        )
+
+    def cancel(self, job_id):
+        """
+        Cancels a queued job at once, or asks the worker of a running job to stop after its current batch.
+
+        Returns:
+            dict: The updated job, or None if there is no such job.
+        """
+        self._execute(
+            "UPDATE jobs SET status = ?, cancel_requested = 1, finished_at = ? WHERE id = ? AND status = ?",
+            (CANCELLED, time.time(), job_id, QUEUED)
+        )
+        self._execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status = ?", (job_id, RUNNING))
+        return self.get(job_id)
+
+def job_summary(job):
+    """
+    Returns the public view of a job, without server file paths.
+    """
+    total = job["total"]
+    return {
+        "id": job["id"],
+        "status": job["status"],
+        "input_format": job["input_format"],
+        "processed": job["processed"],
+        "total": total,
+        "progress": round(job["processed"] / total, 4) if total else (1.0 if job["status"] == COMPLETED else 0.0),
+        "cancel_requested": bool(job["cancel_requested"]),
+        "error": job["error"],
+        "created_at": job["created_at"],
+        "started_at": job["started_at"],
+        "finished_at": job["finished_at"]
+    }
+
+def _open_records(job):
+    stream = open(job["input_path"], encoding="utf-8", errors="replace", newline="")
+    field = job["field"]
+    return stream, read_records(stream, job["input_format"], field=field or "text", column=field)
+
+class JobQueue:
+    """
+    Runs scoring jobs from a JobStore on a pool of local worker threads.
+
+    Workers share the process's pipeline (the model registry's, so an
+    InferenceScheduler batches job texts with API traffic) and process each
+    job in batches through stream_processing.analyze_stream. After every
+    batch, results are flushed to the job's NDJSON result file and the job is
+    checkpointed with its record count and result size. A job interrupted by
+    a restart is resumed from its last checkpoint once its heartbeat goes stale,
+    and a cancelled job stops after its current batch.
+
+    While a job runs, a heartbeat thread refreshes it every heartbeat_interval,
+    so counting a large input or a slow batch never makes it look stale. If the
+    job is claimed by another worker anyway (e.g. this process hung for longer
+    than JOB_STALE_SECONDS), the worker notices when it checks ownership
+    before writing each batch, and stops without touching the result file.
+    """
+
+    def __init__(self, store=None, pipeline_getter=None, workers=JOB_WORKERS, data_dir=JOB_DATA_DIR,
+                 batch_size=JOB_BATCH_SIZE, batch_concurrency=JOB_BATCH_CONCURRENCY,
+                 poll_interval=JOB_POLL_INTERVAL, input_dirs=JOB_INPUT_DIRS,
+                 heartbeat_interval=JOB_HEARTBEAT_INTERVAL):
+        self.store = store or JobStore()
+        self.pipeline_getter = pipeline_getter
+        self.workers = workers
+        self.data_dir = data_dir
+        self.batch_size = batch_size
+        self.batch_concurrency = batch_concurrency
+        self.poll_interval = poll_interval
+        self.heartbeat_interval = heartbeat_interval
+        self.input_dirs = [os.path.realpath(path) for path in input_dirs if path]
+        os.makedirs(self.data_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._threads = []
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        # Threads don't survive fork; a started queue restarts its workers in the child
+        ref = weakref.ref(self)
+        os.register_at_fork(after_in_child=lambda: ref() is not None and ref()._restart_after_fork())
+
+    def start(self):
+        """
+        Starts the worker threads, once. Safe to call on every submission.
+        """
+        with self._lock:
+            if self._threads or self._stop.is_set():
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._run, name=f"job-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self, timeout=None):
+        """
+        Stops the workers after their current batch; interrupted jobs resume on the next start.
+        """
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def _restart_after_fork(self):
+        self._lock = threading.Lock()
+        started = bool(self._threads)
+        self._threads = []
+        if started:
+            self.start()
+
+    def submit_upload(self, chunks, input_format, field=None, max_bytes=JOB_MAX_UPLOAD_BYTES):
+        """
+        Saves an uploaded dataset and queues a job for it.
+
+        Args:
+            chunks (iterable): The dataset's bytes, in chunks.
+            input_format (str): "text", "jsonl" or "csv".
+            field (str): The JSONL field or CSV column holding the text.
+            max_bytes (int): The largest accepted upload.
+
+        Returns:
+            dict: The queued job.
+
+        Raises:
+            ValueError: If the format is unsupported.
+            UploadTooLarge: If the upload exceeds max_bytes.
+        """
+        _check_format(input_format)
+        job_id = uuid.uuid4().hex
+        input_path = os.path.join(self.data_dir, f"{job_id}.input")
+        size = 0
+        try:
+            with open(input_path, "wb") as f:
+                for chunk in chunks:
+                    size += len(chunk)
+                    if size > max_bytes:
+                        raise UploadTooLarge(f"Upload exceeds {max_bytes} bytes")
+                    f.write(chunk)
+        except BaseException:
+            os.unlink(input_path)
+            raise
+        return self._create(job_id, input_path, input_format, field)
+
+    def submit_path(self, path, input_format, field=None, check_allowed=True):
+        """
+        Queues a job for a dataset already on the server's disk.
+
+        Raises:
+            ValueError: If the format is unsupported or the file does not exist.
+            PermissionError: If check_allowed is set and the file is outside JOB_INPUT_DIRS.
+        """
+        _check_format(input_format)
+        path = os.path.realpath(path)
+        if check_allowed and not any(os.path.commonpath([path, root]) == root for root in self.input_dirs):
+            raise PermissionError("Path is outside the directories jobs may read")
+        if not os.path.isfile(path):
+            raise ValueError("No such file")
+        return self._create(uuid.uuid4().hex, path, input_format, field)
+
+    def _create(self, job_id, input_path, input_format, field):
+        result_path = os.path.join(self.data_dir, f"{job_id}.results.jsonl")
+        job = self.store.create(input_path, input_format, field, result_path, job_id=job_id)
+        logger.info(f"Queued job {job_id} ({input_format})")
+        self._wake.set()
+        return job
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                job = self.store.claim()
+            except sqlite3.Error as e:
+                logger.error(f"Failed to claim a job: {e}")
+                job = None
+            if job is None:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+                continue
+            self.process(job)
+
+    def process(self, job):
+        """
+        Scores a claimed job to completion, cancellation or failure, resuming from its checkpoint.
+        """
+        job_id = job["id"]
+        claim_token = job.get("claim_token")
+        lost = threading.Event()
+        done = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(job_id, claim_token, done, lost),
+                                     name=f"job-heartbeat-{job_id[:8]}", daemon=True)
+        heartbeat.start()
+        try:
+            if job["total"] is None:
+                stream, records = _open_records(job)
+                with stream:
+                    self.store.set_total(job_id, sum(1 for _ in records), claim_token)
+            self._score(job, lost)
+        except JobLost:
+            logger.warning(f"Job {job_id} was claimed by another worker; stopping")
+        except JobCancelled:
+            logger.info(f"Job {job_id} cancelled")
+            self.store.finish(job_id, CANCELLED, claim_token=claim_token)
+        except JobInterrupted:
+            logger.info(f"Job {job_id} interrupted; it resumes on the next start")
+            self.store.requeue(job_id, claim_token)
+        except Exception as e:
+            logger.exception(f"Job {job_id} failed")
+            self.store.finish(job_id, FAILED, f"{type(e).__name__}: {e}", claim_token)
+        else:
+            logger.info(f"Job {job_id} completed")
+            self.store.finish(job_id, COMPLETED, claim_token=claim_token)
+        finally:
+            done.set()
+            heartbeat.join()
+
+    def _heartbeat(self, job_id, claim_token, done, lost):
+        """
+        Keeps a running job's heartbeat fresh until done is set; sets lost if the job was claimed again.
+        """
+        while not done.wait(self.heartbeat_interval):
+            try:
+                if not self.store.heartbeat(job_id, claim_token):
+                    lost.set()
+                    return
+            except sqlite3.Error as e:
+                logger.error(f"Failed to heartbeat job {job_id}: {e}")
+
+    def _check_owned(self, job_id, claim_token, lost):
+        if lost.is_set() or not self.store.heartbeat(job_id, claim_token):
+            raise JobLost(job_id)
+
+    def _score(self, job, lost):
+        job_id = job["id"]
+        claim_token = job.get("claim_token")
+        processed = job["processed"]
+        self._check_owned(job_id, claim_token, lost)
+        # Drop results written after the last checkpoint; they are scored again
+        with open(job["result_path"], "ab") as f:
+            f.truncate(job["result_bytes"])
+        pipeline = self.pipeline_getter() if self.pipeline_getter else _default_pipeline()
+        stream, records = _open_records(job)
+        with stream, open(job["result_path"], "a", encoding="utf-8") as output:
+            writer = ResultWriter(output)
+            batches = analyze_stream(itertools.islice(records, processed, None), pipeline,
+                                     self.batch_size, self.batch_concurrency)
+            try:
+                for results in batches:
+                    self._check_owned(job_id, claim_token, lost)  # Another worker may own the result file now
+                    for result in results:
+                        writer.write(processed, result)
+                        processed += 1
+                    writer.flush()
+                    if self.store.record_progress(job_id, processed, output.tell(), claim_token):
+                        raise JobCancelled()
+                    if self._stop.is_set():
+                        raise JobInterrupted()
+            finally:
+                batches.close()
+
+def _check_format(input_format):
+    if input_format not in INPUT_FORMATS:
+        raise ValueError(f"Unsupported input format: {input_format}")
+
+def _default_pipeline():
+    from model_registry import get_pipeline
+    return get_pipeline()
+
+_job_queue = None
+_job_queue_lock = threading.Lock()
+
+def get_job_queue():
+    """
+    Returns the process-wide job queue. Its workers start with start().
+
+    Environment Variables:
+        JOB_DB_PATH (str): The SQLite database holding job state. Defaults to "jobs.sqlite3".
+        JOB_DATA_DIR (str): Where uploads and result files are kept. Defaults to "job_data".
+        JOB_WORKERS (int): Worker threads per process. Defaults to 1.
+        JOB_INPUT_DIRS (str): Comma-separated directories local-path jobs may read. Defaults to none.
+    """
+    global _job_queue
+    if _job_queue is None:
+        with _job_queue_lock:
+            if _job_queue is None:
+                _job_queue = JobQueue()
+    return _job_queue
+
+def main(argv=None):
+    """
+    Queues jobs and runs job workers outside the API, sharing its database.
+
+    Examples:
+        python job_queue.py submit reviews.jsonl --format jsonl --field body
+        python job_queue.py worker
+    """
+    parser = argparse.ArgumentParser(description="Offline scoring jobs")
+    commands = parser.add_subparsers(dest="command", required=True)
+    submit = commands.add_parser("submit", help="Queue a job for a local file")
+    submit.add_argument("path")
+    submit.add_argument("--format", choices=INPUT_FORMATS, default="text")
+    submit.add_argument("--field", help="The JSONL field or CSV column holding the text")
+    commands.add_parser("worker", help="Process queued jobs until interrupted")
+    args = parser.parse_args(argv)
+
+    queue = get_job_queue()
+    if args.command == "submit":
+        job = queue.submit_path(args.path, args.format, args.field, check_allowed=False)
+        print(job["id"])
+        return 0
+    logging.basicConfig(level=logging.INFO)
+    queue.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        queue.stop()
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,193 @@
+import logging
+import threading
+import time
+from decouple import config
+from inference_scheduler import Histogram, InferenceScheduler
+from model_registry import get_model_registry
+from result_cache import get_result_cache
+
+logger = logging.getLogger(__name__)
+
+# Constants
+METRICS_ENABLED = config("METRICS_ENABLED", default=True, cast=bool)
+LATENCY_BOUNDS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                  0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)  # Seconds
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+class MetricsRegistry:
+    """
+    In-process counters, gauges and latency histograms, rendered in the
+    Prometheus text exposition format.
+
+    Recording is a dict lookup and a few additions under one lock, well under
+    a microsecond, so it can wrap every stage of every request. Figures that
+    other components already keep (cache, scheduler, model registry) are read
+    by collectors only when /metrics is scraped. Each worker process keeps
+    its own figures.
+    """
+
+    def __init__(self, enabled=METRICS_ENABLED):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._histograms = {}  # (name, labels) -> Histogram
+        self._counters = {}  # (name, labels) -> value
+        self._gauges = {}  # (name, labels) -> value
+        self._help = {}
+        self._collectors = []
+
+    def describe(self, name, help_text):
+        self._help[name] = help_text
+
+    def observe(self, name, value, **labels):
+        """
+        Records a latency, in seconds, in the histogram for name and labels.
+        """
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(LATENCY_BOUNDS)
+            histogram.observe(value)
+
+    def inc(self, name, amount=1, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def add_gauge(self, name, amount, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._gauges[key] = self._gauges.get(key, 0) + amount
+
+    def time(self, name, **labels):
+        """
+        Returns a context manager that observes the time spent in its block.
+        """
+        return _Timer(self, name, labels)
+
+    def register_collector(self, collector):
+        """
+        Adds a function called at render time. It returns (name, type, help, samples)
+        tuples, where samples are (sample name, labels dict, value).
+        """
+        self._collectors.append(collector)
+
+    def render(self):
+        """
+        Returns every metric in the Prometheus text exposition format.
+        """
+        families = {}
+        with self._lock:
+            for (name, labels), histogram in self._histograms.items():
+                families.setdefault((name, "histogram"), []).extend(
+                    histogram_samples(name, histogram.snapshot(), dict(labels))
+                )
+            for kind, values in (("counter", self._counters), ("gauge", self._gauges)):
+                for (name, labels), value in values.items():
+                    families.setdefault((name, kind), []).append((name, dict(labels), value))
+
+        lines = []
+        for (name, kind), samples in families.items():
+            _render_family(lines, name, kind, self._help.get(name, ""), samples)
+        for collector in self._collectors:
+            try:
+                for name, kind, help_text, samples in collector():
+                    _render_family(lines, name, kind, help_text, samples)
+            except Exception as e:
+                logger.error(f"Metrics collector failed: {e!r}")
+        return "\n".join(lines) + "\n"
+
+class _Timer:
+    __slots__ = ("registry", "name", "labels", "start")
+
+    def __init__(self, registry, name, labels):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.registry.observe(self.name, time.perf_counter() - self.start, **self.labels)
+        return False
+
+def histogram_samples(name, snapshot, labels):
+    """
+    Converts a Histogram snapshot into cumulative Prometheus bucket, sum and count samples.
+    """
+    samples = []
+    cumulative = 0
+    for bound, count in snapshot["buckets"].items():
+        cumulative += count
+        samples.append((f"{name}_bucket", {**labels, "le": bound}, cumulative))
+    samples.append((f"{name}_sum", labels, snapshot["sum"]))
+    samples.append((f"{name}_count", labels, snapshot["count"]))
+    return samples
+
+def _render_family(lines, name, kind, help_text, samples):
+    if help_text:
+        lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {kind}")
+    for sample_name, labels, value in samples:
+        if labels:
+            label_text = ",".join(f'{key}="{_escape(label_value)}"' for key, label_value in labels.items())
+            lines.append(f"{sample_name}{{{label_text}}} {value}")
+        else:
+            lines.append(f"{sample_name} {value}")
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _collect_components():
+    """
+    Reads the figures kept by the result cache, the model registry and the inference scheduler.
+    """
+    cache = get_result_cache()
+    if cache is not None:
+        stats = cache.stats()
+        yield ("sentiment_cache_lookups_total", "counter", "Result cache lookups.",
+               [("sentiment_cache_lookups_total", {"result": "hit"}, stats["hits"]),
+                ("sentiment_cache_lookups_total", {"result": "miss"}, stats["misses"])])
+        yield ("sentiment_cache_hit_ratio", "gauge", "Share of result cache lookups that hit.",
+               [("sentiment_cache_hit_ratio", {}, stats["hit_rate"])])
+        yield ("sentiment_cache_entries", "gauge", "Results held in the cache.",
+               [("sentiment_cache_entries", {}, stats["entries"])])
+
+    registry = get_model_registry()
+    yield ("sentiment_model_ready", "gauge", "1 once the sentiment model is loaded.",
+           [("sentiment_model_ready", {}, int(registry.ready))])
+    if registry.load_seconds is not None:
+        yield ("sentiment_model_load_seconds", "gauge", "Time taken to load the sentiment model.",
+               [("sentiment_model_load_seconds", {}, registry.load_seconds)])
+
+    if registry.ready and isinstance(registry.get(), InferenceScheduler):
+        stats = registry.get().stats()
+        yield ("sentiment_inference_batch_size", "histogram", "Texts per transformer forward pass.",
+               histogram_samples("sentiment_inference_batch_size", stats["batch_size"], {}))
+        yield ("sentiment_inference_queue_depth", "gauge", "Texts waiting for the transformer.",
+               [("sentiment_inference_queue_depth", {}, stats["queue_depth"])])
+
+_metrics = MetricsRegistry()
+_metrics.describe("sentiment_stage_seconds", "Time spent in each analysis stage.")
+_metrics.describe("sentiment_request_seconds", "End-to-end request handling time.")
+_metrics.describe("sentiment_requests_total", "Requests handled, by endpoint and status.")
+_metrics.describe("sentiment_requests_in_flight", "Requests currently being handled.")
+_metrics.describe("sentiment_admission_wait_seconds", "Time requests waited for admission, by priority lane.")
+_metrics.describe("sentiment_requests_shed_total", "Requests rejected with 503 under overload, by priority lane.")
+_metrics.describe("sentiment_requests_degraded_total", "Requests answered without the transformer under overload.")
+_metrics.register_collector(_collect_components)
+
+def get_metrics():
+    """
+    Returns the process-wide metrics registry.
+    """
+    return _metrics
@@ -0,0 +1,185 @@
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from inference_backends import (
+    load_backend, onnx_model_path, BACKENDS, SENTIMENT_MODEL, ONNX_MODEL_DIR
+)
+from inference_scheduler import INFERENCE_MAX_BATCH_SIZE
+
+logger = logging.getLogger(__name__)
+
+# Constants
+ONNX_OPSET = 17
+MIN_AGREEMENT = 0.98
+
+# Used by verify when no sample file is given
+SAMPLE_TEXTS = [
+    "I love this product!",
+    "Absolutely terrible, it broke after one day.",
+    "The delivery was fast and the packaging was neat.",
+    "Not worth the money.",
+    "It works, I guess.",
+    "Best purchase I have made all year.",
+    "The battery life is disappointing.",
+    "Customer support solved my issue in minutes.",
+    "I would not recommend this to anyone.",
+    "Decent quality for the price.",
+    "The screen cracked when I dropped it from a table.",
+    "My kids are thrilled with it.",
+    "It stopped charging after a week and the seller ignored me.",
+    "Exactly as described, very happy.",
+    "Meh.",
+    "This is the worst app I have ever used.",
+    "Surprisingly good sound for such a small speaker.",
+    "The instructions were confusing but setup went fine eventually.",
+    "Five stars, would buy again.",
+    "Returned it, the fabric felt cheap."
+]
+
+def export(model_name=SENTIMENT_MODEL, model_dir=ONNX_MODEL_DIR, quantize=True, opset=ONNX_OPSET):
+    """
+    Exports the torch model to ONNX, and optionally a dynamically int8-quantized copy.
+
+    The tokenizer and config are saved next to the graphs, so the ONNX backends
+    load without torch.
+
+    Args:
+        model_name (str): The Hugging Face model to export.
+        model_dir (str): Output directory.
+        quantize (bool): Also write the int8 graph.
+        opset (int): ONNX opset version.
+
+    Returns:
+        list: The paths of the written graphs.
+    """
+    import torch
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+    os.makedirs(model_dir, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModelForSequenceClassification.from_pretrained(model_name)
+    model.eval()
+
+    sample = tokenizer(["An export sample.", "Another one."], padding=True, return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["logits"] = {0: "batch"}
+
+    path = onnx_model_path("onnx", model_dir)
+    with torch.no_grad():
+        torch.onnx.export(
+            model, tuple(sample[name] for name in input_names), path,
+            input_names=input_names, output_names=["logits"],
+            dynamic_axes=dynamic_axes, opset_version=opset
+        )
+    tokenizer.save_pretrained(model_dir)
+    model.config.save_pretrained(model_dir)
+    written = [path]
+    logger.info(f"Exported {model_name} to {path}")
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantized_path = onnx_model_path("onnx-int8", model_dir)
+        quantize_dynamic(path, quantized_path, weight_type=QuantType.QInt8)
+        written.append(quantized_path)
+        logger.info(f"Wrote int8 model to {quantized_path}")
+    return written
+
+def compare_backends(reference, candidate, texts, batch_size=INFERENCE_MAX_BATCH_SIZE):
+    """
+    Runs two pipelines over the same texts and compares their labels and speed.
+
+    Args:
+        reference (callable): The baseline pipeline, normally the torch one.
+        candidate (callable): The pipeline being verified.
+        texts (list): The sample texts.
+        batch_size (int): Texts per forward pass.
+
+    Returns:
+        dict: agreement (fraction of equal labels), max_score_difference,
+              mismatches (the texts whose labels differ), reference_seconds,
+              candidate_seconds and speedup.
+    """
+    timings = []
+    outputs = []
+    for pipeline in (reference, candidate):
+        pipeline(texts[:1])  # Warm up outside the timing
+        start = time.perf_counter()
+        outputs.append(pipeline(texts, batch_size=batch_size))
+        timings.append(time.perf_counter() - start)
+
+    reference_results, candidate_results = outputs
+    mismatches = [
+        text for text, expected, actual in zip(texts, reference_results, candidate_results)
+        if expected["label"] != actual["label"]
+    ]
+    return {
+        "texts": len(texts),
+        "agreement": 1 - len(mismatches) / len(texts) if texts else 1.0,
+        "max_score_difference": max(
+            (abs(expected["score"] - actual["score"])
+             for expected, actual in zip(reference_results, candidate_results)
+             if expected["label"] == actual["label"]),
+            default=0.0
+        ),
+        "mismatches": mismatches,
+        "reference_seconds": timings[0],
+        "candidate_seconds": timings[1],
+        "speedup": timings[0] / timings[1] if timings[1] else 0.0
+    }
+
+def verify(backend, texts=SAMPLE_TEXTS, model_name=SENTIMENT_MODEL, model_dir=ONNX_MODEL_DIR):
+    """
+    Checks that a backend labels the sample texts like the torch model.
+    """
+    reference = load_backend("torch", model_name, model_dir)
+    candidate = load_backend(backend, model_name, model_dir)
+    return compare_backends(reference, candidate, texts)
+
+def _read_samples(path):
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+def main(argv=None):
+    """
+    Exports the ONNX backends or verifies one against the torch model.
+
+    Example:
+        python model_export.py export
+        python model_export.py verify --backend onnx-int8 --samples reviews.txt
+    """
+    parser = argparse.ArgumentParser(description="Export and verify ONNX inference backends")
+    parser.add_argument("--model", default=SENTIMENT_MODEL, help="Hugging Face model name or path")
+    parser.add_argument("--model-dir", default=ONNX_MODEL_DIR, help="Directory for the exported model")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="Export the model to ONNX")
+    export_parser.add_argument("--no-quantize", action="store_true", help="Skip the int8 model")
+    export_parser.add_argument("--opset", type=int, default=ONNX_OPSET)
+
+    verify_parser = subparsers.add_parser("verify", help="Compare a backend's labels with the torch model")
+    verify_parser.add_argument("--backend", choices=[b for b in BACKENDS if b.startswith("onnx")], default="onnx-int8")
+    verify_parser.add_argument("--samples", help="Text file with one sample per line")
+    verify_parser.add_argument("--min-agreement", type=float, default=MIN_AGREEMENT)
+
+    args = parser.parse_args(argv)
+    if args.command == "export":
+        for path in export(args.model, args.model_dir, quantize=not args.no_quantize, opset=args.opset):
+            print(f"Wrote {path}")
+        return 0
+
+    texts = _read_samples(args.samples) if args.samples else SAMPLE_TEXTS
+    report = verify(args.backend, texts, args.model, args.model_dir)
+    print(json.dumps(report, indent=2))
+    if report["agreement"] < args.min_agreement:
+        print(f"Label agreement {report['agreement']:.1%} is below {args.min_agreement:.1%}", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(main())
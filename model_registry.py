@@ -0,0 +1,127 @@
+import logging
+import threading
+import time
+from decouple import config
+
+logger = logging.getLogger(__name__)
+
+# Measured from the first import of this module, which happens early in every entry point
+PROCESS_START = time.monotonic()
+
+# Constants
+SENTIMENT_TASK = config("SENTIMENT_TASK", default="sentiment-analysis")
+INFERENCE_BATCHING = config("INFERENCE_BATCHING", default=True, cast=bool)
+
+def load_sentiment_pipeline():
+    """
+    Loads the sentiment pipeline for the configured INFERENCE_BACKEND (see
+    inference_backends), wrapped in the batching scheduler unless
+    INFERENCE_BATCHING is disabled.
+    """
+    # The torch backend pulls in torch, so backends are imported only when a model is actually needed
+    from inference_backends import load_backend
+    from inference_scheduler import InferenceScheduler
+
+    loaded = load_backend()
+    if INFERENCE_BATCHING:
+        loaded = InferenceScheduler(loaded)
+    return loaded
+
+class ModelRegistry:
+    """
+    Loads the sentiment model lazily, exactly once per process.
+
+    get() loads the model on first use, or waits for a load already in
+    progress. warm_up() starts loading ahead of time, optionally in the
+    background, so a server can accept connections and report "loading"
+    from its health endpoint meanwhile.
+    """
+
+    def __init__(self, loader=load_sentiment_pipeline):
+        self._loader = loader
+        self._lock = threading.Lock()
+        self._pipeline = None
+        self.status = "not_loaded"
+        self.error = None
+        self.load_seconds = None
+        self.startup_seconds = None
+
+    @property
+    def ready(self):
+        return self._pipeline is not None
+
+    def get(self):
+        """
+        Returns the loaded pipeline, loading it if needed.
+
+        Raises:
+            Exception: If the model fails to load. A later call retries.
+        """
+        if self._pipeline is not None:
+            return self._pipeline
+        with self._lock:
+            if self._pipeline is None:
+                self.status = "loading"
+                start = time.monotonic()
+                try:
+                    loaded = self._loader()
+                except Exception as e:
+                    self.status = "failed"
+                    self.error = str(e)
+                    logger.exception("Failed to load the sentiment model")
+                    raise
+                now = time.monotonic()
+                self.load_seconds = now - start
+                self.startup_seconds = now - PROCESS_START
+                self.error = None
+                self.status = "ready"
+                self._pipeline = loaded
+                logger.info(f"Sentiment model loaded in {self.load_seconds:.2f}s "
+                            f"({self.startup_seconds:.2f}s after startup)")
+        return self._pipeline
+
+    def warm_up(self, background=True):
+        """
+        Starts loading the model now instead of on the first request.
+
+        Args:
+            background (bool): Load on a daemon thread and return immediately.
+        """
+        if self.ready:
+            return
+        self.status = "loading"
+        if not background:
+            self.get()
+            return
+        threading.Thread(target=self._warm_up_quietly, name="model-warm-up", daemon=True).start()
+
+    def health(self):
+        """
+        Returns the model status for health checks.
+        """
+        return {
+            "status": self.status,
+            "load_seconds": self.load_seconds,
+            "startup_seconds": self.startup_seconds,
+            "error": self.error
+        }
+
+    def _warm_up_quietly(self):
+        try:
+            self.get()
+        except Exception:
+            pass  # Already logged; status reports the failure
+
+_model_registry = ModelRegistry()
+
+def get_model_registry():
+    """
+    Returns the process-wide model registry.
+    """
+    return _model_registry
+
+def get_pipeline():
+    """
+    Returns the process-wide sentiment pipeline, loading it on first use.
+    """
+    return _model_registry.get()
@@ -0,0 +1,338 @@
+import os
+import mmap
+import fcntl
+import struct
+import hashlib
+import logging
+import threading
+import time
+import weakref
+from collections import namedtuple, OrderedDict
+from limits import parse
+from decouple import config
+
+logger = logging.getLogger(__name__)
+
+# Constants
+RATE_LIMIT_BACKEND = config("RATE_LIMIT_BACKEND", default="memory")  # "memory", "shm" or "redis"
+RATE_LIMIT_SHM_PATH = config("RATE_LIMIT_SHM_PATH", default="/dev/shm/sentiment-rate-limit")
+RATE_LIMIT_SHM_SLOTS = config("RATE_LIMIT_SHM_SLOTS", default=65536, cast=int)
+RATE_LIMIT_REDIS_URL = config("RATE_LIMIT_REDIS_URL", default="redis://localhost:6379/0")
+API_KEY_HEADER = config("API_KEY_HEADER", default="X-API-Key")
+API_KEY_QUOTAS = config("API_KEY_QUOTAS", default="")  # e.g. "key-a=1000 per minute; key-b=50000 per hour"
+
+BACKENDS = ("memory", "shm", "redis")
+SHM_PROBES = 8  # Slots tried per key before the table counts as full
+SHM_LOCK_STRIPES = 64
+MEMORY_PRUNE_PER_HIT = 2  # Oldest buckets checked per hit, more than a hit can add
+REDIS_KEY_PREFIX = "sentiment-rate-limit:"
+
+# KEYS[1] = counter; ARGV = limit, window in ms, cost. Returns {allowed, count, ttl in ms}.
+# Keys cannot expire while a script runs, so the refund always hits the window it charged.
+REDIS_HIT_SCRIPT = """
+redis.call('SET', KEYS[1], 0, 'PX', ARGV[2], 'NX')
+local count = redis.call('INCRBY', KEYS[1], ARGV[3])
+local ttl = redis.call('PTTL', KEYS[1])
+if count > tonumber(ARGV[1]) then
+    redis.call('DECRBY', KEYS[1], ARGV[3])
+    return {0, count, ttl}
+end
+return {1, count, ttl}
+"""
+
+RateLimitResult = namedtuple("RateLimitResult", ["allowed", "remaining", "retry_after"])
+
+def _gcra(tat, now, interval, period, cost):
+    """
+    One step of the generic cell rate algorithm, a token bucket that stores a
+    single timestamp per key: the theoretical arrival time (TAT) at which the
+    bucket would be full again.
+
+    Args:
+        tat (int): The stored TAT in nanoseconds, or 0 for a new key.
+        now (int): The current time in nanoseconds.
+        interval (int): Nanoseconds to refill one token, period / limit.
+        period (int): The limit's period in nanoseconds, which is also the burst allowance.
+        cost (int): Tokens to take.
+
+    Returns:
+        tuple: (new TAT to store or None if rejected, RateLimitResult).
+    """
+    new_tat = max(tat, now) + interval * cost
+    if new_tat - now > period:
+        retry_after = (new_tat - now - period) / 1e9 if interval * cost <= period else period / 1e9
+        return None, RateLimitResult(False, max(0, (period - (max(tat, now) - now)) // interval), retry_after)
+    return new_tat, RateLimitResult(True, (period - (new_tat - now)) // interval, 0.0)
+
+def _fingerprint(key):
+    """
+    Returns a non-zero 64-bit hash of a key; zero marks an empty shared-memory slot.
+    """
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little") or 1
+
+class MemoryBackend:
+    """
+    Token buckets in a dict. Each worker process enforces its limits separately.
+
+    Buckets are kept in the order they were last charged. Beyond max_keys, each
+    hit drops up to MEMORY_PRUNE_PER_HIT of the oldest buckets that have refilled,
+    so pruning costs O(1) per request however many clients there are.
+    """
+
+    blocking = False
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._tats = OrderedDict()
+
+    def hit(self, key, limit, period, cost=1):
+        interval = period // limit
+        now = time.monotonic_ns()
+        with self._lock:
+            new_tat, result = _gcra(self._tats.get(key, 0), now, interval, period, cost)
+            if new_tat is not None:
+                self._tats[key] = new_tat
+                self._tats.move_to_end(key)
+            for _ in range(MEMORY_PRUNE_PER_HIT):
+                if len(self._tats) <= self.max_keys:
+                    break
+                oldest, tat = next(iter(self._tats.items()))
+                if tat > now:
+                    break
+                # A bucket whose TAT has passed is full, so forgetting it changes nothing
+                del self._tats[oldest]
+        return result
+
+    def reset(self):
+        with self._lock:
+            self._tats.clear()
+
+class SharedMemoryBackend:
+    """
+    Token buckets in a memory-mapped file shared by every worker on the host.
+
+    Each bucket is one slot of a fixed open-addressed table holding a key hash
+    and its TAT, 16 bytes in all. There is no table-wide lock: a hit locks only
+    its own slot, with a byte-range lock across processes plus a striped
+    thread lock within one, so workers contend only when they charge the same
+    key at the same moment. Python has no atomic compare-and-swap on shared
+    memory, which is why a slot lock stands in for a lock-free update.
+
+    Args:
+        path (str): The backing file, normally under /dev/shm. Workers that use
+                    the same path share their limits.
+        slots (int): Table size. An existing larger file keeps its size.
+    """
+
+    blocking = False
+    _SLOT = struct.Struct("<Qq")  # Key hash, TAT in nanoseconds
+
+    def __init__(self, path=RATE_LIMIT_SHM_PATH, slots=RATE_LIMIT_SHM_SLOTS):
+        self.path = path
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        size = max(slots * self._SLOT.size, os.fstat(self._fd).st_size)
+        if os.fstat(self._fd).st_size < size:
+            os.ftruncate(self._fd, size)
+        self.slots = size // self._SLOT.size
+        self._map = mmap.mmap(self._fd, self.slots * self._SLOT.size)
+        self._reset_locks()
+        # A thread lock held at fork time stays locked in the child, so workers get fresh ones
+        ref = weakref.ref(self)
+        os.register_at_fork(after_in_child=lambda: ref() is not None and ref()._reset_locks())
+
+    def _reset_locks(self):
+        self._stripes = [threading.Lock() for _ in range(SHM_LOCK_STRIPES)]
+
+    def hit(self, key, limit, period, cost=1):
+        fingerprint = _fingerprint(key)
+        now = time.monotonic_ns()
+        slot = self._find_slot(fingerprint, now)
+        if slot is None:
+            logger.warning(f"Rate limit table {self.path} is full; allowing the request")
+            return RateLimitResult(True, limit, 0.0)
+
+        offset = slot * self._SLOT.size
+        with self._stripes[slot % SHM_LOCK_STRIPES]:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, self._SLOT.size, offset)
+            try:
+                stored, tat = self._SLOT.unpack_from(self._map, offset)
+                if stored != fingerprint:
+                    if stored and tat > now:  # Claimed by another live key since the lookup
+                        return RateLimitResult(True, limit, 0.0)
+                    tat = 0
+                new_tat, result = _gcra(tat, now, period // limit, period, cost)
+                if new_tat is not None:
+                    self._SLOT.pack_into(self._map, offset, fingerprint, new_tat)
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, self._SLOT.size, offset)
+        return result
+
+    def _find_slot(self, fingerprint, now):
+        """
+        Returns the slot holding the key, else the first empty or expired one in
+        its probe sequence, else None. Reads here are unlocked; hit() checks the
+        slot again under its lock.
+        """
+        start = fingerprint % self.slots
+        free = None
+        for probe in range(SHM_PROBES):
+            slot = (start + probe) % self.slots
+            stored, tat = self._SLOT.unpack_from(self._map, slot * self._SLOT.size)
+            if stored == fingerprint:
+                return slot
+            if free is None and (not stored or tat <= now):
+                free = slot
+        return free
+
+    def reset(self):
+        self._map[:] = bytes(len(self._map))
+
+class RedisBackend:
+    """
+    Fixed-window counters in Redis, or any server speaking its protocol
+    (Valkey, KeyDB, Dragonfly), shared by every worker on every host.
+
+    A hit is one round trip running a Lua script: SET NX PX starts the window,
+    INCRBY charges it and PTTL reports when it ends. A rejected hit is refunded
+    in the same script, so an oversized batch does not use up the window, and
+    the refund can never recreate an expired counter without a TTL.
+
+    Args:
+        client: A redis-py compatible client. Tests pass a local stand-in.
+        url (str): Used to create a redis.Redis client when none is given.
+    """
+
+    blocking = True
+
+    def __init__(self, client=None, url=RATE_LIMIT_REDIS_URL):
+        if client is None:
+            import redis
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self._hit_script = client.register_script(REDIS_HIT_SCRIPT)
+
+    def hit(self, key, limit, period, cost=1):
+        redis_key = REDIS_KEY_PREFIX + key
+        window_ms = max(1, period // 1000000)
+        allowed, count, ttl_ms = self._hit_script(keys=[redis_key], args=[limit, window_ms, cost])
+        if not allowed:
+            return RateLimitResult(False, max(0, limit - count + cost), max(ttl_ms, 0) / 1000)
+        return RateLimitResult(True, limit - count, 0.0)
+
+    def reset(self):
+        for redis_key in self.client.scan_iter(match=REDIS_KEY_PREFIX + "*"):
+            self.client.delete(redis_key)
+
+def parse_quotas(value):
+    """
+    Parses API_KEY_QUOTAS, "key=limit" pairs separated by semicolons.
+
+    Returns:
+        dict: API key -> limits.RateLimitItem.
+
+    Raises:
+        ValueError: If a limit cannot be parsed.
+    """
+    quotas = {}
+    for entry in value.split(";"):
+        if entry.strip():
+            api_key, _, limit = entry.partition("=")
+            quotas[api_key.strip()] = parse(limit.strip())
+    return quotas
+
+def _api_key_bucket(api_key):
+    # API keys are secrets, so only their hash is stored in the backend
+    return hashlib.blake2b(api_key.encode("utf-8"), digest_size=16).hexdigest()
+
+class RateLimiter:
+    """
+    Charges requests against token buckets kept by a pluggable backend.
+
+    Clients presenting an API key listed in the quotas share one bucket per
+    key across all endpoints, with that key's limit. Other clients get one
+    bucket per endpoint scope and address, with the endpoint's limit. A
+    backend error lets the request through rather than failing it.
+
+    Args:
+        backend: A MemoryBackend, SharedMemoryBackend or RedisBackend.
+        quotas (dict): API key -> limits.RateLimitItem.
+        enabled (bool): When False every hit is allowed without touching the backend.
+    """
+
+    def __init__(self, backend, quotas=None, enabled=True):
+        self.backend = backend
+        self.quotas = quotas or {}
+        self.enabled = enabled
+
+    def hit(self, scope, client, limit, cost=1, api_key=None):
+        """
+        Charges cost tokens for one request.
+
+        Args:
+            scope (str): The endpoint's bucket name, e.g. "analyze".
+            client (str): The client address.
+            limit (limits.RateLimitItem): The endpoint's limit.
+            cost (int): Tokens to take; batch calls pass their item count.
+            api_key (str): The client's API key, if it sent one.
+
+        Returns:
+            RateLimitResult: allowed, remaining tokens and retry_after in seconds.
+        """
+        if not self.enabled:
+            return RateLimitResult(True, limit.amount, 0.0)
+
+        quota = self.quotas.get(api_key) if api_key else None
+        if quota is not None:
+            limit = quota
+            scope, client = "key", _api_key_bucket(api_key)
+        amount, period = limit.amount, limit.get_expiry()
+        try:
+            # The limit is part of the key, so changing it starts fresh buckets
+            return self.backend.hit(f"{scope}:{client}:{amount}/{period}", amount, period * 1000000000, cost)
+        except Exception as e:
+            logger.error(f"Rate limit backend failed, allowing the request: {e!r}")
+            return RateLimitResult(True, limit.amount, 0.0)
+
+def create_backend(backend=RATE_LIMIT_BACKEND):
+    """
+    Creates a rate limit backend.
+
+    Args:
+        backend (str): "memory" for per-process buckets, "shm" for buckets shared
+                       by the workers on one host, or "redis" for buckets shared
+                       by every host.
+
+    Returns:
+        MemoryBackend, SharedMemoryBackend or RedisBackend.
+
+    Raises:
+        ValueError: If the backend is unknown.
+
+    Environment Variables:
+        RATE_LIMIT_BACKEND (str): Defaults to "memory".
+        RATE_LIMIT_SHM_PATH (str): Defaults to "/dev/shm/sentiment-rate-limit".
+        RATE_LIMIT_SHM_SLOTS (int): Defaults to 65536.
+        RATE_LIMIT_REDIS_URL (str): Defaults to "redis://localhost:6379/0".
+    """
+    if backend == "memory":
+        return MemoryBackend()
+    if backend == "shm":
+        return SharedMemoryBackend()
+    if backend == "redis":
+        return RedisBackend()
+    raise ValueError(f"Unsupported rate limit backend: {backend}. Choose one of {', '.join(BACKENDS)}")
+
+_rate_limiter = None
+_rate_limiter_lock = threading.Lock()
+
+def get_rate_limiter():
+    """
+    Returns the process-wide rate limiter, creating its backend on first use.
+    """
+    global _rate_limiter
+    if _rate_limiter is None:
+        with _rate_limiter_lock:
+            if _rate_limiter is None:
+                _rate_limiter = RateLimiter(create_backend(), parse_quotas(API_KEY_QUOTAS))
+    return _rate_limiter
@@ -0,0 +1,138 @@
+import asyncio
+import concurrent.futures
+import logging
+import threading
+from decouple import config
+
+logger = logging.getLogger(__name__)
+
+# Constants
+SINGLE_FLIGHT_ENABLED = config("SINGLE_FLIGHT_ENABLED", default=True, cast=bool)
+
+class SingleFlight:
+    """
+    Deduplicates concurrent computations of the same key.
+
+    The first caller for a key becomes its leader and computes the value;
+    callers arriving while it runs wait for the leader's outcome instead of
+    repeating the work, and all of them receive the same result or exception.
+    Flights are tracked with concurrent.futures.Future objects, so callers
+    may run on different threads and event loops, as Flask requests do.
+
+    Each caller keeps its own timeout: a waiter that gives up leaves the
+    flight running for the others. If the leader itself is cancelled, its
+    flight is cancelled too and the waiters start a new one.
+
+    Results are shared, not copied, so callers must not mutate them.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}  # key -> concurrent.futures.Future
+        self.leaders = 0
+        self.followers = 0
+
+    def claim(self, keys):
+        """
+        Registers flights for the keys nobody is computing yet.
+
+        Args:
+            keys (iterable): The keys the caller needs.
+
+        Returns:
+            tuple: (owned, joined) dicts of key -> Future. The caller must settle every
+                   owned future with resolve() or abandon(); joined ones belong to other callers.
+        """
+        owned, joined = {}, {}
+        with self._lock:
+            for key in keys:
+                future = self._flights.get(key)
+                if future is None:
+                    future = self._flights[key] = concurrent.futures.Future()
+                    owned[key] = future
+                else:
+                    joined[key] = future
+            self.leaders += len(owned)
+            self.followers += len(joined)
+        return owned, joined
+
+    def resolve(self, key, future, result=None, exception=None):
+        """
+        Settles an owned flight with its result, or an exception, and retires it.
+        """
+        with self._lock:
+            if self._flights.get(key) is future:
+                del self._flights[key]
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
+
+    def abandon(self, key, future):
+        """
+        Retires an owned flight without a result, so its waiters compute the value themselves.
+        """
+        with self._lock:
+            if self._flights.get(key) is future:
+                del self._flights[key]
+        future.cancel()
+
+    async def wait(self, future):
+        """
+        Awaits another caller's flight.
+
+        Returns:
+            The flight's result.
+
+        Raises:
+            The flight's exception, or concurrent.futures.CancelledError if its
+            leader abandoned it. Cancelling the waiter does not cancel the flight.
+        """
+        try:
+            return await asyncio.shield(asyncio.wrap_future(future))
+        except asyncio.CancelledError:
+            if future.cancelled():
+                raise concurrent.futures.CancelledError()
+            raise
+
+    async def run(self, key, function):
+        """
+        Returns the value of function() for a key, computing it once for all concurrent callers.
+
+        Args:
+            key (str): Identifies the computation.
+            function (callable): Returns an awaitable computing the value.
+        """
+        while True:
+            owned, joined = self.claim([key])
+            if owned:
+                future = owned[key]
+                try:
+                    result = await function()
+                except asyncio.CancelledError:
+                    self.abandon(key, future)
+                    raise
+                except BaseException as e:
+                    self.resolve(key, future, exception=e)
+                    raise
+                self.resolve(key, future, result)
+                return result
+            try:
+                return await self.wait(joined[key])
+            except concurrent.futures.CancelledError:
+                logger.debug("Coalesced computation was abandoned; retrying")
+
+    def stats(self):
+        with self._lock:
+            return {"in_flight": len(self._flights), "leaders": self.leaders, "followers": self.followers}
+
+_single_flight = SingleFlight() if SINGLE_FLIGHT_ENABLED else None
+
+def get_single_flight():
+    """
+    Returns the process-wide SingleFlight, or None if coalescing is disabled.
+
+    Environment Variables:
+        SINGLE_FLIGHT_ENABLED (bool): Coalesce concurrent analyses of the same text. Defaults to True.
+    """
+    return _single_flight
@@ -0,0 +1,298 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from decouple import config
+
+logger = logging.getLogger(__name__)
+
+# Constants
+RESULT_CACHE_ENABLED = config("RESULT_CACHE_ENABLED", default=True, cast=bool)
+RESULT_CACHE_MAX_ENTRIES = config("RESULT_CACHE_MAX_ENTRIES", default=10000, cast=int)
+RESULT_CACHE_MAX_BYTES = config("RESULT_CACHE_MAX_BYTES", default=64 * 1024 * 1024, cast=int)
+RESULT_CACHE_TTL = config("RESULT_CACHE_TTL", default=3600, cast=float)  # Seconds, 0 disables expiry
+RESULT_CACHE_SHARED_PATH = config("RESULT_CACHE_SHARED_PATH", default="")  # SQLite file shared by workers
+RESULT_CACHE_PURGE_INTERVAL = config("RESULT_CACHE_PURGE_INTERVAL", default=100, cast=int)  # Shared writes between purges
+
+def model_identity(transformers_pipeline):
+    """
+    Returns a stable identifier for the model behind a pipeline, so that results
+    produced by different models never share a cache entry.
+
+    Args:
+        transformers_pipeline (Pipeline): A Hugging Face Transformers pipeline (or a wrapper around one).
+
+    Returns:
+        str: The model name or path when available, otherwise a per-object identifier.
+    """
+    model = getattr(transformers_pipeline, "model", None)
+    name = getattr(model, "name_or_path", None)
+    if isinstance(name, str) and name:
+        return name
+    return f"{type(transformers_pipeline).__name__}:{id(transformers_pipeline)}"
+
+def make_cache_key(sanitized_text, model_id):
+    """
+    Builds the cache key for a sanitized text analyzed by a given model.
+
+    Args:
+        sanitized_text (str): The text as returned by sanitize_input.
+        model_id (str): The identifier returned by model_identity.
+
+    Returns:
+        str: A hex SHA-256 digest of the model identifier and text.
+    """
+    digest = hashlib.sha256()
+    digest.update(model_id.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(sanitized_text.encode("utf-8"))
+    return digest.hexdigest()
+
+class SQLiteCacheBackend:
+    """
+    A cache backend stored in a local SQLite file, so several worker processes
+    on the same host can reuse each other's results.
+
+    Every purge_interval writes, the backend deletes expired rows and then evicts
+    the rows closest to expiry until the table fits max_entries and max_bytes, so
+    the shared file stays bounded like the in-process cache.
+    """
+
+    def __init__(self, path, max_entries=RESULT_CACHE_MAX_ENTRIES, max_bytes=RESULT_CACHE_MAX_BYTES,
+                 purge_interval=RESULT_CACHE_PURGE_INTERVAL, clock=time.time):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.purge_interval = max(1, purge_interval)
+        self._clock = clock
+        self._local = threading.local()
+        self._writes = 0
+        self._writes_lock = threading.Lock()
+        self.evictions = 0
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key, now):
+        row = self._connection().execute(
+            "SELECT value, expires_at FROM results WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        value, expires_at = row
+        if expires_at and expires_at <= now:
+            return None
+        return value, expires_at
+
+    def set(self, key, value, expires_at):
+        self._connection().execute(
+            "INSERT OR REPLACE INTO results (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, value, expires_at)
+        )
+        with self._writes_lock:
+            self._writes += 1
+            due = self._writes % self.purge_interval == 0
+        if due:
+            self.purge_expired(self._clock())
+            self.enforce_limits()
+
+    def purge_expired(self, now):
+        self._connection().execute(
+            "DELETE FROM results WHERE expires_at > 0 AND expires_at <= ?", (now,)
+        )
+
+    def enforce_limits(self):
+        """
+        Evicts the rows closest to expiry, oldest writes first among equals, until the
+        table holds at most max_entries rows and max_bytes of serialized results.
+
+        Returns:
+            int: The number of rows evicted.
+        """
+        conn = self._connection()
+        count, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(value)), 0) FROM results").fetchone()
+        if count <= self.max_entries and size <= self.max_bytes:
+            return 0
+        victims = []
+        for key, value_size in conn.execute("SELECT key, LENGTH(value) FROM results ORDER BY expires_at, rowid"):
+            if count <= self.max_entries and size <= self.max_bytes:
+                break
+            victims.append((key,))
+            count -= 1
+            size -= value_size
+        conn.executemany("DELETE FROM results WHERE key = ?", victims)
+        self.evictions += len(victims)
+        return len(victims)
+
+    def clear(self):
+        self._connection().execute("DELETE FROM results")
+
+class ResultCache:
+    """
+    A thread-safe LRU cache for analysis results, bounded by entry count and
+    serialized size, with per-entry TTL and an optional shared backend.
+
+    Results are stored as JSON strings, so callers always receive a fresh copy
+    and the byte bound reflects the real memory held by the cache.
+    """
+
+    def __init__(self, max_entries=RESULT_CACHE_MAX_ENTRIES, max_bytes=RESULT_CACHE_MAX_BYTES,
+                 ttl=RESULT_CACHE_TTL, backend=None, clock=time.time):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.backend = backend
+        self._clock = clock
+        self._entries = OrderedDict()  # key -> (value, expires_at)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.shared_hits = 0
+
+    def get(self, key):
+        """
+        Returns the cached result for a key, or None on a miss.
+        """
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at and expires_at <= now:
+                    self._remove(key)
+                    self.expirations += 1
+                else:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return json.loads(value)
+
+        if self.backend is not None:
+            try:
+                shared = self.backend.get(key, now)
+            except sqlite3.Error as e:
+                logger.error(f"Shared result cache lookup failed: {e}")
+                shared = None
+            if shared is not None:
+                value, expires_at = shared
+                with self._lock:
+                    self._store(key, value, expires_at)
+                    self.hits += 1
+                    self.shared_hits += 1
+                return json.loads(value)
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key, result):
+        """
+        Stores a result, evicting least recently used entries as needed.
+        """
+        try:
+            value = json.dumps(result, separators=(",", ":"))
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Result is not serializable, skipping cache: {e}")
+            return
+        expires_at = self._clock() + self.ttl if self.ttl > 0 else 0
+        with self._lock:
+            self._store(key, value, expires_at)
+
+        if self.backend is not None:
+            try:
+                self.backend.set(key, value, expires_at)
+            except sqlite3.Error as e:
+                logger.error(f"Shared result cache write failed: {e}")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        if self.backend is not None:
+            self.backend.clear()
+
+    def stats(self):
+        """
+        Returns cache counters for monitoring.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "shared_hits": self.shared_hits,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _store(self, key, value, expires_at):
+        size = len(value)
+        if size > self.max_bytes:
+            return  # Never let a single oversized result flush the whole cache
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (value, expires_at)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _remove(self, key):
+        value, _ = self._entries.pop(key)
+        self._bytes -= len(value)
+
+_result_cache = None
+_result_cache_lock = threading.Lock()
+
+def get_result_cache():
+    """
+    Returns the process-wide result cache, creating it from configuration on first use.
+
+    Returns:
+        ResultCache: The shared cache, or None if caching is disabled.
+
+    Environment Variables:
+        RESULT_CACHE_ENABLED (bool): Enables the result cache. Defaults to True.
+        RESULT_CACHE_MAX_ENTRIES (int): Maximum number of cached results. Defaults to 10000.
+        RESULT_CACHE_MAX_BYTES (int): Maximum serialized size of cached results. Defaults to 64 MiB.
+        RESULT_CACHE_TTL (float): Seconds before a cached result expires, 0 to disable. Defaults to 3600.
+        RESULT_CACHE_SHARED_PATH (str): Optional SQLite file shared between worker processes.
+        RESULT_CACHE_PURGE_INTERVAL (int): Shared cache writes between expiry and size purges. Defaults to 100.
+    """
+    global _result_cache
+    if not RESULT_CACHE_ENABLED:
+        return None
+    if _result_cache is None:
+        with _result_cache_lock:
+            if _result_cache is None:
+                backend = None
+                if RESULT_CACHE_SHARED_PATH:
+                    try:
+                        backend = SQLiteCacheBackend(RESULT_CACHE_SHARED_PATH)
+                    except sqlite3.Error as e:
+                        logger.error(f"Failed to open shared result cache: {e}")
+                _result_cache = ResultCache(backend=backend)
+    return _result_cache
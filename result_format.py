@@ -0,0 +1,206 @@
+import json
+import logging
+from enum import Enum
+import numpy as np
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+logger = logging.getLogger(__name__)
+
+# Constants
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+MSGPACK_ALIASES = ("application/msgpack", "application/x-msgpack", "application/vnd.msgpack")
+
+class Label(str, Enum):
+    """
+    Sentiment labels. Members are strings, so they compare equal to and
+    serialize like the plain labels the analyzers return.
+    """
+
+    POSITIVE = "Positive"
+    NEGATIVE = "Negative"
+    NEUTRAL = "Neutral"
+    ERROR = "Error"
+
+_LABELS = {label.value: label for label in Label}
+
+def to_label(value):
+    """
+    Returns the Label for a label string, or the string itself for labels a model defines beyond these.
+    """
+    return _LABELS.get(value, value)
+
+def to_float32(value):
+    """
+    Returns a score as a float32, the precision the model computes it in.
+    encode() writes it with at most 9 significant digits instead of 17.
+    """
+    return np.float32(value)
+
+class SentimentResult:
+    """
+    One analysis result in a fixed, slotted layout.
+
+    Labels are Label members and confidences are float32, so the encoded
+    response carries no more digits than the model produced.
+
+    Attributes:
+        text (str): The sanitized text.
+        textblob (Label): The TextBlob label.
+        nltk (Label): The VADER label.
+        label (Label): The transformer label, or None if cascade mode skipped the transformer.
+        confidence (numpy.float32): The transformer confidence.
+        chunks (list): Per-chunk transformer scores, if requested.
+        tiers (list): The analyzers that ran, in cascade and lexicon mode.
+        degraded (bool): True if the transformer was skipped because it was saturated.
+    """
+
+    __slots__ = ("text", "textblob", "nltk", "label", "confidence", "chunks", "tiers", "degraded")
+
+    def __init__(self, text, textblob, nltk, label=None, confidence=None, chunks=None, tiers=None, degraded=False):
+        self.text = text
+        self.textblob = textblob
+        self.nltk = nltk
+        self.label = label
+        self.confidence = confidence
+        self.chunks = chunks
+        self.tiers = tiers
+        self.degraded = degraded
+
+    @classmethod
+    def from_dict(cls, result):
+        """
+        Builds a SentimentResult from an analyze_sentiment_combined result dict.
+        """
+        transformers_result = result["transformers"]
+        label = confidence = chunks = None
+        if transformers_result is not None:
+            label = to_label(transformers_result["label"])
+            confidence = to_float32(transformers_result["confidence"])
+            chunks = transformers_result.get("chunks")
+            if chunks is not None:
+                chunks = [
+                    {**chunk, "label": to_label(chunk["label"]), "confidence": to_float32(chunk["confidence"])}
+                    for chunk in chunks
+                ]
+        return cls(result["text"], to_label(result["textblob"]), to_label(result["nltk"]),
+                   label, confidence, chunks, result.get("tiers"), result.get("degraded", False))
+
+    def to_dict(self, include_text=True):
+        """
+        Returns the result in the API's response shape.
+
+        Args:
+            include_text (bool): Echo the sanitized text. Clients that kept their
+                                 input can leave it out to halve the response.
+        """
+        result = {"text": self.text} if include_text else {}
+        result["textblob"] = self.textblob
+        result["nltk"] = self.nltk
+        if self.label is None:
+            result["transformers"] = None
+        else:
+            result["transformers"] = {"label": self.label, "confidence": self.confidence}
+            if self.chunks is not None:
+                result["transformers"]["chunks"] = self.chunks
+        if self.tiers is not None:
+            result["tiers"] = self.tiers
+        if self.degraded:
+            result["degraded"] = True
+        return result
+
+def compact(result, include_text=True):
+    """
+    Normalizes a result dict for the response; error results pass through unchanged.
+
+    This builds the response dict directly rather than going through
+    SentimentResult, which costs more per result than the encoder saves.
+
+    Args:
+        result (dict): An analyze_sentiment_combined result.
+        include_text (bool): Echo the sanitized text. Clients that kept their
+                             input can leave it out to halve the response.
+    """
+    if "transformers" not in result:
+        return result
+    compacted = {"text": result["text"]} if include_text else {}
+    compacted["textblob"] = result["textblob"]
+    compacted["nltk"] = result["nltk"]
+    transformers_result = result["transformers"]
+    if transformers_result is not None:
+        chunks = transformers_result.get("chunks")
+        transformers_result = {
+            "label": transformers_result["label"],
+            "confidence": to_float32(transformers_result["confidence"])
+        }
+        if chunks is not None:
+            transformers_result["chunks"] = [
+                {**chunk, "confidence": to_float32(chunk["confidence"])} for chunk in chunks
+            ]
+    compacted["transformers"] = transformers_result
+    tiers = result.get("tiers")
+    if tiers is not None:
+        compacted["tiers"] = tiers
+    if result.get("degraded", False):
+        compacted["degraded"] = True
+    return compacted
+
+def negotiate(accept):
+    """
+    Picks the response media type from an Accept header.
+
+    Returns:
+        str: MSGPACK if the client accepts MessagePack and prefers it to JSON
+             (and msgpack is installed), otherwise JSON.
+    """
+    if not accept or msgpack is None:
+        return JSON
+    preferences = {}
+    for position, item in enumerate(accept.split(",")):
+        media_type, *params = [part.strip() for part in item.split(";")]
+        quality = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        # Higher quality wins; between equals, the type listed first
+        preferences[media_type.lower()] = (quality, -position)
+    msgpack_preference = max((preferences.get(alias, (0.0, 0)) for alias in MSGPACK_ALIASES))
+    json_preference = max(preferences.get(JSON, (0.0, 0)), preferences.get("*/*", (0.0, 0)),
+                          preferences.get("application/*", (0.0, 0)))
+    if msgpack_preference[0] > 0 and msgpack_preference > json_preference:
+        return MSGPACK
+    return JSON
+
+def encode(payload, media_type=JSON):
+    """
+    Serializes a response payload.
+
+    JSON is written by orjson when it is installed, otherwise by the standard
+    library without whitespace. MessagePack writes floats as float32.
+
+    Returns:
+        bytes: The encoded payload.
+    """
+    if media_type == MSGPACK:
+        return msgpack.packb(payload, use_single_float=True, default=_to_builtin)
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False, default=_to_builtin).encode("utf-8")
+
+def _to_builtin(value):
+    if isinstance(value, np.floating):
+        # The shortest decimal form of the float32, so 0.95 isn't widened to 0.949999988079071
+        return float(str(value))
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
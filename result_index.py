@@ -0,0 +1,362 @@
+import os
+import sys
+import mmap
+import json
+import struct
+import asyncio
+import hashlib
+import argparse
+import logging
+import threading
+import time
+from decouple import config
+from utils import sanitize_input
+
+logger = logging.getLogger(__name__)
+
+# Constants
+RESULT_INDEX_PATH = config("RESULT_INDEX_PATH", default="")  # Built by `python result_index.py build`
+RESULT_INDEX_RELOAD_INTERVAL = config("RESULT_INDEX_RELOAD_INTERVAL", default=30.0, cast=float)  # Seconds
+RESULT_INDEX_BUILD_BATCH = config("RESULT_INDEX_BUILD_BATCH", default=256, cast=int)
+
+MAGIC = b"SENTIDX1"
+_PREAMBLE = struct.Struct("<8sI")  # Magic, header length
+# Text hash, TextBlob/VADER/transformer label numbers, padding, transformer confidence
+_RECORD = struct.Struct("<16sBBBxf")
+_EMPTY_KEY = bytes(16)
+
+def index_key(sanitized_text, model_id):
+    """
+    Returns the 16-byte index key of a sanitized text scored by a model.
+    It is the leading half of the digest behind result_cache.make_cache_key.
+    """
+    digest = hashlib.sha256()
+    digest.update(model_id.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(sanitized_text.encode("utf-8"))
+    return digest.digest()[:16]
+
+class _Table:
+    """
+    One mapped index file. A reload builds a new table and swaps it in with a
+    single assignment, so a lookup never mixes the records of one file with
+    the header of another.
+    """
+
+    __slots__ = ("model_id", "labels", "count", "slots", "offset", "data", "signature")
+
+    def __init__(self, model_id, labels, count, slots, offset, data, signature):
+        self.model_id = model_id
+        self.labels = labels
+        self.count = count
+        self.slots = slots
+        self.offset = offset
+        self.data = data
+        self.signature = signature
+
+class ResultIndex:
+    """
+    A read-only, memory-mapped table of precomputed results.
+
+    The file is a small JSON header (model, label names, table size) followed
+    by an open-addressed hash table of 24-byte records: the index key, three
+    label numbers and a float32 confidence. A lookup hashes the text, probes
+    the table in place and unpacks one record; nothing is parsed or loaded
+    up front, and the pages are shared by every worker that maps the file.
+
+    When the file is replaced by a rebuild, the index maps the new one at the
+    next lookup after RESULT_INDEX_RELOAD_INTERVAL seconds.
+
+    Raises:
+        ValueError: If the file is not a result index.
+    """
+
+    def __init__(self, path, reload_interval=RESULT_INDEX_RELOAD_INTERVAL):
+        self.path = path
+        self.reload_interval = reload_interval
+        self._lock = threading.Lock()
+        self._checked_at = time.monotonic()
+        self._table = self._load()
+
+    @property
+    def model_id(self):
+        return self._table.model_id
+
+    @property
+    def labels(self):
+        return self._table.labels
+
+    @property
+    def count(self):
+        return self._table.count
+
+    def _load(self):
+        """
+        Maps the index file and returns it as a _Table.
+        """
+        with open(self.path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, header_size = _PREAMBLE.unpack_from(data, 0)
+        if magic != MAGIC:
+            data.close()
+            raise ValueError(f"{self.path} is not a result index")
+        header = json.loads(data[_PREAMBLE.size:_PREAMBLE.size + header_size])
+        return _Table(header["model_id"], header["labels"], header["count"], header["slots"],
+                      _PREAMBLE.size + header_size, data, (stat.st_ino, stat.st_mtime_ns))
+
+    def _maybe_reload(self):
+        now = time.monotonic()
+        if now - self._checked_at < self.reload_interval:
+            return
+        with self._lock:
+            self._checked_at = now
+            try:
+                stat = os.stat(self.path)
+                if (stat.st_ino, stat.st_mtime_ns) != self._table.signature:
+                    # Lookups in flight keep the old table; its mapping closes when they drop it
+                    self._table = self._load()
+                    logger.info(f"Reloaded result index {self.path} ({self.count} results)")
+            except (OSError, ValueError) as e:
+                logger.error(f"Failed to reload result index {self.path}: {e}")
+
+    @staticmethod
+    def _find(table, key):
+        """
+        Returns the offset of the record in table holding key, or None.
+        """
+        data, offset, mask = table.data, table.offset, table.slots - 1
+        slot = int.from_bytes(key[:8], "little") & mask
+        while True:
+            position = offset + slot * _RECORD.size
+            stored = data[position:position + 16]
+            if stored == key:
+                return position
+            if stored == _EMPTY_KEY:
+                return None
+            slot = (slot + 1) & mask
+
+    def get(self, sanitized_text, model_id):
+        """
+        Returns the precomputed result for a sanitized text, or None.
+
+        Args:
+            sanitized_text (str): The text as returned by sanitize_input.
+            model_id (str): The identifier returned by result_cache.model_identity.
+                            An index built with another model never matches.
+
+        Returns:
+            dict: A result shaped like analyze_sentiment_combined's, or None.
+        """
+        if self.reload_interval:
+            self._maybe_reload()
+        table = self._table  # One snapshot for the whole lookup
+        if model_id != table.model_id:
+            return None
+        position = self._find(table, index_key(sanitized_text, model_id))
+        if position is None:
+            return None
+        _, textblob, nltk, label, confidence = _RECORD.unpack_from(table.data, position)
+        labels = table.labels
+        return {
+            "text": sanitized_text,
+            "textblob": labels[textblob],
+            "nltk": labels[nltk],
+            "transformers": {"label": labels[label], "confidence": round(confidence, 6)}
+        }
+
+    def __len__(self):
+        return self.count
+
+    def records(self):
+        """
+        Yields (key, textblob label, nltk label, transformer label, confidence) for every stored result.
+        """
+        table = self._table
+        for slot in range(table.slots):
+            key, textblob, nltk, label, confidence = _RECORD.unpack_from(
+                table.data, table.offset + slot * _RECORD.size
+            )
+            if key != _EMPTY_KEY:
+                yield key, table.labels[textblob], table.labels[nltk], table.labels[label], confidence
+
+def write_index(path, model_id, records):
+    """
+    Writes a result index, replacing any existing file atomically.
+
+    The table is sized to a power of two at most half full, so probes stay short.
+    Readers that have the old file mapped keep using it until they reload.
+
+    Args:
+        path (str): The index file.
+        model_id (str): The model the results were produced with.
+        records (iterable): (key, textblob label, nltk label, transformer label, confidence) tuples.
+
+    Returns:
+        int: The number of results written.
+    """
+    records = list(records)
+    labels = sorted({label for record in records for label in record[1:4]})
+    if len(labels) > 256:
+        raise ValueError("A result index holds at most 256 distinct labels")
+    numbers = {label: number for number, label in enumerate(labels)}
+    slots = 8
+    while slots < len(records) * 2:
+        slots *= 2
+
+    table = bytearray(slots * _RECORD.size)
+    mask = slots - 1
+    for key, textblob, nltk, label, confidence in records:
+        slot = int.from_bytes(key[:8], "little") & mask
+        while table[slot * _RECORD.size:slot * _RECORD.size + 16] != _EMPTY_KEY:
+            slot = (slot + 1) & mask
+        _RECORD.pack_into(table, slot * _RECORD.size, key, numbers[textblob], numbers[nltk], numbers[label], confidence)
+
+    header = json.dumps({"model_id": model_id, "labels": labels, "count": len(records), "slots": slots}).encode("utf-8")
+    header += b" " * (-(_PREAMBLE.size + len(header)) % 8)  # Keep records 8-byte aligned
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, "wb") as f:
+        f.write(_PREAMBLE.pack(MAGIC, len(header)))
+        f.write(header)
+        f.write(table)
+    os.replace(temporary_path, path)
+    return len(records)
+
+def _indexable(result):
+    transformers_result = result.get("transformers")
+    return (
+        "error" not in result and transformers_result is not None
+        and result["textblob"] != "Error" and result["nltk"] != "Error"
+        and not (transformers_result["label"] == "Neutral" and transformers_result["confidence"] == 0.0)
+    )
+
+async def _score(texts, transformers_pipeline):
+    from sentiment_analysis import analyze_sentiment_combined
+
+    return await asyncio.gather(*(
+        analyze_sentiment_combined(text, transformers_pipeline, mode="full") for text in texts
+    ))
+
+def build(path, texts, transformers_pipeline, batch_size=RESULT_INDEX_BUILD_BATCH):
+    """
+    Scores a corpus with analyze_sentiment_combined and writes the results to an index.
+
+    An existing index built with the same model is extended: its results are
+    kept and only texts it does not hold yet are scored. Texts that fail
+    analysis or are in an unsupported language are left out, so they keep
+    going through the analyzers online.
+
+    Args:
+        path (str): The index file to create or extend.
+        texts (iterable): The corpus texts.
+        transformers_pipeline (Pipeline): The pipeline the API serves with.
+        batch_size (int): Texts scored concurrently.
+
+    Returns:
+        dict: Counts of texts "read", results "kept" from the existing index,
+              texts "scored", and results "written".
+    """
+    from result_cache import model_identity
+
+    model_id = model_identity(transformers_pipeline)
+    records = {}
+    if os.path.exists(path):
+        existing = ResultIndex(path, reload_interval=0)
+        if existing.model_id == model_id:
+            records = {record[0]: record for record in existing.records()}
+        else:
+            logger.warning(f"{path} was built with {existing.model_id}; rebuilding it for {model_id}")
+    kept = len(records)
+
+    read = 0
+    pending = {}
+    for text in texts:
+        read += 1
+        sanitized_text = sanitize_input(text) if isinstance(text, str) else None
+        if not sanitized_text:
+            continue
+        key = index_key(sanitized_text, model_id)
+        if key not in records:
+            pending[key] = sanitized_text
+
+    pending_texts = list(pending.values())
+    for offset in range(0, len(pending_texts), batch_size):
+        batch = pending_texts[offset:offset + batch_size]
+        for text, result in zip(batch, asyncio.run(_score(batch, transformers_pipeline))):
+            if _indexable(result):
+                key = index_key(text, model_id)
+                records[key] = (key, result["textblob"], result["nltk"],
+                                result["transformers"]["label"], result["transformers"]["confidence"])
+        logger.info(f"Scored {min(offset + batch_size, len(pending_texts))}/{len(pending_texts)} texts")
+
+    written = write_index(path, model_id, records.values())
+    return {"read": read, "kept": kept, "scored": len(pending_texts), "written": written}
+
+_result_index = None
+_result_index_lock = threading.Lock()
+_result_index_loaded = False
+
+def get_result_index():
+    """
+    Returns the process-wide result index, mapping it on first use.
+
+    Returns:
+        ResultIndex: The index, or None if RESULT_INDEX_PATH is unset or cannot be read.
+
+    Environment Variables:
+        RESULT_INDEX_PATH (str): The index file. Defaults to "", which disables lookups.
+        RESULT_INDEX_RELOAD_INTERVAL (float): Seconds between checks for a rebuilt file. Defaults to 30.
+    """
+    global _result_index, _result_index_loaded
+    if not _result_index_loaded:
+        with _result_index_lock:
+            if not _result_index_loaded:
+                if RESULT_INDEX_PATH:
+                    try:
+                        _result_index = ResultIndex(RESULT_INDEX_PATH)
+                        logger.info(f"Loaded result index {RESULT_INDEX_PATH} ({len(_result_index)} results)")
+                    except (OSError, ValueError) as e:
+                        logger.error(f"Failed to load result index: {e}")
+                _result_index_loaded = True
+    return _result_index
+
+def main(argv=None, transformers_pipeline=None):
+    """
+    Builds or extends the result index from a corpus.
+
+    Example:
+        python result_index.py build -i catalog.txt --index results.idx
+        python result_index.py build -i replies.jsonl --input-format jsonl --field body
+    """
+    # stream_processing imports sentiment_analysis, which consults this module
+    from stream_processing import read_records, InvalidRecord, INPUT_FORMATS
+
+    parser = argparse.ArgumentParser(description="Precompute sentiment results for a known corpus")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build_parser = subparsers.add_parser("build", help="Score a corpus into the index, keeping existing results")
+    build_parser.add_argument("-i", "--input", required=True, help="Corpus file, or '-' for stdin")
+    build_parser.add_argument("--input-format", choices=INPUT_FORMATS, default="text")
+    build_parser.add_argument("--field", default="text", help="JSONL field holding the text")
+    build_parser.add_argument("--column", help="CSV column name or position holding the text")
+    build_parser.add_argument("--index", default=RESULT_INDEX_PATH or "results.idx", help="Index file")
+    build_parser.add_argument("--batch-size", type=int, default=RESULT_INDEX_BUILD_BATCH)
+    args = parser.parse_args(argv)
+
+    if transformers_pipeline is None:
+        from model_registry import get_pipeline
+        transformers_pipeline = get_pipeline()
+
+    stream = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8", newline="")
+    try:
+        texts = (record for record in read_records(stream, args.input_format, args.field, args.column)
+                 if not isinstance(record, InvalidRecord))
+        report = build(args.index, texts, transformers_pipeline, args.batch_size)
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+    print(json.dumps(report))
+    return 0
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(main())
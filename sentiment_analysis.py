@@ -1,18 +1,53 @@
 import asyncio
-from textblob import TextBlob
-from nltk.sentiment import SentimentIntensityAnalyzer
-from functools import lru_cache
-from utils import sanitize_input, detect_language, MAX_INPUT_LENGTH
+import concurrent.futures
+import functools
+from utils import sanitize_input, sanitize_many, detect_language, detect_language_many, MAX_INPUT_LENGTH
+from result_cache import get_result_cache, make_cache_key, model_identity
+from result_index import get_result_index
+from request_coalescing import get_single_flight
+from inference_scheduler import InferenceScheduler, INFERENCE_MAX_BATCH_SIZE
+from analyzer_executors import get_analyzer_executor
+from vader_engine import get_vader_engine
+from textblob_engine import get_textblob_engine
+from text_chunking import needs_chunking, split_text, aggregate, PIPELINE_TRUNCATION
+from text_document import Document, get_document, text_of
+from metrics import get_metrics
+from decouple import config
 import logging
 
-@lru_cache(maxsize=100)  # Cache up to 100 results
-async def analyze_sentiment_combined(text, transformers_pipeline):
+logger = logging.getLogger(__name__)
+
+# Constants
+ANALYSIS_MODE = config("ANALYSIS_MODE", default="full")  # "full", "cascade" or "lexicon"
+CASCADE_VADER_BAND = config("CASCADE_VADER_BAND", default=0.5, cast=float)  # |compound| below this is uncertain
+CASCADE_TEXTBLOB_BAND = config("CASCADE_TEXTBLOB_BAND", default=0.1, cast=float)  # |polarity| below this is uncertain
+
+STAGE_NAMES = {"textblob": "textblob", "nltk": "vader", "transformers": "transformer"}  # Executor kind -> metrics stage
+
+async def analyze_sentiment_combined(text, transformers_pipeline, mode=None, include_chunks=False):
     """
     Analyzes sentiment using TextBlob, NLTK, and Transformers concurrently.
+    In full mode, texts held by the precomputed result index are answered from it.
+    Successful results are cached by sanitized text and model identity (see result_cache),
+    and concurrent calls for the same text share a single analysis. The lexicon analyzers
+    and the chunker read the text through one Document (see text_document), which
+    memoizes their tokenized forms, so a repeated text is not tokenized again.
+
+    In "cascade" mode TextBlob and VADER run first, and the transformer runs only
+    when they disagree or either score falls inside its uncertainty band; the
+    result then has a "tiers" list naming the analyzers that ran, and
+    "transformers" is None when the transformer was skipped.
+
+    "lexicon" mode is the degraded mode used under overload (see admission_control):
+    indexed and cached full results are still served, but otherwise only TextBlob
+    and VADER run, and the result, flagged "degraded", is not cached.
 
     Args:
         text (str): The input text to analyze.
         transformers_pipeline (Pipeline): A Hugging Face Transformers pipeline for sentiment analysis.
+        mode (str): "full", "cascade" or "lexicon". Defaults to ANALYSIS_MODE.
+        include_chunks (bool): Add the per-chunk transformer scores of long texts as
+                               result["transformers"]["chunks"]. Such results bypass the cache.
 
     Returns:
         dict: A dictionary containing the sanitized text and sentiment analysis results from TextBlob, NLTK, and Transformers.
@@ -26,27 +61,88 @@ async def analyze_sentiment_combined(text, transformers_pipeline):
 
     Raises:
         Exception: If sentiment analysis fails for all methods.
+
+    Environment Variables:
+        ANALYSIS_MODE (str): "full" runs every analyzer, "cascade" runs the transformer only when needed,
+                             "lexicon" never runs it. Defaults to "full".
+        CASCADE_VADER_BAND (float): VADER compound scores with a smaller magnitude are uncertain. Defaults to 0.5.
+        CASCADE_TEXTBLOB_BAND (float): TextBlob polarities with a smaller magnitude are uncertain. Defaults to 0.1.
     """
-    sanitized_text = sanitize_input(text)
+    mode = mode or ANALYSIS_MODE
+    metrics = get_metrics()
+    with metrics.time("sentiment_stage_seconds", stage="sanitize"):
+        sanitized_text = sanitize_input(text)
     if not sanitized_text:
         return {"error": "Invalid or empty input text"}
 
-    # Detect language
-    if not detect_language(sanitized_text):
+    # Serve texts of a known corpus from the precomputed index (see result_index)
+    index = get_result_index() if mode in ("full", "lexicon") and not include_chunks else None
+    if index is not None:
+        with metrics.time("sentiment_stage_seconds", stage="index"):
+            indexed_result = index.get(sanitized_text, model_identity(transformers_pipeline))
+        if indexed_result is not None:
+            return indexed_result
+
+    # Serve repeated texts from the result cache
+    cache = get_result_cache() if not include_chunks else None
+    cache_key = None
+    if cache is not None:
+        with metrics.time("sentiment_stage_seconds", stage="cache"):
+            cache_key = make_cache_key(sanitized_text, _cache_model_id(transformers_pipeline, mode))
+            cached_result = cache.get(cache_key)
+        if cached_result is not None:
+            return cached_result
+
+    # Concurrent requests for the same text share one analysis (see request_coalescing)
+    flights = get_single_flight()
+    if flights is None:
+        return await _analyze_uncached(sanitized_text, transformers_pipeline, mode, include_chunks, cache, cache_key)
+    flight_key = cache_key or make_cache_key(sanitized_text, _cache_model_id(transformers_pipeline, mode))
+    if include_chunks:
+        flight_key += "|chunks"
+    if mode == "lexicon":
+        flight_key += "|lexicon"  # Don't wait on a full analysis stuck behind the transformer
+    return await flights.run(flight_key, lambda: _analyze_uncached(
+        sanitized_text, transformers_pipeline, mode, include_chunks, cache, cache_key
+    ))
+
+async def _analyze_uncached(sanitized_text, transformers_pipeline, mode, include_chunks, cache, cache_key):
+    """
+    The part of analyze_sentiment_combined after the index and cache lookups:
+    language detection, the analyzers, and caching the result.
+    """
+    document = get_document(sanitized_text)
+    metrics = get_metrics()
+    with metrics.time("sentiment_stage_seconds", stage="detect_language"):
+        supported = detect_language(sanitized_text)
+    if not supported:
         return {"error": "Unsupported language. Only English, Spanish, and French are supported."}
 
+    if mode in ("cascade", "lexicon"):
+        try:
+            if mode == "cascade":
+                result = await _analyze_cascade(document, transformers_pipeline, include_chunks)
+            else:
+                result = await _analyze_lexicon(document)
+        except Exception as e:
+            logger.error(f"Sentiment analysis failed: {e}")
+            return {"error": "Sentiment analysis failed"}
+        if cache is not None and _is_cacheable(result):
+            cache.set(cache_key, result)
+        return result
+
     try:
         # Run TextBlob, NLTK, and Transformers sentiment analysis concurrently
         textblob_result, nltk_result, transformers_result = await asyncio.gather(
-            get_textblob_sentiment(sanitized_text),
-            get_nltk_sentiment(sanitized_text),
-            get_transformers_sentiment(sanitized_text, transformers_pipeline)
+            get_textblob_sentiment(document),
+            get_nltk_sentiment(document),
+            get_transformers_sentiment(document, transformers_pipeline, include_chunks)
         )
     except Exception as e:
         logger.error(f"Sentiment analysis failed: {e}")
         return {"error": "Sentiment analysis failed"}
 
-    return {
+    result = {
         "text": sanitized_text,
         "textblob": textblob_result,
         "nltk": nltk_result,
@@ -55,13 +151,280 @@ async def analyze_sentiment_combined(text, transformers_pipeline):
             "confidence": transformers_result[1]
         }
     }
+    if include_chunks:
+        result["transformers"]["chunks"] = transformers_result[2]
+
+    # Don't cache degraded results, so a transient analyzer failure isn't replayed
+    if cache is not None and _is_cacheable(result):
+        cache.set(cache_key, result)
+
+    return result
+
+async def analyze_sentiment_batch(texts, transformers_pipeline, mode=None):
+    """
+    Analyzes sentiment for many texts at once.
+    Texts are sanitized and deduplicated, indexed and cached results are reused, texts
+    other calls are already analyzing are awaited, and the remaining texts go through
+    the transformer in a single batched call.
+
+    Args:
+        texts (list): The input texts to analyze.
+        transformers_pipeline (Pipeline): A Hugging Face Transformers pipeline for sentiment analysis.
+        mode (str): "full", "cascade" or "lexicon", as in analyze_sentiment_combined. Defaults to ANALYSIS_MODE.
+
+    Returns:
+        list: One result per input text, in input order. Each item has the same shape as
+              the result of analyze_sentiment_combined, or {"error": ...} for that item only.
+    """
+    mode = mode or ANALYSIS_MODE
+    results = [None] * len(texts)
+    pending = {}  # sanitized text -> indices of the inputs that share it
+    for i, sanitized_text in enumerate(sanitize_many(texts)):
+        if not sanitized_text:
+            results[i] = {"error": "Invalid or empty input text"}
+        else:
+            pending.setdefault(sanitized_text, []).append(i)
+
+    cache = get_result_cache()
+    # Flights share the cache keys, so degraded lexicon batches must not join full analyses
+    flights = get_single_flight() if mode != "lexicon" else None
+    model_id = _cache_model_id(transformers_pipeline, mode) if cache is not None or flights is not None else None
+    index = get_result_index() if mode in ("full", "lexicon") else None
+    index_model_id = model_identity(transformers_pipeline) if index is not None else None
+    unique_results = {}
+    keys = {}  # sanitized text -> cache and flight key
+    uncached = []
+    for sanitized_text in pending:
+        if index is not None:
+            indexed_result = index.get(sanitized_text, index_model_id)
+            if indexed_result is not None:
+                unique_results[sanitized_text] = indexed_result
+                continue
+        if model_id is not None:
+            keys[sanitized_text] = make_cache_key(sanitized_text, model_id)
+        if cache is not None:
+            cached_result = cache.get(keys[sanitized_text])
+            if cached_result is not None:
+                unique_results[sanitized_text] = cached_result
+                continue
+        uncached.append(sanitized_text)
+
+    if flights is None:
+        unique_results.update(await _analyze_many_uncached(uncached, transformers_pipeline, mode, cache, keys))
+    elif uncached:
+        # Texts that another request is already analyzing are awaited, not analyzed again
+        owned, joined = flights.claim(keys[sanitized_text] for sanitized_text in uncached)
+        texts_by_key = {keys[sanitized_text]: sanitized_text for sanitized_text in uncached}
+        analyzed = {}
+        try:
+            analyzed = await _analyze_many_uncached(
+                [texts_by_key[key] for key in owned], transformers_pipeline, mode, cache, keys
+            )
+        finally:
+            for key, future in owned.items():
+                if texts_by_key[key] in analyzed:
+                    flights.resolve(key, future, analyzed[texts_by_key[key]])
+                else:
+                    flights.abandon(key, future)
+        unique_results.update(analyzed)
+        for key, future in joined.items():
+            sanitized_text = texts_by_key[key]
+            try:
+                unique_results[sanitized_text] = await flights.wait(future)
+            except concurrent.futures.CancelledError:
+                # The other request gave up; analyze the text here instead
+                unique_results[sanitized_text] = await analyze_sentiment_combined(
+                    sanitized_text, transformers_pipeline, mode
+                )
+            except Exception as e:
+                logger.error(f"Coalesced sentiment analysis failed: {e}")
+                unique_results[sanitized_text] = {"error": "Sentiment analysis failed"}
+
+    for sanitized_text, indices in pending.items():
+        for i in indices:
+            results[i] = unique_results[sanitized_text]
+    return results
+
+async def _analyze_many_uncached(texts, transformers_pipeline, mode, cache, keys):
+    """
+    The part of analyze_sentiment_batch after the index and cache lookups.
+
+    Returns:
+        dict: sanitized text -> result, for every text.
+    """
+    unique_results = {}
+    to_analyze = []
+    for sanitized_text, supported in zip(texts, detect_language_many(texts)):
+        if not supported:
+            unique_results[sanitized_text] = {"error": "Unsupported language. Only English, Spanish, and French are supported."}
+            continue
+        to_analyze.append(sanitized_text)
+
+    if to_analyze:
+        documents = [get_document(sanitized_text) for sanitized_text in to_analyze]
+        try:
+            if mode == "cascade":
+                analyzed = await _analyze_cascade_many(documents, transformers_pipeline)
+            elif mode == "lexicon":
+                analyzed = await _analyze_lexicon_many(documents)
+            else:
+                # Run the three analyzers over the whole batch concurrently
+                transformers_results, textblob_results, nltk_results = await asyncio.gather(
+                    get_transformers_sentiment_many(documents, transformers_pipeline),
+                    _get_labels_many("textblob", textblob_labels, documents),
+                    _get_labels_many("nltk", nltk_labels, documents)
+                )
+                analyzed = [
+                    {
+                        "text": sanitized_text,
+                        "textblob": textblob_result,
+                        "nltk": nltk_result,
+                        "transformers": {
+                            "label": transformers_result[0],
+                            "confidence": transformers_result[1]
+                        }
+                    }
+                    for sanitized_text, textblob_result, nltk_result, transformers_result in zip(
+                        to_analyze, textblob_results, nltk_results, transformers_results)
+                ]
+            for result in analyzed:
+                if cache is not None and _is_cacheable(result):
+                    cache.set(keys[result["text"]], result)
+                unique_results[result["text"]] = result
+        except Exception as e:
+            logger.error(f"Batch sentiment analysis failed: {e}")
+            for sanitized_text in to_analyze:
+                unique_results.setdefault(sanitized_text, {"error": "Sentiment analysis failed"})
+    return unique_results
+
+async def _analyze_cascade(document, transformers_pipeline, include_chunks=False):
+    """
+    Runs the lexicon tiers, and the transformer only if they are not confident.
+    """
+    polarity, compound = await _lexicon_scores(document)
+    transformers_result = None
+    if needs_transformer(polarity, compound):
+        transformers_result = await get_transformers_sentiment(document, transformers_pipeline, include_chunks)
+    return _cascade_result(text_of(document), polarity, compound, transformers_result)
+
+async def _analyze_lexicon(document):
+    """
+    Runs only the lexicon tiers, for the degraded mode used while the transformer is saturated.
+    """
+    polarity, compound = await _lexicon_scores(document)
+    result = _cascade_result(text_of(document), polarity, compound, None)
+    result["degraded"] = True
+    return result
+
+async def _lexicon_scores(document):
+    """
+    Returns the TextBlob polarity and VADER compound score, each None on failure.
+    """
+    return await asyncio.gather(
+        _get_score("textblob", textblob_polarity, document),
+        _get_score("nltk", nltk_compound, document)
+    )
+
+async def _analyze_cascade_many(documents, transformers_pipeline):
+    """
+    Batch version of _analyze_cascade; uncertain texts share one batched transformer call.
+    """
+    polarities, compounds = await asyncio.gather(
+        _get_labels_many("textblob", textblob_polarities, documents, fallback=None),
+        _get_labels_many("nltk", nltk_compounds, documents, fallback=None)
+    )
+    uncertain = [document for document, polarity, compound in zip(documents, polarities, compounds)
+                 if needs_transformer(polarity, compound)]
+    transformers_results = {}
+    if uncertain:
+        transformers_results = dict(zip(
+            map(text_of, uncertain), await get_transformers_sentiment_many(uncertain, transformers_pipeline)
+        ))
+    return [
+        _cascade_result(text_of(document), polarity, compound, transformers_results.get(text_of(document)))
+        for document, polarity, compound in zip(documents, polarities, compounds)
+    ]
+
+async def _analyze_lexicon_many(documents):
+    """
+    Batch version of _analyze_lexicon.
+    """
+    polarities, compounds = await asyncio.gather(
+        _get_labels_many("textblob", textblob_polarities, documents, fallback=None),
+        _get_labels_many("nltk", nltk_compounds, documents, fallback=None)
+    )
+    return [
+        {**_cascade_result(text_of(document), polarity, compound, None), "degraded": True}
+        for document, polarity, compound in zip(documents, polarities, compounds)
+    ]
+
+def needs_transformer(polarity, compound, vader_band=None, textblob_band=None):
+    """
+    Decides whether the lexicon tiers are too uncertain to answer without the transformer.
+
+    Args:
+        polarity (float): TextBlob polarity, or None if TextBlob failed.
+        compound (float): VADER compound score, or None if VADER failed.
+        vader_band (float): Defaults to CASCADE_VADER_BAND.
+        textblob_band (float): Defaults to CASCADE_TEXTBLOB_BAND.
+
+    Returns:
+        bool: True if either score is missing or inside its band, or the two labels disagree.
+    """
+    if polarity is None or compound is None:
+        return True
+    vader_band = CASCADE_VADER_BAND if vader_band is None else vader_band
+    textblob_band = CASCADE_TEXTBLOB_BAND if textblob_band is None else textblob_band
+    if abs(compound) < vader_band or abs(polarity) < textblob_band:
+        return True
+    return polarity_label(polarity) != _compound_label(compound)
+
+def _cascade_result(sanitized_text, polarity, compound, transformers_result):
+    tiers = ["textblob", "nltk"]
+    if transformers_result is not None:
+        tiers.append("transformers")
+        label, confidence, *chunks = transformers_result
+        transformers_result = {"label": label, "confidence": confidence}
+        if chunks:
+            transformers_result["chunks"] = chunks[0]
+    return {
+        "text": sanitized_text,
+        "textblob": "Error" if polarity is None else polarity_label(polarity),
+        "nltk": "Error" if compound is None else _compound_label(compound),
+        "transformers": transformers_result,
+        "tiers": tiers
+    }
+
+def _cache_model_id(transformers_pipeline, mode):
+    """
+    Cascade results depend on the bands, so they are cached apart from full results.
+    Lexicon mode looks up full results; its own results are never cached.
+    """
+    model_id = model_identity(transformers_pipeline)
+    if mode == "cascade":
+        model_id = f"{model_id}|cascade:{CASCADE_VADER_BAND}:{CASCADE_TEXTBLOB_BAND}"
+    return model_id
+
+def _is_cacheable(result):
+    """
+    Returns True if every analyzer that ran produced a real result rather than its error fallback,
+    and the result is not a degraded one.
+    """
+    transformers_result = result["transformers"]
+    return (
+        not result.get("degraded")
+        and result["textblob"] != "Error"
+        and result["nltk"] != "Error"
+        and not (transformers_result is not None
+                 and transformers_result["label"] == "Neutral" and transformers_result["confidence"] == 0.0)
+    )
 
 async def get_textblob_sentiment(text):
     """
-    Analyzes sentiment using TextBlob.
+    Analyzes sentiment using TextBlob, on the executor configured for it (see analyzer_executors).
 
     Args:
-        text (str): The input text to analyze.
+        text (str | Document): The input text to analyze.
 
     Returns:
         str: The sentiment label ("Positive", "Negative", or "Neutral").
@@ -70,24 +433,18 @@ async def get_textblob_sentiment(text):
         Exception: If TextBlob sentiment analysis fails.
     """
     try:
-        blob = TextBlob(text)
-        sentiment_polarity = blob.sentiment.polarity
-        if sentiment_polarity > 0:
-            return "Positive"
-        elif sentiment_polarity < 0:
-            return "Negative"
-        else:
-            return "Neutral"
+        with get_metrics().time("sentiment_stage_seconds", stage="textblob"):
+            return await get_analyzer_executor().run("textblob", textblob_label, text)
     except Exception as e:
-        logger.error(f"TextBlob sentiment analysis failed: {e}")
+        logger.error(f"TextBlob sentiment analysis failed: {e!r}")
         return "Error"
 
 async def get_nltk_sentiment(text):
     """
-    Analyzes sentiment using NLTK's VADER sentiment analyzer.
+    Analyzes sentiment using NLTK's VADER sentiment analyzer, on the executor configured for it.
 
     Args:
-        text (str): The input text to analyze.
+        text (str | Document): The input text to analyze.
 
     Returns:
         str: The sentiment label ("Positive", "Negative", or "Neutral").
@@ -96,36 +453,231 @@ async def get_nltk_sentiment(text):
         Exception: If NLTK sentiment analysis fails.
     """
     try:
-        sia = SentimentIntensityAnalyzer()
-        sentiment_scores = sia.polarity_scores(text)
-        if sentiment_scores['compound'] >= 0.05:
-            return "Positive"
-        elif sentiment_scores['compound'] <= -0.05:
-            return "Negative"
-        else:
-            return "Neutral"
+        with get_metrics().time("sentiment_stage_seconds", stage="vader"):
+            return await get_analyzer_executor().run("nltk", nltk_label, text)
     except Exception as e:
-        logger.error(f"NLTK sentiment analysis failed: {e}")
+        logger.error(f"NLTK sentiment analysis failed: {e!r}")
         return "Error"
 
-async def get_transformers_sentiment(text, transformers_pipeline):
+async def _get_score(analyzer, score_fn, text):
+    """
+    Runs a scoring function on the analyzer's executor, returning None on failure.
+    """
+    try:
+        with get_metrics().time("sentiment_stage_seconds", stage=STAGE_NAMES[analyzer]):
+            return await get_analyzer_executor().run(analyzer, score_fn, text)
+    except Exception as e:
+        logger.error(f"{analyzer} sentiment scoring failed: {e!r}")
+        return None
+
+def textblob_label(text):
+    """
+    Returns the TextBlob sentiment label for a text.
+    Kept at module level so it can run in a process pool.
+    """
+    return polarity_label(textblob_polarity(text))
+
+def nltk_label(text):
+    """
+    Returns the VADER sentiment label for a text.
+    Kept at module level so it can run in a process pool.
+    """
+    return _vader_label(get_vader_engine().polarity_scores(text))
+
+def textblob_polarity(text):
+    """
+    Returns the TextBlob polarity of a text, from -1.0 to 1.0.
+    """
+    return get_textblob_engine().polarity(text)
+
+def nltk_compound(text):
+    """
+    Returns the VADER compound score of a text, from -1.0 to 1.0.
+    """
+    return get_vader_engine().polarity_scores(text)['compound']
+
+def textblob_polarities(texts):
+    """
+    Returns the TextBlob polarity of each text, scored in one batch.
+    """
+    return get_textblob_engine().polarity_many(texts)
+
+def nltk_compounds(texts):
+    """
+    Returns the VADER compound score of each text, scored in one batch.
+    """
+    return [scores['compound'] for scores in get_vader_engine().polarity_scores_many(texts)]
+
+def polarity_label(sentiment_polarity):
+    """
+    Maps a TextBlob polarity to a sentiment label.
+    """
+    if sentiment_polarity > 0:
+        return "Positive"
+    elif sentiment_polarity < 0:
+        return "Negative"
+    else:
+        return "Neutral"
+
+def _compound_label(compound):
+    return _vader_label({'compound': compound})
+
+def textblob_labels(texts):
+    """
+    Returns the TextBlob sentiment label for each text, scored in one batch.
+    """
+    return [polarity_label(polarity) for polarity in get_textblob_engine().polarity_many(texts)]
+
+def nltk_labels(texts):
+    """
+    Returns the VADER sentiment label for each text, scored in one batch.
+    """
+    return [_vader_label(scores) for scores in get_vader_engine().polarity_scores_many(texts)]
+
+def _vader_label(sentiment_scores):
+    if sentiment_scores['compound'] >= 0.05:
+        return "Positive"
+    elif sentiment_scores['compound'] <= -0.05:
+        return "Negative"
+    else:
+        return "Neutral"
+
+async def get_transformers_sentiment(text, transformers_pipeline, include_chunks=False):
     """
     Analyzes sentiment using a Hugging Face Transformers pipeline.
+    If the pipeline is wrapped in an InferenceScheduler, the text is batched with
+    other in-flight requests; otherwise it runs on the transformers executor.
+    Either way the call is bounded by ANALYZER_TIMEOUT.
+
+    Texts longer than the model's token limit are split into overlapping chunks
+    (see text_chunking), scored in one batch and aggregated into one result.
+    A Document keeps its chunk spans, so a repeated long text is tokenized once.
 
     Args:
-        text (str): The input text to analyze.
+        text (str | Document): The input text to analyze.
         transformers_pipeline (Pipeline): A Hugging Face Transformers pipeline for sentiment analysis.
+        include_chunks (bool): Also return the score of each chunk.
 
     Returns:
         tuple: A tuple containing the sentiment label and confidence score.
                Example: ("Positive", 0.95)
+               With include_chunks, a third item lists each chunk's
+               {"start", "end", "label", "confidence"}.
 
     Raises:
         Exception: If Transformers sentiment analysis fails.
     """
     try:
-        result = transformers_pipeline(text)[0]
-        return result['label'].capitalize(), result['score']
+        with get_metrics().time("sentiment_stage_seconds", stage="transformer"):
+            spans = _chunk_spans(text, transformers_pipeline)
+            text = text_of(text)
+            if len(spans) == 1:
+                results = [await _run_transformers(text, transformers_pipeline)]
+            else:
+                results = await _run_transformers_many(
+                    [text[start:end] for start, end, _ in spans], transformers_pipeline
+                )
+        result = results[0] if len(results) == 1 else aggregate(results, [count for _, _, count in spans])
+        label, score = result['label'].capitalize(), result['score']
+        if include_chunks:
+            return label, score, [
+                {"start": start, "end": end, "label": chunk['label'].capitalize(), "confidence": chunk['score']}
+                for (start, end, _), chunk in zip(spans, results)
+            ]
+        return label, score
     except Exception as e:
         logger.error(f"Transformers sentiment analysis failed: {e}")
-        return "Neutral", 0.0  # Fallback result
+        return ("Neutral", 0.0, []) if include_chunks else ("Neutral", 0.0)  # Fallback result
+
+async def get_transformers_sentiment_many(texts, transformers_pipeline):
+    """
+    Analyzes sentiment for several texts with a single batched Transformers call.
+    Long texts contribute one input per chunk to the same call and are aggregated afterwards.
+
+    Args:
+        texts (list): The input texts or Documents to analyze.
+        transformers_pipeline (Pipeline): A Hugging Face Transformers pipeline for sentiment analysis.
+
+    Returns:
+        list: A (label, confidence) tuple per text, in input order.
+              Texts that fail fall back to ("Neutral", 0.0), as in get_transformers_sentiment.
+    """
+    try:
+        inputs = []
+        owners = []  # (first input, span list) per text
+        for text in texts:
+            spans = _chunk_spans(text, transformers_pipeline)
+            owners.append((len(inputs), spans))
+            inputs.extend(text_of(text)[start:end] for start, end, _ in spans)
+        results = await _run_transformers_many(inputs, transformers_pipeline)
+        aggregated = []
+        for first, spans in owners:
+            if len(spans) == 1:
+                aggregated.append(results[first])
+            else:
+                aggregated.append(aggregate(results[first:first + len(spans)], [count for _, _, count in spans]))
+        return [(result['label'].capitalize(), result['score']) for result in aggregated]
+    except Exception as e:
+        logger.error(f"Batched Transformers sentiment analysis failed: {e!r}")
+        return [("Neutral", 0.0)] * len(texts)  # Fallback result
+
+def _chunk_spans(text, transformers_pipeline):
+    """
+    Returns the (start, end, token_count) spans the text is scored in; a single span if it fits.
+    Spans of a Document are memoized per model, since they come from the model's tokenizer.
+    """
+    if not needs_chunking(text_of(text)):
+        return [(0, len(text_of(text)), None)]
+    tokenizer = getattr(transformers_pipeline, "tokenizer", None)
+    if isinstance(text, Document):
+        return text.memo(("chunk_spans", model_identity(transformers_pipeline)),
+                         lambda text: split_text(text, tokenizer))
+    return split_text(text, tokenizer)
+
+async def _run_transformers(text, transformers_pipeline):
+    """
+    Returns the raw pipeline result for one input, bounded by ANALYZER_TIMEOUT.
+    """
+    executor = get_analyzer_executor()
+    if isinstance(transformers_pipeline, InferenceScheduler):
+        # A timeout cancels the queued request before it reaches a batch
+        return await asyncio.wait_for(
+            asyncio.wrap_future(transformers_pipeline.submit(text)), executor.timeout
+        )
+    pipeline = functools.partial(transformers_pipeline, **PIPELINE_TRUNCATION)
+    return (await executor.run("transformers", pipeline, text))[0]
+
+async def _run_transformers_many(inputs, transformers_pipeline):
+    """
+    Returns the raw pipeline result for each input, from batched forward passes.
+    """
+    executor = get_analyzer_executor()
+    # Allow each forward pass the per-call timeout
+    timeout = executor.timeout * -(-len(inputs) // INFERENCE_MAX_BATCH_SIZE)
+    if isinstance(transformers_pipeline, InferenceScheduler):
+        return await asyncio.wait_for(asyncio.gather(
+            *(asyncio.wrap_future(transformers_pipeline.submit(text)) for text in inputs)
+        ), timeout)
+
+    # Sort by length so each forward pass pads to similar lengths, then restore input order
+    order = sorted(range(len(inputs)), key=lambda i: len(inputs[i]))
+    batched_pipeline = functools.partial(
+        transformers_pipeline, batch_size=min(len(inputs), INFERENCE_MAX_BATCH_SIZE), **PIPELINE_TRUNCATION
+    )
+    sorted_results = await executor.run(
+        "transformers", batched_pipeline, [inputs[i] for i in order], timeout=timeout
+    )
+    results = [None] * len(inputs)
+    for i, result in zip(order, sorted_results):
+        results[i] = result
+    return results
+
+async def _get_labels_many(analyzer, labels_fn, texts, fallback="Error"):
+    """
+    Runs a batch labelling function over texts in parallel chunks, falling back to "Error" labels.
+    """
+    try:
+        return await get_analyzer_executor().map_chunks(analyzer, labels_fn, texts)
+    except Exception as e:
+        logger.error(f"Batched {analyzer} sentiment analysis failed: {e!r}")
+        return [fallback] * len(texts)
@@ -0,0 +1,246 @@
+import gc
+import logging
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from decouple import config
+from analyzer_executors import ANALYZER_PROCESS_WORKERS
+
+logger = logging.getLogger(__name__)
+
+# Constants
+WORKERS = config("WORKERS", default=os.cpu_count() or 1, cast=int)
+TORCH_THREADS_PER_WORKER = config("TORCH_THREADS_PER_WORKER", default=0, cast=int)  # 0 divides cores evenly
+GRACEFUL_TIMEOUT = config("GRACEFUL_TIMEOUT", default=30, cast=float)  # Seconds for a worker to drain
+RESPAWN_BACKOFF = config("RESPAWN_BACKOFF", default=1.0, cast=float)  # Seconds between crash respawns
+
+def threads_per_worker(workers, threads=TORCH_THREADS_PER_WORKER):
+    """
+    Returns the number of torch intra-op threads each worker should use so that
+    all workers together don't oversubscribe the cores.
+    """
+    if threads > 0:
+        return threads
+    return max(1, (os.cpu_count() or 1) // max(1, workers))
+
+def analyzer_processes_per_worker(workers, processes=ANALYZER_PROCESS_WORKERS):
+    """
+    Returns the analyzer process pool size of each worker, so that all workers
+    together run ANALYZER_PROCESS_WORKERS analyzer processes rather than that many each.
+    """
+    return max(1, processes // max(1, workers))
+
+def preload():
+    """
+    Loads everything workers share before forking: the Flask app and its
+    transformers pipeline, the VADER lexicon, the TextBlob pattern lexicon and
+    the langdetect profiles. Inference is deliberately not run here, because
+    torch's thread pool must not exist in the master process when it forks.
+
+    Returns:
+        Flask: The preloaded WSGI application.
+    """
+    start = time.monotonic()
+    from flask_api import app
+    from model_registry import get_model_registry
+    from vader_engine import get_vader_engine
+    from langdetect.detector_factory import init_factory
+    from textblob_engine import get_textblob_engine
+
+    get_model_registry().warm_up(background=False)
+    get_vader_engine()
+    init_factory()
+    get_textblob_engine()  # Loads the pattern lexicon
+    logger.info(f"Preloaded models in {time.monotonic() - start:.1f}s")
+    return app
+
+def create_listener(host, port, backlog=2048):
+    """
+    Binds the listening socket in the master, so every worker accepts on the same port.
+    """
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+def run_worker(app, listener, ssl_context, torch_threads, analyzer_processes):
+    """
+    Serves requests in a forked worker until it receives SIGTERM, then drains in-flight requests.
+    """
+    from werkzeug.serving import make_server
+    from job_queue import get_job_queue
+    from analyzer_executors import get_analyzer_executor
+
+    # The process pool is created on first use, after fork, so it picks up this worker's share
+    get_analyzer_executor().process_workers = analyzer_processes
+
+    try:
+        import torch
+        torch.set_num_threads(torch_threads)
+    except ImportError:
+        pass
+
+    host, port = listener.getsockname()[:2]
+    server = make_server(host, port, app, threaded=True, ssl_context=ssl_context, fd=listener.fileno())
+    server.daemon_threads = False  # Let server_close wait for in-flight requests
+
+    def stop(signum, frame):
+        # shutdown() blocks until serve_forever exits, so it can't run in this thread
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # The master handles Ctrl+C
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)
+    job_queue = get_job_queue()
+    job_queue.start()  # Each worker also runs JOB_WORKERS job threads
+    logger.info(f"Worker {os.getpid()} serving with {torch_threads} torch threads "
+                f"and up to {analyzer_processes} analyzer processes")
+    server.serve_forever()
+    server.server_close()
+    job_queue.stop(timeout=GRACEFUL_TIMEOUT)  # Running jobs are requeued after their current batch
+
+class Launcher:
+    """
+    A pre-fork master process: preloads the models once, then forks workers
+    that share those pages copy-on-write.
+
+    Signals:
+        SIGTERM, SIGINT: Stop all workers gracefully and exit.
+        SIGHUP: Replace workers one at a time, without dropping the listening socket.
+    """
+
+    def __init__(self, app, listener, workers=WORKERS, ssl_context=None,
+                 graceful_timeout=GRACEFUL_TIMEOUT):
+        self.app = app
+        self.listener = listener
+        self.workers = max(1, workers)
+        self.ssl_context = ssl_context
+        self.graceful_timeout = graceful_timeout
+        self.torch_threads = threads_per_worker(self.workers)
+        self.analyzer_processes = analyzer_processes_per_worker(self.workers)
+        self.children = set()
+        self._stopping = False
+        self._reload_requested = False
+
+    def spawn(self):
+        pid = os.fork()
+        if pid == 0:
+            exit_code = 0
+            try:
+                run_worker(self.app, self.listener, self.ssl_context, self.torch_threads, self.analyzer_processes)
+            except Exception:
+                logger.exception("Worker crashed")
+                exit_code = 1
+            finally:
+                os._exit(exit_code)
+        self.children.add(pid)
+        return pid
+
+    def stop_worker(self, pid):
+        """
+        Sends SIGTERM to a worker and waits for it to drain, killing it after the graceful timeout.
+        """
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            self.children.discard(pid)
+            return
+        deadline = time.monotonic() + self.graceful_timeout
+        while time.monotonic() < deadline:
+            done, _ = os.waitpid(pid, os.WNOHANG)
+            if done:
+                break
+            time.sleep(0.1)
+        else:
+            logger.warning(f"Worker {pid} did not stop in time; killing it")
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+        self.children.discard(pid)
+
+    def reload(self):
+        """
+        Replaces each worker with a fresh one, starting the new worker before stopping the old.
+        """
+        logger.info("Restarting workers")
+        for pid in list(self.children):
+            self.spawn()
+            self.stop_worker(pid)
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+        signal.signal(signal.SIGHUP, self._handle_reload)
+
+        # Move preloaded objects out of the GC's reach so collections in workers
+        # don't write to (and un-share) the pages holding them
+        gc.collect()
+        gc.freeze()
+
+        logger.info(f"Starting {self.workers} workers with {self.torch_threads} torch threads each")
+        for _ in range(self.workers):
+            self.spawn()
+
+        while not self._stopping:
+            if self._reload_requested:
+                self._reload_requested = False
+                self.reload()
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                pid = 0
+            if pid and pid in self.children:
+                self.children.discard(pid)
+                if not self._stopping:
+                    logger.error(f"Worker {pid} exited with status {status}; respawning")
+                    time.sleep(RESPAWN_BACKOFF)
+                    self.spawn()
+            else:
+                time.sleep(0.2)
+
+        logger.info("Stopping workers")
+        for pid in list(self.children):
+            self.stop_worker(pid)
+        self.listener.close()
+
+    def _handle_stop(self, signum, frame):
+        self._stopping = True
+
+    def _handle_reload(self, signum, frame):
+        self._reload_requested = True
+
+def main():
+    """
+    Starts the API with a pre-fork master and WORKERS worker processes.
+
+    Environment Variables:
+        WORKERS (int): Number of worker processes. Defaults to the CPU count.
+        TORCH_THREADS_PER_WORKER (int): Torch intra-op threads per worker. Defaults to CPU count / WORKERS.
+        GRACEFUL_TIMEOUT (float): Seconds a worker may take to drain before it is killed. Defaults to 30.
+        HOST (str): Host address to bind. Defaults to "0.0.0.0".
+        PORT (int): Port number to bind. Defaults to 5000.
+    """
+    logging.basicConfig(level=config("LOG_LEVEL", default="INFO"), format="%(asctime)s - %(levelname)s - %(message)s")
+    from ssl_certificate import load_ssl_context
+
+    # Limit BLAS/OpenMP pools before torch is imported, so workers inherit the setting
+    torch_threads = str(threads_per_worker(WORKERS))
+    os.environ.setdefault("OMP_NUM_THREADS", torch_threads)
+    os.environ.setdefault("MKL_NUM_THREADS", torch_threads)
+
+    ssl_context = load_ssl_context()
+    if ssl_context is None:
+        logger.error("Failed to load SSL certificates. Exiting...")
+        return 1
+
+    app = preload()
+    listener = create_listener(config("HOST", default="0.0.0.0"), config("PORT", default=5000, cast=int))
+    Launcher(app, listener, workers=WORKERS, ssl_context=ssl_context).run()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
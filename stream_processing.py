@@ -0,0 +1,334 @@
+import asyncio
+import csv
+import json
+import logging
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from decouple import config
+from sentiment_analysis import analyze_sentiment_batch
+from result_format import compact, encode
+from inference_scheduler import InferenceScheduler
+from utils import MAX_INPUT_LENGTH
+
+logger = logging.getLogger(__name__)
+
+# Constants
+STREAM_BATCH_SIZE = config("STREAM_BATCH_SIZE", default=256, cast=int)
+STREAM_WORKERS = config("STREAM_WORKERS", default=4, cast=int)
+PROGRESS_INTERVAL = config("PROGRESS_INTERVAL", default=5.0, cast=float)  # Seconds between progress lines
+CHECKPOINT_INTERVAL = config("CHECKPOINT_INTERVAL", default=10.0, cast=float)  # Seconds between checkpoint writes
+STREAM_MAX_QUEUE_DEPTH = config("STREAM_MAX_QUEUE_DEPTH", default=1024, cast=int)  # Scheduler backlog that pauses reading
+STREAM_MAX_LINE_BYTES = config("STREAM_MAX_LINE_BYTES", default=MAX_INPUT_LENGTH * 4 + 1024, cast=int)  # UTF-8 worst case
+
+INPUT_FORMATS = ("text", "jsonl", "csv")
+OUTPUT_FORMATS = ("jsonl", "csv")
+CSV_FIELDS = ["index", "text", "textblob", "nltk", "transformers_label", "transformers_confidence", "error"]
+
+class InvalidRecord:
+    """
+    Placeholder for an input record that could not be turned into text.
+    """
+
+    def __init__(self, error):
+        self.error = error
+
+def read_records(stream, input_format="text", field="text", column=None):
+    """
+    Yields the text of each record in a stream, one record at a time.
+
+    Args:
+        stream (file): A text stream to read from.
+        input_format (str): "text" (one text per line), "jsonl" or "csv".
+        field (str): The JSONL field holding the text.
+        column (str): The CSV column name, or its zero-based position, holding the text.
+                      Defaults to the first column.
+
+    Yields:
+        str or InvalidRecord: The text of each record, in input order.
+    """
+    if input_format == "text":
+        for line in stream:
+            yield line.rstrip("\r\n")
+    elif input_format == "jsonl":
+        for line in stream:
+            if isinstance(line, InvalidRecord):
+                yield line
+            elif line.strip():
+                yield parse_jsonl_record(line, field)
+    elif input_format == "csv":
+        reader = csv.reader(stream)
+        header = next(reader, None)
+        if header is None:
+            return
+        if column is None:
+            position = 0
+        elif column.isdigit():
+            position = int(column)
+        elif column in header:
+            position = header.index(column)
+        else:
+            raise ValueError(f"Column '{column}' not found in CSV header")
+        for row in reader:
+            yield row[position] if position < len(row) else InvalidRecord(f"Missing column {position}")
+    else:
+        raise ValueError(f"Unsupported input format: {input_format}")
+
+def parse_jsonl_record(line, field="text"):
+    """
+    Returns the text of one JSONL record: an object with the text in a field, or a bare JSON string.
+
+    Returns:
+        str or InvalidRecord: The text, or why the line holds none.
+    """
+    try:
+        record = json.loads(line)
+    except ValueError as e:
+        return InvalidRecord(f"Invalid JSON: {e}")
+    text = record.get(field) if isinstance(record, dict) else record
+    return text if isinstance(text, str) else InvalidRecord(f"Missing string field '{field}'")
+
+def read_lines(stream, max_line_bytes=STREAM_MAX_LINE_BYTES):
+    """
+    Yields the lines of a binary stream, reading at most one line ahead.
+
+    Lines longer than max_line_bytes are skipped rather than buffered, so a
+    client cannot make the server hold an unbounded line in memory.
+
+    Yields:
+        str or InvalidRecord: Each line decoded as UTF-8, or an InvalidRecord for an oversized line.
+    """
+    while True:
+        line = stream.readline(max_line_bytes + 1)
+        if not line:
+            return
+        if len(line) > max_line_bytes:
+            while line and not line.endswith(b"\n"):
+                line = stream.readline(max_line_bytes + 1)
+            yield InvalidRecord(f"Line exceeds {max_line_bytes} bytes")
+            continue
+        yield line.decode("utf-8", errors="replace")
+
+def ndjson_lines(start_index, results, include_text=True):
+    """
+    Encodes results as NDJSON lines numbered from start_index, for the streaming API responses.
+    """
+    return b"".join(
+        encode({"index": index, **compact(result, include_text)}) + b"\n"
+        for index, result in enumerate(results, start_index)
+    )
+
+class ResultWriter:
+    """
+    Writes results incrementally as JSONL or CSV, flushing after each batch.
+    """
+
+    def __init__(self, stream, output_format="jsonl", write_header=True):
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unsupported output format: {output_format}")
+        self.stream = stream
+        self.output_format = output_format
+        self._csv = None
+        if output_format == "csv":
+            self._csv = csv.DictWriter(stream, fieldnames=CSV_FIELDS)
+            if write_header:
+                self._csv.writeheader()
+
+    def write(self, index, result):
+        if self._csv is not None:
+            transformers_result = result.get("transformers") or {}
+            self._csv.writerow({
+                "index": index,
+                "text": result.get("text", ""),
+                "textblob": result.get("textblob", ""),
+                "nltk": result.get("nltk", ""),
+                "transformers_label": transformers_result.get("label", ""),
+                "transformers_confidence": transformers_result.get("confidence", ""),
+                "error": result.get("error", "")
+            })
+        else:
+            self.stream.write(json.dumps({"index": index, **result}) + "\n")
+
+    def flush(self):
+        self.stream.flush()
+
+def read_checkpoint(path):
+    """
+    Returns the number of records already written according to a checkpoint file, or 0.
+    """
+    return _read_checkpoint_state(path)[0]
+
+def checkpoint_output_bytes(path):
+    """
+    Returns the output size, in bytes, at the last checkpoint, or None if it was not recorded.
+    Output written after it may be repeated on resume, so it should be truncated away.
+    """
+    return _read_checkpoint_state(path)[1]
+
+def _read_checkpoint_state(path):
+    if not path or not os.path.exists(path):
+        return 0, None
+    try:
+        with open(path) as f:
+            state = json.load(f)
+        output_bytes = state.get("output_bytes")
+        return int(state["records"]), None if output_bytes is None else int(output_bytes)
+    except (ValueError, KeyError, TypeError, AttributeError, OSError) as e:
+        logger.warning(f"Ignoring unreadable checkpoint {path}: {e}")
+        return 0, None
+
+def write_checkpoint(path, records, output_bytes=None):
+    """
+    Atomically records how many input records have been written and, for a
+    seekable output, how many bytes of output they took.
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"records": records, "output_bytes": output_bytes}, f)
+    os.replace(tmp_path, path)
+
+def _output_bytes(writer):
+    """
+    Returns the writer's output position after a flush, or None if the output is not seekable.
+    """
+    try:
+        return writer.stream.tell()
+    except (AttributeError, OSError, ValueError):
+        return None
+
+async def analyze_records(texts, transformers_pipeline):
+    """
+    Analyzes one batch of records, keeping per-record errors for invalid input.
+
+    Args:
+        texts (list): Texts (or InvalidRecord) as produced by read_records.
+        transformers_pipeline (Pipeline): A Hugging Face Transformers pipeline for sentiment analysis.
+
+    Returns:
+        list: A result per record, in input order.
+    """
+    results = [None] * len(texts)
+    valid = []
+    for i, text in enumerate(texts):
+        if isinstance(text, InvalidRecord):
+            results[i] = {"error": text.error}
+        elif len(text) > MAX_INPUT_LENGTH:
+            results[i] = {"error": f"Text exceeds {MAX_INPUT_LENGTH} characters"}
+        else:
+            valid.append(i)
+    analyzed = await analyze_sentiment_batch([texts[i] for i in valid], transformers_pipeline)
+    for i, result in zip(valid, analyzed):
+        results[i] = result
+    return results
+
+def _analyze_chunk(texts, transformers_pipeline):
+    return asyncio.run(analyze_records(texts, transformers_pipeline))
+
+def _batches(records, batch_size):
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def inference_backlogged(transformers_pipeline, max_queue_depth=STREAM_MAX_QUEUE_DEPTH):
+    """
+    Returns True if the pipeline is an InferenceScheduler with at least max_queue_depth texts waiting.
+    """
+    return isinstance(transformers_pipeline, InferenceScheduler) and transformers_pipeline.queue_depth >= max_queue_depth
+
+def analyze_stream(records, transformers_pipeline, batch_size=STREAM_BATCH_SIZE, workers=STREAM_WORKERS,
+                   max_queue_depth=STREAM_MAX_QUEUE_DEPTH):
+    """
+    Analyzes a stream of records in batches on a worker pool, yielding each batch's results in input order.
+
+    Records are pulled only as capacity frees up: at most workers * 2 batches
+    are in flight, and while the inference scheduler's queue holds
+    max_queue_depth texts or more, the oldest batch is awaited before the next
+    one is read. Memory stays bounded however long the stream is, and a
+    caller that stops iterating stops the reads.
+
+    Args:
+        records (iterable): Texts (or InvalidRecord) as produced by read_records.
+        transformers_pipeline (Pipeline): A Hugging Face Transformers pipeline for sentiment analysis.
+        batch_size (int): Records per batch.
+        workers (int): Batches analyzed concurrently.
+        max_queue_depth (int): Scheduler queue depth at which reading pauses.
+
+    Yields:
+        list: The results of one batch, a result per record.
+    """
+    in_flight = deque()
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="stream") as pool:
+        try:
+            for batch in _batches(records, batch_size):
+                in_flight.append(pool.submit(_analyze_chunk, batch, transformers_pipeline))
+                while in_flight and (len(in_flight) > workers * 2 or in_flight[0].done()
+                                     or inference_backlogged(transformers_pipeline, max_queue_depth)):
+                    yield in_flight.popleft().result()
+            while in_flight:
+                yield in_flight.popleft().result()
+        finally:
+            for future in in_flight:  # The caller stopped early; drop batches that have not started
+                future.cancel()
+
+def process_stream(records, writer, transformers_pipeline, batch_size=STREAM_BATCH_SIZE,
+                   workers=STREAM_WORKERS, start_offset=0, checkpoint_path=None,
+                   progress=sys.stderr, progress_interval=PROGRESS_INTERVAL):
+    """
+    Analyzes a stream of records in batches on a worker pool and writes results in input order.
+
+    Reading is bounded as in analyze_stream, so memory stays flat regardless of the input size.
+
+    Args:
+        records (iterable): Texts (or InvalidRecord) as produced by read_records.
+        writer (ResultWriter): Where results are written.
+        transformers_pipeline (Pipeline): A Hugging Face Transformers pipeline for sentiment analysis.
+        batch_size (int): Records per batch.
+        workers (int): Batches analyzed concurrently.
+        start_offset (int): Number of leading records to skip, e.g. from a checkpoint.
+        checkpoint_path (str): Optional file where progress is recorded for resuming, with
+                               the output size so a resumed run can drop output written
+                               after the checkpoint (see checkpoint_output_bytes).
+        progress (file): Stream for progress lines, or None to disable them.
+        progress_interval (float): Seconds between progress lines.
+
+    Returns:
+        int: The total number of records written, including skipped ones.
+    """
+    records = iter(records)
+    for _ in range(start_offset):
+        if next(records, None) is None:
+            return start_offset
+
+    written = start_offset
+    start = last_progress = last_checkpoint = time.monotonic()
+    for results in analyze_stream(records, transformers_pipeline, batch_size, workers):
+        for result in results:
+            writer.write(written, result)
+            written += 1
+        writer.flush()
+        now = time.monotonic()
+        if checkpoint_path and now - last_checkpoint >= CHECKPOINT_INTERVAL:
+            write_checkpoint(checkpoint_path, written, _output_bytes(writer))
+            last_checkpoint = now
+        if progress is not None and now - last_progress >= progress_interval:
+            rate = (written - start_offset) / (now - start)
+            progress.write(f"Processed {written} records ({rate:.0f} records/s)\n")
+            progress.flush()
+            last_progress = now
+
+    if checkpoint_path:
+        writer.flush()
+        write_checkpoint(checkpoint_path, written, _output_bytes(writer))
+    if progress is not None:
+        elapsed = time.monotonic() - start
+        progress.write(f"Done: {written} records in {elapsed:.1f}s "
+                       f"({(written - start_offset) / elapsed if elapsed else 0:.0f} records/s)\n")
+        progress.flush()
+    return written
@@ -0,0 +1,108 @@
+import unittest
+from unittest.mock import MagicMock
+import threading
+import time
+from inference_scheduler import InferenceScheduler
+from admission_control import AdmissionController, Overloaded, request_lane, simulate, HIGH, LOW
+
+def acquire_in_thread(controller, lane, admitted):
+    def run():
+        try:
+            controller.acquire(lane)
+            admitted.append(lane)
+        except Overloaded:
+            admitted.append(f"{lane} shed")
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+def wait_for_waiters(controller, count):
+    deadline = time.monotonic() + 5
+    while sum(controller.stats()["waiting"].values()) < count and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+class TestAdmissionController(unittest.TestCase):
+    def test_admits_up_to_the_concurrency_limit(self):
+        controller = AdmissionController(max_concurrency=2, max_wait=5)
+        self.assertEqual(controller.acquire(HIGH), 0.0)
+        controller.acquire(LOW)
+        admitted = []
+        thread = acquire_in_thread(controller, HIGH, admitted)
+        wait_for_waiters(controller, 1)
+        self.assertEqual(admitted, [])
+        controller.release()
+        thread.join(5)
+        self.assertEqual(admitted, [HIGH])
+        self.assertEqual(controller.stats()["in_flight"], 2)
+
+    def test_high_priority_waiters_go_first(self):
+        controller = AdmissionController(max_concurrency=1, target_latency=5, max_wait=5)
+        controller.acquire(HIGH)
+        admitted = []
+        low = acquire_in_thread(controller, LOW, admitted)
+        wait_for_waiters(controller, 1)
+        high = acquire_in_thread(controller, HIGH, admitted)
+        wait_for_waiters(controller, 2)
+        controller.release()
+        high.join(5)
+        controller.release()
+        low.join(5)
+        self.assertEqual(admitted, [HIGH, LOW])
+
+    def test_low_priority_is_shed_once_the_queue_delay_exceeds_the_target(self):
+        controller = AdmissionController(max_concurrency=1, target_latency=0.02, max_wait=5)
+        controller.acquire(HIGH)
+        admitted = []
+        thread = acquire_in_thread(controller, HIGH, admitted)
+        wait_for_waiters(controller, 1)
+        time.sleep(0.05)
+        with self.assertRaises(Overloaded) as context:
+            controller.acquire(LOW)
+        self.assertEqual(context.exception.retry_after, 1)
+        controller.release()
+        thread.join(5)
+        self.assertEqual(admitted, [HIGH])
+        self.assertEqual(controller.stats()["shed"], {HIGH: 0, LOW: 1})
+
+    def test_high_priority_is_shed_after_max_wait_or_when_the_queue_is_full(self):
+        controller = AdmissionController(max_concurrency=1, max_wait=0.02, max_queue=1)
+        controller.acquire(HIGH)
+        start = time.monotonic()
+        with self.assertRaises(Overloaded):
+            controller.acquire(HIGH)
+        self.assertGreaterEqual(time.monotonic() - start, 0.02)
+        admitted = []
+        thread = acquire_in_thread(controller, HIGH, admitted)
+        wait_for_waiters(controller, 1)
+        with self.assertRaises(Overloaded):
+            controller.acquire(HIGH)  # Shed at once, the queue is full
+        thread.join(5)
+        self.assertEqual(admitted, ["high shed"])
+        self.assertEqual(controller.stats()["waiting"], {HIGH: 0, LOW: 0})
+
+    def test_should_degrade(self):
+        controller = AdmissionController(max_concurrency=1, degrade_queue_depth=10)
+        scheduler = MagicMock(spec=InferenceScheduler)
+        scheduler.queue_depth = 3
+        self.assertFalse(controller.should_degrade(scheduler))
+        scheduler.queue_depth = 10
+        self.assertTrue(controller.should_degrade(scheduler))
+        self.assertFalse(controller.should_degrade(MagicMock()))
+        controller.degraded_mode = False
+        self.assertFalse(controller.should_degrade(scheduler))
+        self.assertEqual(controller.stats()["degraded"], 1)
+
+    def test_request_lane(self):
+        self.assertEqual(request_lane(None), HIGH)
+        self.assertEqual(request_lane(" Low "), LOW)
+        self.assertEqual(request_lane("urgent"), HIGH)
+
+    def test_tail_latency_stays_bounded_under_overload(self):
+        controller = AdmissionController(max_concurrency=4, target_latency=0.02, max_wait=0.1, max_queue=16)
+        report = simulate(controller, overload=3, service_time=0.01, duration=1.0)
+        self.assertLess(report[HIGH]["p99"], 0.1 + 0.01 + 0.1)  # max_wait, service time and scheduling slack
+        self.assertGreater(report[LOW]["shed"], report[HIGH]["shed"])
+        self.assertEqual(controller.stats()["in_flight"], 0)
+
+if __name__ == '__main__':
+    unittest.main()
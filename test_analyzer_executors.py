@@ -0,0 +1,79 @@
+import unittest
+import asyncio
+import os
+import time
+from analyzer_executors import AnalyzerExecutor
+
+def worker_pid(_):
+    return os.getpid()
+
+def slow_identity(value):
+    time.sleep(value)
+    return value
+
+def double_all(values):
+    return [value * 2 for value in values]
+
+class TestAnalyzerExecutor(unittest.TestCase):
+    def test_thread_executor_runs_off_loop(self):
+        executor = AnalyzerExecutor(kinds={"nltk": "thread"}, thread_workers=2)
+        try:
+            self.assertEqual(asyncio.run(executor.run("nltk", slow_identity, 0)), 0)
+        finally:
+            executor.shutdown()
+
+    def test_process_executor_runs_in_another_process(self):
+        executor = AnalyzerExecutor(kinds={"textblob": "process"}, process_workers=1)
+        try:
+            self.assertNotEqual(asyncio.run(executor.run("textblob", worker_pid, None)), os.getpid())
+        finally:
+            executor.shutdown()
+
+    def test_inline_executor(self):
+        executor = AnalyzerExecutor(kinds={"nltk": "inline"})
+        self.assertEqual(asyncio.run(executor.run("nltk", worker_pid, None)), os.getpid())
+
+    def test_analyzers_run_in_parallel(self):
+        executor = AnalyzerExecutor(kinds={"textblob": "thread", "nltk": "thread"}, thread_workers=4)
+
+        async def run_both():
+            return await asyncio.gather(
+                executor.run("textblob", slow_identity, 0.3),
+                executor.run("nltk", slow_identity, 0.3)
+            )
+
+        try:
+            start = time.monotonic()
+            asyncio.run(run_both())
+            self.assertLess(time.monotonic() - start, 0.55)
+        finally:
+            executor.shutdown()
+
+    def test_timeout_replaces_process_pool(self):
+        executor = AnalyzerExecutor(kinds={"textblob": "process"}, process_workers=1, timeout=0.5)
+        try:
+            asyncio.run(executor.run("textblob", worker_pid, None))  # Warm up the pool
+            with self.assertRaises(asyncio.TimeoutError):
+                asyncio.run(executor.run("textblob", slow_identity, 30))
+            self.assertEqual(executor.timeouts, 1)
+            self.assertEqual(executor.process_pool_restarts, 1)
+            self.assertEqual(asyncio.run(executor.run("textblob", slow_identity, 0)), 0)
+        finally:
+            executor.shutdown()
+
+    def test_map_chunks_keeps_order(self):
+        executor = AnalyzerExecutor(kinds={"nltk": "thread"}, thread_workers=3)
+        try:
+            result = asyncio.run(executor.map_chunks("nltk", double_all, list(range(10))))
+            self.assertEqual(result, [value * 2 for value in range(10)])
+        finally:
+            executor.shutdown()
+
+    def test_invalid_executor_kind(self):
+        with self.assertRaises(ValueError):
+            AnalyzerExecutor(kinds={"nltk": "gpu"})
+        with self.assertRaises(ValueError):
+            AnalyzerExecutor(kinds={"transformers": "process"})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,210 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import asyncio
+import json
+import msgpack
+import asgi_api
+from admission_control import AdmissionController
+
+def call_app(method, path, body=b"", client=("10.0.0.1", 1234), headers=()):
+    """
+    Runs one HTTP request through the ASGI app and returns (status, decoded JSON or MessagePack body).
+    """
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": method, "path": path, "client": client, "headers": list(headers)}
+    asyncio.run(asgi_api.app(scope, receive, send))
+    status = sent[0]["status"]
+    body = b"".join(m.get("body", b"") for m in sent[1:])
+    if (b"content-type", b"application/msgpack") in sent[0]["headers"]:
+        return status, msgpack.unpackb(body)
+    return status, json.loads(body)
+
+def call_stream(path, chunks, client=("10.0.0.1", 1234)):
+    """
+    Streams a request body to the ASGI app in chunks and returns (status, NDJSON lines, receive calls).
+    """
+    messages = [{"type": "http.request", "body": chunk, "more_body": i < len(chunks) - 1}
+                for i, chunk in enumerate(chunks)]
+    sent = []
+    received = []
+
+    async def receive():
+        received.append(len(sent))
+        return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    path, _, query = path.partition("?")
+    scope = {"type": "http", "method": "POST", "path": path, "query_string": query.encode(),
+             "client": client, "headers": []}
+    asyncio.run(asgi_api.app(scope, receive, send))
+    body = b"".join(m.get("body", b"") for m in sent[1:])
+    return sent[0]["status"], [json.loads(line) for line in body.splitlines()], received
+
+class TestASGIAPI(unittest.TestCase):
+    def setUp(self):
+        patcher = patch("asgi_api.get_model_registry")
+        self.mock_registry = patcher.start().return_value
+        self.mock_registry.ready = True
+        self.mock_registry.get.return_value = MagicMock()
+        self.addCleanup(patcher.stop)
+
+    @patch("asgi_api.analyze_sentiment_combined")
+    def test_analyze_endpoint_valid(self, mock_analyze):
+        mock_analyze.return_value = {
+            "text": "I love this product!",
+            "textblob": "Positive",
+            "nltk": "Positive",
+            "transformers": {"label": "Positive", "confidence": 0.95}
+        }
+        status, payload = call_app("POST", "/analyze", json.dumps({"text": "I love this product!"}).encode())
+        self.assertEqual(status, 200)
+        self.assertEqual(payload["transformers"]["label"], "Positive")
+
+    @patch("stream_processing.analyze_sentiment_batch")
+    def test_analyze_stream_endpoint(self, mock_analyze_batch):
+        async def fake_batch(texts, _):
+            return [{"text": text, "textblob": "Neutral", "nltk": "Neutral",
+                     "transformers": {"label": "Neutral", "confidence": 0.5}} for text in texts]
+        mock_analyze_batch.side_effect = fake_batch
+        chunks = [b'"one"\n{"te', b'xt": "two"}\nnot json\n', b'"x' + b"y" * 100 + b'"\n"last"']
+        with patch("asgi_api.STREAM_BATCH_SIZE", 2), patch("asgi_api.STREAM_MAX_LINE_BYTES", 50):
+            status, lines, _ = call_stream("/analyze/stream?include_text=false", chunks, client=("10.0.1.1", 1))
+        self.assertEqual(status, 200)
+        self.assertEqual([line["index"] for line in lines], [0, 1, 2, 3, 4])
+        self.assertEqual(lines[1]["textblob"], "Neutral")
+        self.assertNotIn("text", lines[1])
+        self.assertIn("error", lines[2])
+        self.assertIn("exceeds", lines[3]["error"])
+
+    @patch("stream_processing.analyze_sentiment_batch")
+    def test_analyze_stream_endpoint_backpressure(self, mock_analyze_batch):
+        async def fake_batch(texts, _):
+            return [{"text": text} for text in texts]
+        mock_analyze_batch.side_effect = fake_batch
+        chunks = [f'"text {i}"\n'.encode() for i in range(6)]
+        with patch("asgi_api.STREAM_BATCH_SIZE", 1), patch("asgi_api.inference_backlogged", return_value=True):
+            status, lines, received = call_stream("/analyze/stream", chunks, client=("10.0.1.2", 1))
+        self.assertEqual(status, 200)
+        self.assertEqual([line["text"] for line in lines], [f"text {i}" for i in range(6)])
+        # While backlogged, each chunk is read only after the previous result was sent
+        self.assertEqual(received, [0, 2, 3, 4, 5, 6])
+
+    def test_analyze_endpoint_invalid(self):
+        status, payload = call_app("POST", "/analyze", b"{}", client=("10.0.0.2", 1))
+        self.assertEqual(status, 400)
+        self.assertEqual(payload["error"], "Missing 'text' in request")
+
+    @patch("asgi_api.analyze_sentiment_combined")
+    def test_analyze_endpoint_accepts_escaped_text_at_max_length(self, mock_analyze):
+        mock_analyze.return_value = {"text": "", "textblob": "Positive", "nltk": "Positive", "transformers": None}
+        body = json.dumps({"text": "\U0001F600" * asgi_api.MAX_INPUT_LENGTH}).encode()
+        self.assertGreater(len(body), asgi_api.MAX_INPUT_LENGTH * 4 + 1024)
+        status, _ = call_app("POST", "/analyze", body, client=("10.0.0.7", 1))
+        self.assertEqual(status, 200)
+
+    def test_analyze_endpoint_text_too_long(self):
+        body = json.dumps({"text": "a" * (asgi_api.MAX_INPUT_LENGTH + 1)}).encode()
+        status, payload = call_app("POST", "/analyze", body, client=("10.0.0.8", 1))
+        self.assertEqual(status, 400)
+        self.assertIn("exceeds", payload["error"])
+
+    def test_analyze_endpoint_invalid_json(self):
+        status, _ = call_app("POST", "/analyze", b"not json", client=("10.0.0.3", 1))
+        self.assertEqual(status, 400)
+
+    @patch("asgi_api.analyze_sentiment_combined")
+    def test_analyze_endpoint_error(self, mock_analyze):
+        mock_analyze.side_effect = Exception("Internal error")
+        status, _ = call_app("POST", "/analyze", json.dumps({"text": "text"}).encode(), client=("10.0.0.4", 1))
+        self.assertEqual(status, 500)
+
+    @patch("asgi_api.analyze_sentiment_combined")
+    def test_analyze_endpoint_msgpack_without_text(self, mock_analyze):
+        mock_analyze.return_value = {
+            "text": "I love this product!",
+            "textblob": "Positive",
+            "nltk": "Positive",
+            "transformers": {"label": "Positive", "confidence": 0.95}
+        }
+        body = json.dumps({"text": "I love this product!", "include_text": False}).encode()
+        status, payload = call_app("POST", "/analyze", body, client=("10.0.0.6", 1),
+                                   headers=[(b"accept", b"application/msgpack")])
+        self.assertEqual(status, 200)
+        self.assertNotIn("text", payload)
+        self.assertEqual(payload["transformers"]["label"], "Positive")
+
+    @patch("asgi_api.BATCH_RATE_LIMIT", asgi_api.parse("3 per minute"))
+    @patch("stream_processing.analyze_sentiment_batch")
+    def test_analyze_stream_rate_limit_sends_charged_batches(self, mock_analyze_batch):
+        async def slow_batch(texts, _):
+            await asyncio.sleep(0.05)
+            return [{"text": text} for text in texts]
+        mock_analyze_batch.side_effect = slow_batch
+        chunks = [f'"text {i}"\n'.encode() for i in range(6)]
+        with patch("asgi_api.STREAM_BATCH_SIZE", 1), patch("asgi_api.STREAM_WORKERS", 4):
+            status, lines, _ = call_stream("/analyze/stream", chunks, client=("10.0.1.3", 1))
+        self.assertEqual(status, 200)
+        self.assertEqual([line["text"] for line in lines[:-1]], ["text 0", "text 1", "text 2"])
+        self.assertIn("Rate limit exceeded", lines[-1]["error"])
+        self.assertIn("retry_after", lines[-1])
+
+    @patch("asgi_api.analyze_sentiment_combined")
+    def test_overload_sheds_with_503(self, mock_analyze):
+        controller = AdmissionController(max_concurrency=0, max_wait=0, max_queue=0)
+        body = json.dumps({"text": "I love this product!"}).encode()
+        with patch("asgi_api.get_admission_controller", return_value=controller):
+            status, payload = call_app("POST", "/analyze", body, client=("10.0.3.1", 1))
+            self.assertEqual(status, 503)
+            self.assertEqual(payload["error"], "Server overloaded, retry later")
+            call_app("POST", "/analyze", body, client=("10.0.3.1", 1), headers=[(b"x-priority", b"low")])
+            status, _, _ = call_stream("/analyze/stream", [b'"one"\n'], client=("10.0.3.1", 1))
+            self.assertEqual(status, 503)
+        mock_analyze.assert_not_called()
+        self.assertEqual(controller.stats()["shed"], {"high": 1, "low": 2})
+
+    @patch("asgi_api.analyze_sentiment_combined")
+    def test_overload_degrades_to_lexicon_mode(self, mock_analyze):
+        mock_analyze.return_value = {"text": "text", "textblob": "Positive", "nltk": "Positive",
+                                     "transformers": None, "tiers": ["textblob", "nltk"], "degraded": True}
+        controller = AdmissionController(max_concurrency=4)
+        with patch("asgi_api.get_admission_controller", return_value=controller), \
+                patch.object(controller, "should_degrade", return_value=True):
+            status, payload = call_app("POST", "/analyze", json.dumps({"text": "text"}).encode(),
+                                       client=("10.0.3.2", 1))
+        self.assertEqual(status, 200)
+        self.assertTrue(payload["degraded"])
+        self.assertEqual(mock_analyze.call_args.kwargs["mode"], "lexicon")
+        self.assertEqual(controller.stats()["in_flight"], 0)
+        self.assertEqual(controller.stats()["admitted"]["high"], 1)
+
+    def test_unknown_route(self):
+        self.assertEqual(call_app("GET", "/missing")[0], 404)
+        self.assertEqual(call_app("GET", "/analyze")[0], 405)
+
+    @patch("asgi_api.RATE_LIMIT", asgi_api.parse("1 per minute"))
+    @patch("asgi_api.analyze_sentiment_combined")
+    def test_rate_limit(self, mock_analyze):
+        mock_analyze.return_value = {"text": "text"}
+        body = json.dumps({"text": "text"}).encode()
+        self.assertEqual(call_app("POST", "/analyze", body, client=("10.0.0.5", 1))[0], 200)
+        self.assertEqual(call_app("POST", "/analyze", body, client=("10.0.0.5", 1))[0], 429)
+
+    def test_health_reports_loading(self):
+        self.mock_registry.ready = False
+        self.mock_registry.health.return_value = {"status": "loading"}
+        status, payload = call_app("GET", "/health")
+        self.assertEqual(status, 503)
+        self.assertEqual(payload["status"], "loading")
+
+if __name__ == '__main__':
+    unittest.main()
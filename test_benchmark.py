@@ -0,0 +1,56 @@
+import unittest
+from benchmark import generate_texts, summarize, run_load, compare, bench_stages, flask_sender
+from inference_backends import StubSentimentPipeline
+from inference_scheduler import InferenceScheduler
+from utils import MAX_INPUT_LENGTH
+
+class TestBenchmark(unittest.TestCase):
+    def test_generate_texts_is_reproducible_and_unique(self):
+        texts = generate_texts(50, seed=7)
+        self.assertEqual(texts, generate_texts(50, seed=7))
+        self.assertEqual(len({text for _, text in texts}), 50)
+        self.assertTrue(all(len(text) <= MAX_INPUT_LENGTH for _, text in texts))
+
+    def test_summarize(self):
+        figures = summarize([i / 1000 for i in range(1, 101)])
+        self.assertAlmostEqual(figures["p50_ms"], 51.0)
+        self.assertAlmostEqual(figures["p99_ms"], 99.0)
+        self.assertEqual(summarize([])["count"], 0)
+
+    def test_bench_stages_with_stub_pipeline(self):
+        results = bench_stages(generate_texts(5), StubSentimentPipeline(batch_ms=0, text_ms=0))
+        self.assertEqual(set(results), {"sanitize", "detect_language", "textblob", "vader", "transformer"})
+        self.assertEqual(results["vader"]["count"], 5)
+
+    def test_bench_stages_times_the_model_without_the_batching_wait(self):
+        scheduler = InferenceScheduler(StubSentimentPipeline(batch_ms=0, text_ms=0), max_wait_ms=200)
+        self.addCleanup(scheduler.close)
+        results = bench_stages(generate_texts(3), scheduler)
+        self.assertLess(results["transformer"]["p50_ms"], 100)
+
+    def test_flask_sender_disables_admission_control(self):
+        import admission_control
+        from flask_api import limiter
+        self.addCleanup(setattr, admission_control, "ADMISSION_MAX_CONCURRENCY", admission_control.ADMISSION_MAX_CONCURRENCY)
+        self.addCleanup(setattr, limiter, "enabled", limiter.enabled)
+        flask_sender()
+        self.assertIsNone(admission_control.get_admission_controller())
+
+    def test_run_load_counts_errors(self):
+        report = run_load(lambda text: 200 if text != "bad" else 500, ["a", "bad", "c", "d"], concurrency=2)
+        self.assertEqual(report["count"], 4)
+        self.assertEqual(report["errors"], 1)
+        self.assertGreater(report["throughput_rps"], 0)
+
+    def test_compare_flags_regressions(self):
+        baseline = {"stages": {"vader": {"p50_ms": 1.0, "p95_ms": 2.0}},
+                    "load": {"4": {"throughput_rps": 100.0, "p95_ms": 50.0}}}
+        current = {"stages": {"vader": {"p50_ms": 1.1, "p95_ms": 3.0}},
+                   "load": {"4": {"throughput_rps": 60.0, "p95_ms": 50.0}}}
+        regressions = compare(current, baseline, threshold=0.2)
+        self.assertEqual(len(regressions), 2)
+        self.assertTrue(regressions[0].startswith("stage vader p95_ms"))
+        self.assertTrue(regressions[1].startswith("load c=4 throughput_rps"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import unittest
+from unittest.mock import MagicMock
+from io import StringIO
+from cascade_benchmark import read_labelled_texts, score_texts, sweep
+
+class TestCascadeBenchmark(unittest.TestCase):
+    def test_read_labelled_texts(self):
+        texts, labels = read_labelled_texts(StringIO('{"text": "good", "label": "positive"}\n\n{"text": "bad", "label": "NEGATIVE"}\n'))
+        self.assertEqual(texts, ["good", "bad"])
+        self.assertEqual(labels, ["Positive", "Negative"])
+        self.assertIsNone(read_labelled_texts(StringIO('{"text": "good"}\n'))[1])
+
+    def test_score_texts(self):
+        mock_pipeline = MagicMock(side_effect=lambda texts, batch_size, **kwargs: [{"label": "POSITIVE", "score": 0.9}] * len(texts))
+        mock_pipeline.tokenizer = None
+        scored = score_texts(["I love it", "Great value", "Fine"], mock_pipeline, batch_size=2)
+        self.assertEqual(mock_pipeline.call_count, 2)
+        self.assertEqual([item["transformers_label"] for item in scored], ["Positive"] * 3)
+        self.assertGreater(scored[0]["compound"], 0)
+
+    def test_score_texts_chunks_long_texts(self):
+        mock_pipeline = MagicMock(side_effect=lambda texts, batch_size, **kwargs: [{"label": "NEGATIVE", "score": 0.8}] * len(texts))
+        mock_pipeline.tokenizer = None
+        scored = score_texts(["Short and fine", "This phone is great. " * 400], mock_pipeline)
+        inputs = mock_pipeline.call_args[0][0]
+        self.assertGreater(len(inputs), 2)  # The long text was split into chunks
+        self.assertTrue(all(len(text) < 4000 for text in inputs))
+        self.assertEqual([item["transformers_label"] for item in scored], ["Negative", "Negative"])
+
+    def test_sweep_trades_accuracy_for_throughput(self):
+        scored = [
+            {"polarity": 0.8, "compound": 0.9, "transformers_label": "Positive", "lexicon_seconds": 0.001, "transformers_seconds": 0.1},
+            {"polarity": 0.5, "compound": 0.3, "transformers_label": "Negative", "lexicon_seconds": 0.001, "transformers_seconds": 0.1}
+        ]
+        rows = sweep(scored, labels=["Positive", "Negative"], vader_bands=[0.0, 0.5], textblob_bands=[0.1])
+        loose, strict = rows
+        self.assertEqual(loose["transformer_rate"], 0.0)
+        self.assertEqual(loose["accuracy"], 0.5)  # The second text is wrongly answered by the lexicons
+        self.assertEqual(strict["transformer_rate"], 0.5)
+        self.assertEqual(strict["accuracy"], 1.0)
+        self.assertGreater(loose["speedup"], strict["speedup"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,6 +2,9 @@ import unittest
 from unittest.mock import patch, MagicMock
 from io import StringIO
 import sys
+import os
+import json
+import tempfile
 from module4 import cli
 
 class TestCLI(unittest.TestCase):
@@ -20,6 +23,18 @@ class TestCLI(unittest.TestCase):
                 output = fake_output.getvalue()
                 self.assertIn("Positive", output)
 
+    @patch("sentiment_analysis.detect_language", return_value=True)
+    @patch("sentiment_analysis.ANALYSIS_MODE", "cascade")
+    def test_cli_cascade_mode_without_transformer(self, mock_detect):
+        mock_pipeline = MagicMock()
+        with patch.object(sys, "argv", ["cli.py", "I love this wonderful product, it is amazing!"]):
+            with patch("sys.stdout", new=StringIO()) as fake_output:
+                cli(mock_pipeline)
+        output = fake_output.getvalue()
+        self.assertIn("- Transformers: skipped (tiers: textblob, nltk)", output)
+        self.assertNotIn("Unexpected error", output)
+        mock_pipeline.assert_not_called()
+
     def test_cli_input_exceeds_length(self):
         long_text = "a" * 15000
         with patch.object(sys, "argv", ["cli.py", long_text]):
@@ -45,5 +60,39 @@ class TestCLI(unittest.TestCase):
                 output = fake_output.getvalue()
                 self.assertIn("Text:", output)
 
+    @patch("module4.process_stream")
+    def test_cli_stream_mode(self, mock_process_stream):
+        with patch.object(sys, "argv", ["cli.py", "--input", "-", "--input-format", "jsonl", "--field", "body"]):
+            with patch("sys.stdin", new=StringIO('{"body": "I love this product!"}\n')):
+                cli(MagicMock())
+        mock_process_stream.assert_called_once()
+        records = mock_process_stream.call_args[0][0]
+        self.assertEqual(list(records), ["I love this product!"])
+
+    @patch("stream_processing.analyze_sentiment_batch")
+    def test_cli_stream_resume_drops_output_written_after_the_checkpoint(self, mock_analyze_batch):
+        async def fake_batch(texts, _):
+            return [{"text": text} for text in texts]
+        mock_analyze_batch.side_effect = fake_batch
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = {name: os.path.join(tmp, name) for name in ("in.txt", "out.jsonl", "progress.json")}
+            with open(paths["in.txt"], "w") as f:
+                f.write("".join(f"text {i}\n" for i in range(5)))
+            argv = ["cli.py", "--input", paths["in.txt"], "--output", paths["out.jsonl"],
+                    "--checkpoint", paths["progress.json"], "--batch-size", "1"]
+            with patch.object(sys, "argv", argv), patch("sys.stderr", new=StringIO()):
+                cli(MagicMock())
+                # Simulate a crash after record 3 was written but before its checkpoint
+                with open(paths["out.jsonl"]) as f:
+                    lines = f.readlines()
+                with open(paths["progress.json"], "w") as f:
+                    json.dump({"records": 2, "output_bytes": len("".join(lines[:2]))}, f)
+                with open(paths["out.jsonl"], "w") as f:
+                    f.writelines(lines[:3])
+                cli(MagicMock())
+            with open(paths["out.jsonl"]) as f:
+                indices = [json.loads(line)["index"] for line in f]
+        self.assertEqual(indices, [0, 1, 2, 3, 4])
+
 if __name__ == '__main__':
     unittest.main()
@@ -10,13 +10,13 @@ class TestEntryPoint(unittest.TestCase):
             main()
             mock_cli.assert_called_once()
 
-    @patch("module5.app.run")
+    @patch("flask_api.app.run")
     def test_api_mode(self, mock_run):
         with patch.object(sys, "argv", ["entry_point.py"]):
             main()
             mock_run.assert_called_once()
 
-    @patch("module5.load_ssl_context")
+    @patch("ssl_certificate.load_ssl_context")
     def test_missing_ssl_certificates(self, mock_load_ssl):
         mock_load_ssl.return_value = None
         with patch.object(sys, "argv", ["entry_point.py"]):
@@ -1,14 +1,24 @@
 import unittest
-from unittest.mock import patch
+from unittest.mock import patch, MagicMock
+import io
+import os
+import tempfile
 from module3 import app
 import json
+import msgpack
+from limits import parse
+from decouple import config
+from rate_limiting import RateLimitResult
+from job_queue import JobStore, JobQueue
+from admission_control import AdmissionController
 
 class TestFlaskAPI(unittest.TestCase):
     def setUp(self):
         self.client = app.test_client()
 
+    @patch("module3.get_pipeline")
     @patch("module3.analyze_sentiment_combined")
-    def test_analyze_endpoint_valid(self, mock_analyze):
+    def test_analyze_endpoint_valid(self, mock_analyze, mock_get_pipeline):
         mock_analyze.return_value = {
             "text": "I love this product!",
             "textblob": "Positive",
@@ -42,7 +52,9 @@ class TestFlaskAPI(unittest.TestCase):
         )
         self.assertEqual(response.status_code, 500)
 
-    def test_analyze_endpoint_large_input(self):
+    @patch("module3.get_pipeline")
+    def test_analyze_endpoint_large_input(self, mock_get_pipeline):
+        mock_get_pipeline.return_value = MagicMock(return_value=[{"label": "POSITIVE", "score": 0.9}], tokenizer=None)
         large_text = "a" * (10000 - 1)  # Just below MAX_INPUT_LENGTH
         response = self.client.post(
             "/analyze",
@@ -51,5 +63,224 @@ class TestFlaskAPI(unittest.TestCase):
         )
         self.assertEqual(response.status_code, 200)
 
+    @patch("module3.get_pipeline")
+    @patch("module3.analyze_sentiment_batch")
+    def test_analyze_batch_endpoint_valid(self, mock_analyze_batch, mock_get_pipeline):
+        mock_analyze_batch.return_value = [
+            {"text": "I love this product!", "textblob": "Positive", "nltk": "Positive",
+             "transformers": {"label": "Positive", "confidence": 0.95}},
+            {"text": "I hate this product!", "textblob": "Negative", "nltk": "Negative",
+             "transformers": {"label": "Negative", "confidence": 0.97}}
+        ]
+        response = self.client.post(
+            "/analyze/batch",
+            data=json.dumps({"texts": ["I love this product!", 42, "I hate this product!"]}),
+            content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 200)
+        results = response.get_json()["results"]
+        self.assertEqual(len(results), 3)
+        self.assertEqual(results[0]["textblob"], "Positive")
+        self.assertIn("error", results[1])
+        self.assertEqual(results[2]["textblob"], "Negative")
+
+    @patch("module3.get_pipeline")
+    @patch("module3.analyze_sentiment_batch")
+    def test_analyze_batch_endpoint_ndjson(self, mock_analyze_batch, mock_get_pipeline):
+        mock_analyze_batch.side_effect = lambda texts, _: [{"text": text} for text in texts]
+        response = self.client.post(
+            "/analyze/batch",
+            data='"first"\n{"text": "second"}\n',
+            content_type="application/x-ndjson"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([r["text"] for r in response.get_json()["results"]], ["first", "second"])
+
+    @patch("module3.get_pipeline")
+    @patch("module3.analyze_sentiment_batch")
+    def test_analyze_batch_endpoint_msgpack_without_text(self, mock_analyze_batch, mock_get_pipeline):
+        mock_analyze_batch.side_effect = lambda texts, _: [
+            {"text": text, "textblob": "Positive", "nltk": "Positive",
+             "transformers": {"label": "Positive", "confidence": 0.9}}
+            for text in texts
+        ]
+        response = self.client.post(
+            "/analyze/batch?include_text=false",
+            data=json.dumps(["I love this product!"]),
+            content_type="application/json",
+            headers={"Accept": "application/msgpack"}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, "application/msgpack")
+        self.assertIn("Accept", response.headers["Vary"])
+        results = msgpack.unpackb(response.data)["results"]
+        self.assertNotIn("text", results[0])
+        self.assertEqual(results[0]["transformers"]["label"], "Positive")
+
+    def test_analyze_batch_endpoint_invalid(self):
+        response = self.client.post(
+            "/analyze/batch",
+            data=json.dumps({"texts": "not a list"}),
+            content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 400)
+
+    @patch("module3.get_model_registry")
+    def test_health_endpoint_loading(self, mock_get_registry):
+        mock_get_registry.return_value.ready = False
+        mock_get_registry.return_value.health.return_value = {"status": "loading"}
+        response = self.client.get("/health")
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.get_json()["status"], "loading")
+
+    def test_metrics_endpoint(self):
+        self.client.post("/analyze", data=json.dumps({}), content_type="application/json")
+        response = self.client.get("/metrics")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith("text/plain"))
+        text = response.get_data(as_text=True)
+        self.assertIn('sentiment_requests_total{endpoint="/analyze",status="400"}', text)
+        self.assertIn("sentiment_request_seconds_bucket", text)
+        self.assertIn("sentiment_requests_in_flight", text)
+
+    @patch("module3.get_pipeline")
+    @patch("stream_processing.analyze_sentiment_batch")
+    def test_analyze_stream_endpoint(self, mock_analyze_batch, mock_get_pipeline):
+        async def fake_batch(texts, _):
+            return [{"text": text, "textblob": "Positive", "nltk": "Positive",
+                     "transformers": {"label": "Positive", "confidence": 0.5}} for text in texts]
+        mock_analyze_batch.side_effect = fake_batch
+        response = self.client.post(
+            "/analyze/stream?include_text=false",
+            data='"first"\nnot json\n\n{"text": "third"}\n',
+            content_type="application/x-ndjson"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, "application/x-ndjson")
+        lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        self.assertEqual([line["index"] for line in lines], [0, 1, 2])
+        self.assertEqual(lines[0]["textblob"], "Positive")
+        self.assertNotIn("text", lines[0])
+        self.assertIn("error", lines[1])
+
+    @patch("module3.get_pipeline")
+    @patch("stream_processing.analyze_sentiment_batch")
+    @patch("module3.STREAM_BATCH_SIZE", 2)
+    def test_analyze_stream_endpoint_rate_limit(self, mock_analyze_batch, mock_get_pipeline):
+        async def fake_batch(texts, _):
+            return [{"text": text} for text in texts]
+        mock_analyze_batch.side_effect = fake_batch
+        body = "".join(f'"text {i}"\n' for i in range(5))
+        rejected = RateLimitResult(False, 0, 2.5)
+        with patch("module3.limiter.hit", return_value=rejected):
+            response = self.client.post("/analyze/stream", data=body, content_type="application/x-ndjson")
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.headers["Retry-After"], "3")
+
+        with patch("module3.limiter.hit", side_effect=[RateLimitResult(True, 10, 0.0), rejected]):
+            response = self.client.post("/analyze/stream", data=body, content_type="application/x-ndjson")
+        self.assertEqual(response.status_code, 200)
+        lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        self.assertEqual([line.get("index") for line in lines], [0, 1, None])
+        self.assertEqual(lines[-1]["retry_after"], 3)
+
+    @patch("module3.get_pipeline")
+    @patch("stream_processing.analyze_sentiment_batch")
+    def test_analyze_stream_holds_admission_until_the_stream_ends(self, mock_analyze_batch, mock_get_pipeline):
+        async def fake_batch(texts, _):
+            return [{"text": text} for text in texts]
+        mock_analyze_batch.side_effect = fake_batch
+        controller = AdmissionController(max_concurrency=1)
+        with patch("module3.get_admission_controller", return_value=controller):
+            response = self.client.post("/analyze/stream", data='"one"\n"two"\n', content_type="application/x-ndjson",
+                                        buffered=False)
+            self.assertEqual(controller.stats()["in_flight"], 1)
+            self.assertEqual(len(response.get_data(as_text=True).splitlines()), 2)
+            response.close()
+        self.assertEqual(controller.stats()["in_flight"], 0)
+
+    @patch("stream_processing.analyze_sentiment_batch")
+    def test_job_endpoints(self, mock_analyze_batch):
+        async def fake_batch(texts, _):
+            return [{"text": text} for text in texts]
+        mock_analyze_batch.side_effect = fake_batch
+        with tempfile.TemporaryDirectory() as tmp:
+            queue = JobQueue(JobStore(os.path.join(tmp, "jobs.sqlite3")), pipeline_getter=MagicMock, workers=0,
+                             data_dir=os.path.join(tmp, "data"), input_dirs=[tmp])
+            with patch("module3.get_job_queue", return_value=queue):
+                response = self.client.post("/jobs?field=review", data="review\ngood\nbad\n",
+                                            content_type="text/csv", environ_base={"REMOTE_ADDR": "10.0.2.1"})
+                self.assertEqual(response.status_code, 202)
+                job = response.get_json()
+                self.assertEqual((job["status"], job["input_format"]), ("queued", "csv"))
+                self.assertEqual(response.headers["Location"], f"/jobs/{job['id']}")
+                self.assertEqual(self.client.get(f"/jobs/{job['id']}/results").status_code, 409)
+
+                queue.process(queue.store.claim())
+                status = self.client.get(f"/jobs/{job['id']}").get_json()
+                self.assertEqual((status["status"], status["processed"], status["total"]), ("completed", 2, 2))
+                response = self.client.get(f"/jobs/{job['id']}/results")
+                self.assertEqual(response.mimetype, "application/x-ndjson")
+                lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+                self.assertEqual([line["text"] for line in lines], ["good", "bad"])
+                self.assertEqual(self.client.post(f"/jobs/{job['id']}/cancel").status_code, 409)
+
+                response = self.client.post("/jobs", data={"file": (io.BytesIO(b'{"text": "hi"}\n'), "in.jsonl",
+                                                                    "application/x-ndjson")},
+                                            environ_base={"REMOTE_ADDR": "10.0.2.1"})
+                self.assertEqual(response.get_json()["input_format"], "jsonl")
+                cancelled = self.client.post(f"/jobs/{response.get_json()['id']}/cancel").get_json()
+                self.assertEqual(cancelled["status"], "cancelled")
+
+                response = self.client.post("/jobs", json={"path": "/etc/passwd"}, environ_base={"REMOTE_ADDR": "10.0.2.1"})
+                self.assertEqual(response.status_code, 403)
+                self.assertEqual(self.client.get("/jobs/missing").status_code, 404)
+
+    @patch("module3.analyze_sentiment_batch")
+    @patch("module3.analyze_sentiment_combined")
+    def test_overload_sheds_with_503(self, mock_analyze, mock_analyze_batch):
+        controller = AdmissionController(max_concurrency=0, max_wait=0, max_queue=0)
+        with patch("module3.get_admission_controller", return_value=controller):
+            response = self.client.post("/analyze", json={"text": "I love this product!"},
+                                        environ_base={"REMOTE_ADDR": "10.0.3.1"})
+            self.assertEqual(response.status_code, 503)
+            self.assertEqual(response.headers["Retry-After"], "1")
+            response = self.client.post("/analyze/batch", json=["good", "bad"], headers={"X-Priority": "high"},
+                                        environ_base={"REMOTE_ADDR": "10.0.3.1"})
+            self.assertEqual(response.status_code, 503)
+        mock_analyze.assert_not_called()
+        mock_analyze_batch.assert_not_called()
+        self.assertEqual(controller.stats()["shed"], {"high": 1, "low": 1})
+
+    @patch("module2.detect_language", return_value=True)
+    def test_overload_degrades_to_lexicon_results(self, mock_detect):
+        controller = AdmissionController(max_concurrency=4)
+        mock_pipeline = MagicMock()
+        with patch("module3.get_admission_controller", return_value=controller), \
+                patch("module3.get_pipeline", return_value=mock_pipeline), \
+                patch.object(controller, "should_degrade", return_value=True):
+            response = self.client.post("/analyze", json={"text": "A degraded but lovely answer"},
+                                        environ_base={"REMOTE_ADDR": "10.0.3.2"})
+        self.assertEqual(response.status_code, 200)
+        result = response.get_json()
+        self.assertTrue(result["degraded"])
+        self.assertIsNone(result["transformers"])
+        self.assertEqual(result["textblob"], "Positive")
+        mock_pipeline.assert_not_called()
+        self.assertEqual(controller.stats()["in_flight"], 0)
+
+    def test_rate_limit(self):
+        environ = {"REMOTE_ADDR": "10.0.0.9"}
+        limit = parse(config("RATE_LIMIT", default="10 per minute"))
+        for _ in range(limit.amount):
+            response = self.client.post("/analyze", json={}, environ_base=environ)
+            self.assertEqual(response.status_code, 400)
+        response = self.client.post("/analyze", json={}, environ_base=environ)
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response.headers["Retry-After"]), 0)
+        # Other clients keep their own budget
+        response = self.client.post("/analyze", json={}, environ_base={"REMOTE_ADDR": "10.0.0.10"})
+        self.assertEqual(response.status_code, 400)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+from types import SimpleNamespace
+import numpy as np
+from inference_backends import OnnxSentimentPipeline, StubSentimentPipeline, load_backend
+
+class FakeSession:
+    def __init__(self):
+        self.batches = []
+
+    def get_inputs(self):
+        return [SimpleNamespace(name="input_ids"), SimpleNamespace(name="attention_mask")]
+
+    def run(self, output_names, feeds):
+        self.batches.append(len(feeds["input_ids"]))
+        # Positive logits for texts containing "good" (token id 2)
+        return [np.array([[0.0, 3.0] if 2 in ids else [2.0, 0.0] for ids in feeds["input_ids"]])]
+
+def fake_tokenizer(texts, **kwargs):
+    ids = [[2 if "good" in text else 1] for text in texts]
+    return {"input_ids": np.array(ids), "attention_mask": np.ones((len(texts), 1)), "token_type_ids": np.zeros((len(texts), 1))}
+
+class TestOnnxSentimentPipeline(unittest.TestCase):
+    def setUp(self):
+        self.session = FakeSession()
+        self.pipeline = OnnxSentimentPipeline(lambda: self.session, fake_tokenizer,
+                                              {"0": "NEGATIVE", "1": "POSITIVE"}, "model:onnx")
+
+    def test_pipeline_interface(self):
+        single = self.pipeline("good stuff")
+        self.assertEqual(len(single), 1)
+        self.assertEqual(single[0]["label"], "POSITIVE")
+        self.assertAlmostEqual(single[0]["score"], 1 / (1 + np.exp(-3.0)))
+        results = self.pipeline(["good", "bad", "good", "bad", "bad"], batch_size=2)
+        self.assertEqual([r["label"] for r in results], ["POSITIVE", "NEGATIVE", "POSITIVE", "NEGATIVE", "NEGATIVE"])
+        self.assertEqual(self.session.batches[1:], [2, 2, 1])
+        self.assertEqual(self.pipeline.model.name_or_path, "model:onnx")
+
+    def test_load_backend_errors(self):
+        with self.assertRaises(ValueError):
+            load_backend("tensorrt")
+        with self.assertRaises(FileNotFoundError):
+            load_backend("onnx-int8", model_dir="/nonexistent")
+
+class TestStubSentimentPipeline(unittest.TestCase):
+    def test_stub_pipeline(self):
+        stub = load_backend("stub")
+        self.assertIsInstance(stub, StubSentimentPipeline)
+        stub.batch_ms = stub.text_ms = 0
+        self.assertEqual(stub("I love it")[0]["label"], "POSITIVE")
+        self.assertEqual([r["label"] for r in stub(["meh", "great"], batch_size=2)], ["NEGATIVE", "POSITIVE"])
+
+if __name__ == '__main__':
+    unittest.main()
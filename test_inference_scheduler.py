@@ -0,0 +1,63 @@
+import unittest
+import threading
+from unittest.mock import MagicMock
+from inference_scheduler import InferenceScheduler, Histogram
+
+def fake_pipeline(texts, batch_size=None, **kwargs):
+    return [{"label": "POSITIVE", "score": len(text) / 100} for text in texts]
+
+class TestInferenceScheduler(unittest.TestCase):
+    def test_submit_returns_result_for_each_text(self):
+        scheduler = InferenceScheduler(fake_pipeline, max_batch_size=8, max_wait_ms=20)
+        try:
+            futures = {text: scheduler.submit(text) for text in ("a", "bb", "ccc")}
+            for text, future in futures.items():
+                self.assertEqual(future.result(timeout=5)["score"], len(text) / 100)
+        finally:
+            scheduler.close()
+
+    def test_concurrent_requests_share_a_batch(self):
+        mock_pipeline = MagicMock(side_effect=fake_pipeline)
+        scheduler = InferenceScheduler(mock_pipeline, max_batch_size=16, max_wait_ms=200)
+        try:
+            results = []
+            threads = [threading.Thread(target=lambda: results.append(scheduler("same length")))
+                       for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertEqual(len(results), 8)
+            self.assertLess(mock_pipeline.call_count, 8)
+            self.assertEqual(scheduler.stats()["requests"], 8)
+        finally:
+            scheduler.close()
+
+    def test_length_buckets_split_dissimilar_texts(self):
+        mock_pipeline = MagicMock(side_effect=fake_pipeline)
+        scheduler = InferenceScheduler(mock_pipeline, max_batch_size=4, max_wait_ms=200, pad_ratio=2.0)
+        try:
+            results = scheduler(["short", "x" * 500, "tiny", "y" * 450])
+            self.assertEqual([r["score"] for r in results], [0.05, 5.0, 0.04, 4.5])
+            self.assertEqual(mock_pipeline.call_count, 2)
+        finally:
+            scheduler.close()
+
+    def test_pipeline_error_propagates_to_callers(self):
+        scheduler = InferenceScheduler(MagicMock(side_effect=RuntimeError("boom")), max_wait_ms=1)
+        try:
+            with self.assertRaises(RuntimeError):
+                scheduler.submit("text").result(timeout=5)
+        finally:
+            scheduler.close()
+
+    def test_histogram_buckets(self):
+        histogram = Histogram(bounds=(1, 4))
+        for value in (1, 3, 10):
+            histogram.observe(value)
+        snapshot = histogram.snapshot()
+        self.assertEqual(snapshot["buckets"], {"1": 1, "4": 1, "+Inf": 1})
+        self.assertEqual(snapshot["sum"], 14)
+
+if __name__ == '__main__':
+    unittest.main()
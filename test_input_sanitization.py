@@ -1,6 +1,7 @@
 import unittest
 from unittest.mock import patch
-from module1 import sanitize_input, detect_language
+import module1
+from module1 import sanitize_input, sanitize_many, SanitizerEngine, detect_language, detect_language_code, detect_languages, detect_language_many
 
 class TestInputSanitization(unittest.TestCase):
     def test_sanitize_input_valid(self):
@@ -18,6 +19,27 @@ class TestInputSanitization(unittest.TestCase):
         non_ascii_text = "こんにちは"  # Japanese greeting
         self.assertEqual(sanitize_input(non_ascii_text), non_ascii_text)
 
+    def test_sanitize_many(self):
+        self.assertEqual(sanitize_many(["<b>Hi</b>\nthere", "  ", None]), ["Hi there", None, None])
+
+    def test_sanitizer_truncates_at_tag_boundary(self):
+        engine = SanitizerEngine(max_length=10)
+        text = "abcdefgh<a href='" + "x" * 50 + "'>ijklmnop"
+        self.assertEqual(engine.sanitize(text), "abcdefghij")
+        self.assertEqual(engine.sanitize("<p>" * 20 + "\r\n  short  </p>"), "short")
+
+    def test_sanitizer_stats(self):
+        engine = SanitizerEngine(max_length=5)
+        self.assertEqual(engine.sanitize_with_stats(" <i>abc</i> "), ("abc", 9, 0))
+        self.assertEqual(engine.sanitize_with_stats("abcdefgh"), ("abcde", 0, 3))
+        engine.sanitize("")
+        stats = engine.stats()
+        self.assertEqual(stats["inputs"], 3)
+        self.assertEqual(stats["invalid"], 1)
+        self.assertEqual(stats["truncated"], 1)
+        self.assertEqual(stats["chars_removed"], 9)
+        self.assertEqual(stats["chars_truncated"], 3)
+
     @patch("module1.config")
     def test_detect_language_supported(self, mock_config):
         mock_config.return_value = "en,es,fr"
@@ -34,5 +56,38 @@ class TestInputSanitization(unittest.TestCase):
         mock_config.return_value = "en,es,fr"
         self.assertTrue(detect_language("1234567890"))  # Fallback
 
+    @patch("module1.STRICT_LANGUAGE_CHECK", False)
+    @patch("module1.detect")
+    def test_detect_language_skipped_when_not_strict(self, mock_detect):
+        self.assertTrue(detect_language("Ciao, come stai?"))
+        self.assertEqual(detect_language_many(["Ciao", "Hallo"]), [True, True])
+        mock_detect.assert_not_called()
+
+    @patch("module1.STRICT_LANGUAGE_CHECK", True)
+    def test_detect_language_strict(self):
+        self.assertTrue(detect_language("I love this product, it works really well!"))
+        self.assertFalse(detect_language("1234567890"))  # Detection fails
+        self.assertEqual(detect_language_many(["Me encanta este producto, es muy bueno.", "1234567890"]),
+                         [True, False])
+
+    @patch("module1.detect", return_value="en")
+    def test_detect_language_code_cached_on_prefix(self, mock_detect):
+        module1._language_cache.clear()
+        long_text = "word " * 1000
+        self.assertEqual(detect_language_code(long_text), "en")
+        self.assertEqual(detect_language_code(long_text), "en")
+        mock_detect.assert_called_once()
+        sample = mock_detect.call_args[0][0]
+        self.assertLessEqual(len(sample), module1.LANGUAGE_SAMPLE_CHARS)
+        self.assertTrue(sample.endswith("word"))
+
+    def test_detect_languages_deterministic(self):
+        module1._language_cache.clear()
+        texts = ["Bonjour, je suis très content de ce produit.", "Hola amigos"] * 3
+        first = detect_languages(texts)
+        module1._language_cache.clear()
+        self.assertEqual(detect_languages(texts), first)
+        self.assertEqual(first[0], "fr")
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,174 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import json
+import os
+import tempfile
+import time
+import asyncio
+import threading
+from job_queue import (
+    JobStore, JobQueue, JobLost, job_summary, UploadTooLarge, QUEUED, RUNNING, COMPLETED, CANCELLED, FAILED
+)
+
+async def fake_analyze_batch(texts, transformers_pipeline):
+    return [{"text": text, "textblob": "Positive", "nltk": "Positive",
+             "transformers": {"label": "Positive", "confidence": 0.9}} for text in texts]
+
+class JobTestCase(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = tmp.name
+        self.store = JobStore(os.path.join(self.tmp, "jobs.sqlite3"))
+        self.queue = JobQueue(self.store, pipeline_getter=MagicMock, workers=1, data_dir=os.path.join(self.tmp, "data"),
+                              batch_size=2, poll_interval=0.01, input_dirs=[self.tmp])
+        patcher = patch("stream_processing.analyze_sentiment_batch", side_effect=fake_analyze_batch)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def write_input(self, lines, name="input.jsonl"):
+        path = os.path.join(self.tmp, name)
+        with open(path, "w") as f:
+            f.write("".join(line + "\n" for line in lines))
+        return path
+
+    def read_results(self, job_id):
+        with open(self.store.get(job_id)["result_path"]) as f:
+            return [json.loads(line) for line in f]
+
+class TestJobStore(JobTestCase):
+    def test_claims_each_job_once_in_order(self):
+        first = self.store.create("a", "text", None, "a.out")
+        second = self.store.create("b", "text", None, "b.out")
+        self.assertEqual(self.store.claim()["id"], first["id"])
+        self.assertEqual(self.store.claim()["id"], second["id"])
+        self.assertIsNone(self.store.claim())
+        self.assertEqual(self.store.get(first["id"])["status"], RUNNING)
+
+    def test_stale_running_jobs_are_claimed_again(self):
+        job = self.store.create("a", "text", None, "a.out")
+        self.store.claim()
+        self.assertIsNone(self.store.claim(stale_seconds=60))
+        self.assertEqual(self.store.claim(stale_seconds=-1)["id"], job["id"])
+
+    def test_reclaimed_job_fences_out_the_previous_owner(self):
+        job = self.store.create("a", "text", None, "a.out")
+        stale_owner = self.store.claim()
+        new_owner = self.store.claim(stale_seconds=-1)
+        self.assertNotEqual(stale_owner["claim_token"], new_owner["claim_token"])
+        with self.assertRaises(JobLost):
+            self.store.record_progress(job["id"], 5, 50, stale_owner["claim_token"])
+        self.assertFalse(self.store.heartbeat(job["id"], stale_owner["claim_token"]))
+        self.store.finish(job["id"], FAILED, "stale", stale_owner["claim_token"])
+        self.assertTrue(self.store.heartbeat(job["id"], new_owner["claim_token"]))
+        self.assertEqual(self.store.record_progress(job["id"], 1, 10, new_owner["claim_token"]), False)
+        current = self.store.get(job["id"])
+        self.assertEqual((current["status"], current["processed"]), (RUNNING, 1))
+
+    def test_cancel(self):
+        queued = self.store.create("a", "text", None, "a.out")
+        self.assertEqual(self.store.cancel(queued["id"])["status"], CANCELLED)
+        running = self.store.create("b", "text", None, "b.out")
+        self.store.claim()
+        self.assertEqual(self.store.cancel(running["id"])["status"], RUNNING)
+        self.assertTrue(self.store.record_progress(running["id"], 1, 10))
+        self.assertIsNone(self.store.cancel("missing"))
+
+    def test_survives_reopening(self):
+        job = self.store.create("a", "jsonl", "body", "a.out")
+        reopened = JobStore(self.store.path)
+        self.assertEqual(reopened.get(job["id"])["field"], "body")
+        self.assertEqual(job_summary(reopened.get(job["id"]))["status"], QUEUED)
+
+class TestJobQueue(JobTestCase):
+    def test_process_job(self):
+        path = self.write_input(['{"text": "one"}', "not json", '{"text": "three"}'])
+        job = self.queue.submit_path(path, "jsonl")
+        self.queue.process(self.store.claim())
+        finished = self.store.get(job["id"])
+        self.assertEqual(finished["status"], COMPLETED)
+        self.assertEqual((finished["processed"], finished["total"]), (3, 3))
+        results = self.read_results(job["id"])
+        self.assertEqual([result["index"] for result in results], [0, 1, 2])
+        self.assertEqual(results[0]["text"], "one")
+        self.assertIn("error", results[1])
+        self.assertEqual(job_summary(finished)["progress"], 1.0)
+
+    def test_resume_from_checkpoint_discards_unrecorded_results(self):
+        job = self.queue.submit_upload([b"one\ntwo\nthree\nfour\nfive\n"], "text")
+        self.queue.process(self.store.claim())
+        with open(job["result_path"]) as f:
+            lines = f.readlines()
+        # Pretend the worker died after checkpointing two records but writing three
+        self.store.requeue(job["id"])
+        self.store._execute("UPDATE jobs SET status = ?, processed = 2, result_bytes = ? WHERE id = ?",
+                            (QUEUED, len("".join(lines[:2]).encode()), job["id"]))
+        with open(job["result_path"], "w") as f:
+            f.writelines(lines[:3])
+        self.queue.process(self.store.claim())
+        results = self.read_results(job["id"])
+        self.assertEqual([result["index"] for result in results], [0, 1, 2, 3, 4])
+        self.assertEqual([result["text"] for result in results], ["one", "two", "three", "four", "five"])
+
+    def test_cancel_running_job_stops_after_current_batch(self):
+        job = self.queue.submit_upload([b"".join(b"text %d\n" % i for i in range(10))], "text")
+        claimed = self.store.claim()
+        self.store.cancel(job["id"])
+        self.queue.process(claimed)
+        cancelled = self.store.get(job["id"])
+        self.assertEqual(cancelled["status"], CANCELLED)
+        self.assertEqual(cancelled["processed"], 2)
+
+    def test_heartbeat_keeps_a_slow_job_from_going_stale(self):
+        async def slow_batch(texts, transformers_pipeline):
+            await asyncio.sleep(0.2)
+            return await fake_analyze_batch(texts, transformers_pipeline)
+        self.queue.heartbeat_interval = 0.01
+        job = self.queue.submit_upload([b"one\ntwo\n"], "text")
+        with patch("stream_processing.analyze_sentiment_batch", side_effect=slow_batch):
+            worker = threading.Thread(target=self.queue.process, args=(self.store.claim(),))
+            worker.start()
+            time.sleep(0.1)
+            self.assertIsNone(self.store.claim(stale_seconds=0.05))
+            worker.join(5)
+        self.assertEqual(self.store.get(job["id"])["status"], COMPLETED)
+
+    def test_worker_stops_when_its_job_is_claimed_again(self):
+        job = self.queue.submit_upload([b"one\ntwo\nthree\n"], "text")
+        stale_owner = self.store.claim()
+        new_owner = self.store.claim(stale_seconds=-1)
+        self.queue.process(stale_owner)
+        current = self.store.get(job["id"])
+        self.assertEqual((current["status"], current["processed"]), (RUNNING, 0))
+        self.assertEqual(current["claim_token"], new_owner["claim_token"])
+        self.assertFalse(os.path.exists(job["result_path"]))  # The stale owner never touched the results
+
+    def test_failed_job_records_error(self):
+        job = self.queue.submit_upload([b"id,review\n1,good\n"], "csv", field="missing")
+        self.queue.process(self.store.claim())
+        failed = self.store.get(job["id"])
+        self.assertEqual(failed["status"], FAILED)
+        self.assertIn("missing", failed["error"])
+
+    def test_submit_validation(self):
+        with self.assertRaises(PermissionError):
+            self.queue.submit_path("/etc/hostname", "text")
+        with self.assertRaises(ValueError):
+            self.queue.submit_path(os.path.join(self.tmp, "missing.txt"), "text")
+        with self.assertRaises(ValueError):
+            self.queue.submit_upload([b"x"], "xml")
+        with self.assertRaises(UploadTooLarge):
+            self.queue.submit_upload([b"x" * 10, b"x" * 10], "text", max_bytes=15)
+        self.assertEqual(os.listdir(self.queue.data_dir), [])
+
+    def test_workers_run_submitted_jobs(self):
+        self.queue.start()
+        self.addCleanup(self.queue.stop, 5)
+        job = self.queue.submit_upload([b"good\nbad\nfine\n"], "text")
+        deadline = time.monotonic() + 5
+        while self.store.get(job["id"])["status"] != COMPLETED and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(len(self.read_results(job["id"])), 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+import timeit
+from metrics import MetricsRegistry, histogram_samples
+
+class TestMetricsRegistry(unittest.TestCase):
+    def test_render_histogram_counter_and_gauge(self):
+        registry = MetricsRegistry(enabled=True)
+        registry.describe("stage_seconds", "Stage time.")
+        registry.observe("stage_seconds", 0.0002, stage="sanitize")
+        registry.observe("stage_seconds", 3.0, stage="sanitize")
+        registry.inc("requests_total", endpoint="/analyze", status=200)
+        registry.add_gauge("in_flight", 1)
+        registry.add_gauge("in_flight", -1)
+        text = registry.render()
+        self.assertIn("# HELP stage_seconds Stage time.", text)
+        self.assertIn("# TYPE stage_seconds histogram", text)
+        self.assertIn('stage_seconds_bucket{stage="sanitize",le="0.00025"} 1', text)
+        self.assertIn('stage_seconds_bucket{stage="sanitize",le="+Inf"} 2', text)
+        self.assertIn('stage_seconds_count{stage="sanitize"} 2', text)
+        self.assertIn('requests_total{endpoint="/analyze",status="200"} 1', text)
+        self.assertIn("in_flight 0", text)
+
+    def test_timer_and_disabled_registry(self):
+        registry = MetricsRegistry(enabled=True)
+        with registry.time("block_seconds"):
+            pass
+        self.assertIn("block_seconds_count 1", registry.render())
+        disabled = MetricsRegistry(enabled=False)
+        disabled.observe("block_seconds", 1.0)
+        self.assertNotIn("block_seconds", disabled.render())
+
+    def test_failing_collector_is_skipped(self):
+        registry = MetricsRegistry(enabled=True)
+        registry.register_collector(lambda: [("up", "gauge", "", [("up", {}, 1)])])
+        registry.register_collector(lambda: 1 / 0)
+        self.assertIn("up 1", registry.render())
+
+    def test_histogram_samples_are_cumulative(self):
+        samples = histogram_samples("batch", {"buckets": {"1": 2, "2": 3, "+Inf": 1}, "count": 6, "sum": 9}, {})
+        self.assertEqual([value for _, _, value in samples], [2, 5, 6, 9, 6])
+
+    def test_observe_is_cheap(self):
+        registry = MetricsRegistry(enabled=True)
+        seconds = timeit.timeit(lambda: registry.observe("stage_seconds", 0.001, stage="vader"), number=10000) / 10000
+        self.assertLess(seconds, 0.0001)  # Far below 1% of a millisecond-scale request
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,19 @@
+import unittest
+from model_export import compare_backends
+
+def fake_pipeline(flip=()):
+    def run(texts, batch_size=None):
+        return [{"label": ("NEGATIVE" if text in flip else "POSITIVE"), "score": 0.9} for text in texts]
+    return run
+
+class TestModelExport(unittest.TestCase):
+    def test_compare_backends(self):
+        texts = ["a", "b", "c", "d"]
+        report = compare_backends(fake_pipeline(), fake_pipeline(flip={"c"}), texts)
+        self.assertEqual(report["agreement"], 0.75)
+        self.assertEqual(report["mismatches"], ["c"])
+        self.assertEqual(report["max_score_difference"], 0.0)
+        self.assertIn("speedup", report)
+
+if __name__ == '__main__':
+    unittest.main()
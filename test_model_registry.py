@@ -0,0 +1,54 @@
+import unittest
+import threading
+import time
+from unittest.mock import MagicMock
+from model_registry import ModelRegistry
+
+class TestModelRegistry(unittest.TestCase):
+    def test_loads_once(self):
+        loader = MagicMock(return_value="pipeline")
+        registry = ModelRegistry(loader=loader)
+        self.assertEqual(registry.status, "not_loaded")
+        self.assertEqual(registry.get(), "pipeline")
+        self.assertEqual(registry.get(), "pipeline")
+        loader.assert_called_once()
+        self.assertEqual(registry.status, "ready")
+        self.assertIsNotNone(registry.load_seconds)
+
+    def test_concurrent_callers_share_one_load(self):
+        def slow_loader():
+            time.sleep(0.2)
+            return object()
+
+        loader = MagicMock(side_effect=slow_loader)
+        registry = ModelRegistry(loader=loader)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(registry.get())) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        loader.assert_called_once()
+        self.assertEqual(len({id(result) for result in results}), 1)
+
+    def test_background_warm_up_reports_loading(self):
+        release = threading.Event()
+        registry = ModelRegistry(loader=lambda: release.wait(5) and "pipeline")
+        registry.warm_up(background=True)
+        self.assertEqual(registry.health()["status"], "loading")
+        self.assertFalse(registry.ready)
+        release.set()
+        self.assertEqual(registry.get(), "pipeline")
+        self.assertEqual(registry.health()["status"], "ready")
+
+    def test_failed_load_is_reported_and_retried(self):
+        loader = MagicMock(side_effect=[RuntimeError("download failed"), "pipeline"])
+        registry = ModelRegistry(loader=loader)
+        with self.assertRaises(RuntimeError):
+            registry.get()
+        self.assertEqual(registry.health()["status"], "failed")
+        self.assertEqual(registry.health()["error"], "download failed")
+        self.assertEqual(registry.get(), "pipeline")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,227 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch, MagicMock
+from limits import parse
+from rate_limiting import (
+    MemoryBackend, SharedMemoryBackend, RedisBackend, RateLimiter, parse_quotas, create_backend
+)
+
+SECOND = 1000000000
+
+class FakeRedis:
+    """
+    A local stand-in for the Redis commands RedisBackend uses, with a settable clock.
+    """
+
+    def __init__(self):
+        self.values = {}
+        self.expiry = {}
+        self.now_ms = 0
+
+    def _expire(self, key):
+        if key in self.expiry and self.expiry[key] <= self.now_ms:
+            del self.values[key], self.expiry[key]
+
+    def set(self, key, value, px=None, nx=False):
+        self._expire(key)
+        if nx and key in self.values:
+            return None
+        self.values[key] = int(value)
+        if px is not None:
+            self.expiry[key] = self.now_ms + px
+        return True
+
+    def incrby(self, key, amount):
+        self._expire(key)
+        self.values[key] = self.values.get(key, 0) + amount
+        return self.values[key]
+
+    def decrby(self, key, amount):
+        return self.incrby(key, -amount)
+
+    def pttl(self, key):
+        self._expire(key)
+        if key not in self.values:
+            return -2
+        return self.expiry[key] - self.now_ms if key in self.expiry else -1
+
+    def scan_iter(self, match):
+        return [key for key in list(self.values) if key.startswith(match.rstrip("*"))]
+
+    def delete(self, key):
+        self.values.pop(key, None)
+        self.expiry.pop(key, None)
+
+    def register_script(self, script):
+        """
+        Returns the hit script, run as Python; like Lua, it runs with the clock stopped.
+        """
+        self.script = script
+
+        def hit(keys, args):
+            limit, window_ms, cost = (int(arg) for arg in args)
+            self.set(keys[0], 0, px=window_ms, nx=True)
+            count = self.incrby(keys[0], cost)
+            ttl = self.pttl(keys[0])
+            if count > limit:
+                self.decrby(keys[0], cost)
+                return [0, count, ttl]
+            return [1, count, ttl]
+        return hit
+
+class TestMemoryBackend(unittest.TestCase):
+    @patch("rate_limiting.time.monotonic_ns")
+    def test_burst_then_refill(self, mock_now):
+        mock_now.return_value = 100 * SECOND
+        backend = MemoryBackend()
+        results = [backend.hit("k", 3, 60 * SECOND) for _ in range(4)]
+        self.assertEqual([r.allowed for r in results], [True, True, True, False])
+        self.assertEqual(results[0].remaining, 2)
+        self.assertAlmostEqual(results[3].retry_after, 20.0)
+
+        mock_now.return_value = 120 * SECOND  # One token back after period / limit
+        self.assertTrue(backend.hit("k", 3, 60 * SECOND).allowed)
+        self.assertFalse(backend.hit("k", 3, 60 * SECOND).allowed)
+
+    @patch("rate_limiting.time.monotonic_ns", return_value=100 * SECOND)
+    def test_cost_takes_several_tokens(self, mock_now):
+        backend = MemoryBackend()
+        self.assertTrue(backend.hit("k", 10, 60 * SECOND, cost=8).allowed)
+        rejected = backend.hit("k", 10, 60 * SECOND, cost=3)
+        self.assertFalse(rejected.allowed)
+        self.assertEqual(rejected.remaining, 2)
+        self.assertTrue(backend.hit("k", 10, 60 * SECOND, cost=2).allowed)
+        self.assertFalse(backend.hit("other", 10, 60 * SECOND, cost=11).allowed)
+
+    @patch("rate_limiting.time.monotonic_ns")
+    def test_prunes_refilled_buckets_beyond_max_keys(self, mock_now):
+        mock_now.return_value = 100 * SECOND
+        backend = MemoryBackend(max_keys=2)
+        for key in ("a", "b", "c"):
+            backend.hit(key, 10, 10 * SECOND)
+        self.assertEqual(len(backend._tats), 3)  # Every bucket is still refilling
+
+        mock_now.return_value = 102 * SECOND  # The first three buckets have refilled
+        backend.hit("d", 10, 10 * SECOND)
+        self.assertEqual(list(backend._tats), ["c", "d"])
+        backend.hit("e", 10, 10 * SECOND)
+        self.assertEqual(list(backend._tats), ["d", "e"])
+
+class TestSharedMemoryBackend(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mktemp(prefix="rate-limit-test-")
+        self.addCleanup(lambda: os.path.exists(self.path) and os.remove(self.path))
+
+    def test_limits_are_shared_between_instances(self):
+        first = SharedMemoryBackend(self.path, slots=64)
+        second = SharedMemoryBackend(self.path, slots=64)
+        self.assertTrue(first.hit("k", 2, 60 * SECOND).allowed)
+        self.assertTrue(second.hit("k", 2, 60 * SECOND).allowed)
+        self.assertFalse(first.hit("k", 2, 60 * SECOND).allowed)
+        self.assertTrue(second.hit("other", 2, 60 * SECOND).allowed)
+
+    @unittest.skipUnless(hasattr(os, "fork"), "needs fork")
+    def test_limits_are_shared_with_forked_workers(self):
+        backend = SharedMemoryBackend(self.path, slots=64)
+        children = []
+        for _ in range(4):
+            pid = os.fork()
+            if pid == 0:
+                allowed = sum(backend.hit("k", 10, 60 * SECOND).allowed for _ in range(5))
+                os._exit(allowed)
+            children.append(pid)
+        allowed = sum(os.waitstatus_to_exitcode(os.waitpid(pid, 0)[1]) for pid in children)
+        self.assertEqual(allowed, 10)
+
+    def test_collisions_probe_other_slots(self):
+        backend = SharedMemoryBackend(self.path, slots=1)
+        self.assertTrue(backend.hit("a", 1, 60 * SECOND).allowed)
+        with self.assertLogs("rate_limiting", level="WARNING"):
+            self.assertTrue(backend.hit("b", 1, 60 * SECOND).allowed)  # Table full: fails open
+        self.assertFalse(backend.hit("a", 1, 60 * SECOND).allowed)
+
+    def test_reset(self):
+        backend = SharedMemoryBackend(self.path, slots=64)
+        backend.hit("k", 1, 60 * SECOND)
+        backend.reset()
+        self.assertTrue(backend.hit("k", 1, 60 * SECOND).allowed)
+
+class TestRedisBackend(unittest.TestCase):
+    def setUp(self):
+        self.redis = FakeRedis()
+        self.backend = RedisBackend(client=self.redis)
+
+    def test_window_counts_cost_and_refunds_rejections(self):
+        self.assertTrue(self.backend.hit("k", 10, 60 * SECOND, cost=8).allowed)
+        rejected = self.backend.hit("k", 10, 60 * SECOND, cost=5)
+        self.assertFalse(rejected.allowed)
+        self.assertEqual(rejected.remaining, 2)
+        self.assertEqual(rejected.retry_after, 60.0)
+        self.assertTrue(self.backend.hit("k", 10, 60 * SECOND, cost=2).allowed)
+
+    def test_rejections_never_leave_a_counter_without_ttl(self):
+        self.assertFalse(self.backend.hit("k", 1, 60 * SECOND, cost=2).allowed)
+        self.redis.now_ms = 59999
+        self.backend.hit("k", 1, 60 * SECOND)
+        self.assertFalse(self.backend.hit("k", 1, 60 * SECOND).allowed)
+        self.assertTrue(all(key in self.redis.expiry for key in self.redis.values))
+        self.assertIn("DECRBY", self.redis.script)  # The refund runs inside the script
+
+    def test_window_expires(self):
+        self.backend.hit("k", 1, 60 * SECOND)
+        self.assertFalse(self.backend.hit("k", 1, 60 * SECOND).allowed)
+        self.redis.now_ms = 60000
+        self.assertTrue(self.backend.hit("k", 1, 60 * SECOND).allowed)
+
+    def test_reset(self):
+        self.backend.hit("k", 1, 60 * SECOND)
+        self.backend.reset()
+        self.assertEqual(self.redis.values, {})
+
+class TestRateLimiter(unittest.TestCase):
+    def test_scopes_and_clients_have_separate_buckets(self):
+        limiter = RateLimiter(MemoryBackend())
+        limit = parse("1 per minute")
+        self.assertTrue(limiter.hit("analyze", "10.0.0.1", limit).allowed)
+        self.assertFalse(limiter.hit("analyze", "10.0.0.1", limit).allowed)
+        self.assertTrue(limiter.hit("analyze", "10.0.0.2", limit).allowed)
+        self.assertTrue(limiter.hit("batch", "10.0.0.1", limit).allowed)
+
+    def test_api_key_quota_is_shared_across_scopes_and_addresses(self):
+        limiter = RateLimiter(MemoryBackend(), parse_quotas("key-a=5 per minute; key-b=1 per hour"))
+        limit = parse("1 per minute")
+        self.assertTrue(limiter.hit("batch", "10.0.0.1", limit, cost=4, api_key="key-a").allowed)
+        self.assertTrue(limiter.hit("analyze", "10.0.0.2", limit, api_key="key-a").allowed)
+        self.assertFalse(limiter.hit("analyze", "10.0.0.3", limit, api_key="key-a").allowed)
+        # Unknown keys get the endpoint limit per address
+        self.assertTrue(limiter.hit("analyze", "10.0.0.1", limit, api_key="unknown").allowed)
+        self.assertFalse(limiter.hit("analyze", "10.0.0.1", limit, api_key="unknown").allowed)
+
+    def test_disabled(self):
+        backend = MagicMock()
+        limiter = RateLimiter(backend, enabled=False)
+        self.assertTrue(limiter.hit("analyze", "10.0.0.1", parse("1 per minute")).allowed)
+        backend.hit.assert_not_called()
+
+    def test_backend_error_allows_request(self):
+        backend = MagicMock()
+        backend.hit.side_effect = ConnectionError("down")
+        limiter = RateLimiter(backend)
+        with self.assertLogs("rate_limiting", level="ERROR"):
+            self.assertTrue(limiter.hit("analyze", "10.0.0.1", parse("1 per minute")).allowed)
+
+    def test_parse_quotas(self):
+        quotas = parse_quotas("a=10 per second;; b = 100/hour ")
+        self.assertEqual(quotas["a"].amount, 10)
+        self.assertEqual(quotas["b"].get_expiry(), 3600)
+        with self.assertRaises(ValueError):
+            parse_quotas("a=lots")
+
+    def test_create_backend(self):
+        self.assertIsInstance(create_backend("memory"), MemoryBackend)
+        with self.assertRaises(ValueError):
+            create_backend("memcached")
+
+if __name__ == '__main__':
+    unittest.main()
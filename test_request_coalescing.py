@@ -0,0 +1,138 @@
+import unittest
+import asyncio
+import threading
+from unittest.mock import patch, MagicMock
+from request_coalescing import SingleFlight
+
+class TestSingleFlight(unittest.TestCase):
+    def test_concurrent_callers_share_one_computation(self):
+        flights = SingleFlight()
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {"label": "Positive"}
+
+        async def main():
+            return await asyncio.gather(*(flights.run("key", compute) for _ in range(50)))
+
+        results = asyncio.run(main())
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(all(result is results[0] for result in results))
+        self.assertEqual(flights.stats(), {"in_flight": 0, "leaders": 1, "followers": 49})
+
+    def test_callers_on_other_threads_and_loops_share_it(self):
+        flights = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            started.set()
+            await asyncio.get_running_loop().run_in_executor(None, release.wait)
+            return "result"
+
+        results = []
+        leader = threading.Thread(target=lambda: results.append(asyncio.run(flights.run("key", compute))))
+        leader.start()
+        started.wait(5)
+        followers = [
+            threading.Thread(target=lambda: results.append(asyncio.run(flights.run("key", compute))))
+            for _ in range(3)
+        ]
+        for thread in followers:
+            thread.start()
+        while flights.stats()["followers"] < 3:
+            threading.Event().wait(0.001)
+        release.set()
+        for thread in [leader, *followers]:
+            thread.join(5)
+        self.assertEqual(results, ["result"] * 4)
+        self.assertEqual(len(calls), 1)
+
+    def test_errors_reach_every_caller(self):
+        flights = SingleFlight()
+
+        async def compute():
+            await asyncio.sleep(0.01)
+            raise ValueError("analysis failed")
+
+        async def main():
+            return await asyncio.gather(*(flights.run("key", compute) for _ in range(3)), return_exceptions=True)
+
+        results = asyncio.run(main())
+        self.assertTrue(all(isinstance(result, ValueError) for result in results))
+        self.assertEqual(flights.stats()["in_flight"], 0)
+
+    def test_waiter_timeout_leaves_flight_running(self):
+        flights = SingleFlight()
+
+        async def compute():
+            await asyncio.sleep(0.05)
+            return "result"
+
+        async def impatient():
+            await asyncio.sleep(0)  # Let the leader claim the key first
+            return await asyncio.wait_for(flights.run("key", compute), 0.01)
+
+        async def main():
+            return await asyncio.gather(flights.run("key", compute), impatient(), return_exceptions=True)
+
+        leader_result, waiter_result = asyncio.run(main())
+        self.assertEqual(leader_result, "result")
+        self.assertIsInstance(waiter_result, asyncio.TimeoutError)
+
+    def test_waiters_take_over_when_leader_is_cancelled(self):
+        flights = SingleFlight()
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.02)
+            return len(calls)
+
+        async def follower():
+            await asyncio.sleep(0)
+            return await flights.run("key", compute)
+
+        async def main():
+            leader = asyncio.ensure_future(asyncio.wait_for(flights.run("key", compute), 0.005))
+            return await asyncio.gather(leader, follower(), follower(), return_exceptions=True)
+
+        leader_result, *follower_results = asyncio.run(main())
+        self.assertIsInstance(leader_result, asyncio.TimeoutError)
+        self.assertEqual(follower_results, [2, 2])  # One new computation shared by both
+        self.assertEqual(len(calls), 2)
+
+class TestAnalysisCoalescing(unittest.TestCase):
+    @patch("module2.get_result_cache", return_value=None)
+    @patch("module2.detect_language", return_value=True)
+    @patch("module2.detect_language_many", side_effect=lambda texts: [True] * len(texts))
+    def test_identical_requests_run_the_pipeline_once(self, mock_detect_many, mock_detect, mock_cache):
+        from module2 import analyze_sentiment_combined, analyze_sentiment_batch
+
+        mock_pipeline = MagicMock()
+        mock_pipeline.model.name_or_path = "test-model"
+        mock_pipeline.side_effect = lambda texts, **kwargs: [
+            {"label": "POSITIVE", "score": 0.9} for _ in ([texts] if isinstance(texts, str) else texts)
+        ]
+
+        async def main():
+            return await asyncio.gather(
+                *(analyze_sentiment_combined("A viral post", mock_pipeline) for _ in range(20)),
+                analyze_sentiment_batch(["A viral post", "Another post"], mock_pipeline)
+            )
+
+        *single_results, batch_results = asyncio.run(main())
+        self.assertTrue(all(result["transformers"]["label"] == "Positive" for result in single_results))
+        self.assertEqual(batch_results[0], single_results[0])
+        analyzed = []
+        for call in mock_pipeline.call_args_list:
+            texts = call[0][0]
+            analyzed.extend([texts] if isinstance(texts, str) else texts)
+        self.assertEqual(sorted(analyzed), ["A viral post", "Another post"])
+
+if __name__ == '__main__':
+    unittest.main()
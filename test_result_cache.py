@@ -0,0 +1,110 @@
+import unittest
+import os
+import tempfile
+from unittest.mock import MagicMock
+from result_cache import ResultCache, SQLiteCacheBackend, make_cache_key, model_identity
+
+RESULT = {
+    "text": "I love this product!",
+    "textblob": "Positive",
+    "nltk": "Positive",
+    "transformers": {"label": "Positive", "confidence": 0.95}
+}
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+class TestResultCache(unittest.TestCase):
+    def test_get_returns_stored_result(self):
+        cache = ResultCache(max_entries=10, max_bytes=10000, ttl=60)
+        cache.set("key", RESULT)
+        self.assertEqual(cache.get("key"), RESULT)
+        self.assertIsNone(cache.get("other"))
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 1)
+
+    def test_get_returns_copy(self):
+        cache = ResultCache(max_entries=10, max_bytes=10000, ttl=60)
+        cache.set("key", RESULT)
+        cache.get("key")["textblob"] = "Negative"
+        self.assertEqual(cache.get("key")["textblob"], "Positive")
+
+    def test_ttl_expiry(self):
+        clock = FakeClock()
+        cache = ResultCache(max_entries=10, max_bytes=10000, ttl=60, clock=clock)
+        cache.set("key", RESULT)
+        clock.now += 61
+        self.assertIsNone(cache.get("key"))
+        self.assertEqual(cache.stats()["expirations"], 1)
+
+    def test_evicts_least_recently_used_by_count(self):
+        cache = ResultCache(max_entries=2, max_bytes=10000, ttl=60)
+        cache.set("a", RESULT)
+        cache.set("b", RESULT)
+        cache.get("a")
+        cache.set("c", RESULT)
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_evicts_by_bytes(self):
+        cache = ResultCache(max_entries=100, max_bytes=250, ttl=60)
+        for key in ("a", "b", "c"):
+            cache.set(key, RESULT)
+        self.assertLessEqual(cache.stats()["bytes"], 250)
+        self.assertLess(len(cache), 3)
+
+    def test_shared_backend_between_instances(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cache.sqlite")
+            writer = ResultCache(ttl=60, backend=SQLiteCacheBackend(path))
+            reader = ResultCache(ttl=60, backend=SQLiteCacheBackend(path))
+            writer.set("key", RESULT)
+            self.assertEqual(reader.get("key"), RESULT)
+            self.assertEqual(reader.stats()["shared_hits"], 1)
+
+    def test_shared_backend_purges_expired_rows(self):
+        clock = FakeClock()
+        with tempfile.TemporaryDirectory() as tmp:
+            backend = SQLiteCacheBackend(os.path.join(tmp, "cache.sqlite"), purge_interval=2, clock=clock)
+            backend.set("old", "{}", clock.now + 10)
+            clock.now += 20
+            backend.set("new", "{}", clock.now + 10)
+            keys = [row[0] for row in backend._connection().execute("SELECT key FROM results")]
+            self.assertEqual(keys, ["new"])
+
+    def test_shared_backend_evicts_rows_closest_to_expiry(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            backend = SQLiteCacheBackend(os.path.join(tmp, "cache.sqlite"), max_entries=2, max_bytes=10000,
+                                         purge_interval=1, clock=lambda: 0.0)
+            for index, key in enumerate(("a", "b", "c")):
+                backend.set(key, "{}", 100.0 + index)
+            self.assertIsNone(backend.get("a", 0.0))
+            self.assertIsNotNone(backend.get("c", 0.0))
+            self.assertEqual(backend.evictions, 1)
+
+    def test_shared_backend_bounded_by_bytes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            backend = SQLiteCacheBackend(os.path.join(tmp, "cache.sqlite"), max_entries=100, max_bytes=25,
+                                         purge_interval=1, clock=lambda: 0.0)
+            for key in ("a", "b", "c"):
+                backend.set(key, "x" * 10, 0)
+            size = backend._connection().execute("SELECT SUM(LENGTH(value)) FROM results").fetchone()[0]
+            self.assertLessEqual(size, 25)
+            self.assertIsNotNone(backend.get("c", 0.0))
+
+    def test_cache_key_depends_on_model(self):
+        self.assertNotEqual(make_cache_key("text", "model-a"), make_cache_key("text", "model-b"))
+        self.assertEqual(make_cache_key("text", "model-a"), make_cache_key("text", "model-a"))
+
+    def test_model_identity_uses_model_name(self):
+        mock_pipeline = MagicMock()
+        mock_pipeline.model.name_or_path = "distilbert-base-uncased-finetuned-sst-2-english"
+        self.assertEqual(model_identity(mock_pipeline), "distilbert-base-uncased-finetuned-sst-2-english")
+
+if __name__ == '__main__':
+    unittest.main()
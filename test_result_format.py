@@ -0,0 +1,79 @@
+import json
+import unittest
+import msgpack
+from unittest.mock import patch
+from result_format import (
+    Label, SentimentResult, compact, negotiate, encode, to_float32, JSON, MSGPACK
+)
+
+RESULT = {
+    "text": "I love this product!",
+    "textblob": "Positive",
+    "nltk": "Neutral",
+    "transformers": {"label": "Positive", "confidence": 0.9998765413284302}
+}
+
+class TestResultFormat(unittest.TestCase):
+    def test_labels_are_strings(self):
+        self.assertEqual(Label.POSITIVE, "Positive")
+        self.assertIs(SentimentResult.from_dict(RESULT).textblob, Label.POSITIVE)
+        self.assertEqual(SentimentResult.from_dict({**RESULT, "nltk": "LABEL_3"}).nltk, "LABEL_3")
+
+    def test_result_is_slotted(self):
+        with self.assertRaises(AttributeError):
+            SentimentResult.from_dict(RESULT).extra = 1
+
+    def test_to_float32(self):
+        self.assertEqual(encode([to_float32(0.9998765413284302)]), b"[0.99987656]")
+        self.assertEqual(to_float32(0.5), 0.5)
+
+    def test_compact(self):
+        self.assertEqual(json.loads(encode(compact(RESULT))),
+                         {**RESULT, "transformers": {"label": "Positive", "confidence": 0.99987656}})
+        self.assertNotIn("text", compact(RESULT, include_text=False))
+        self.assertEqual(compact({"error": "Invalid or empty input text"}), {"error": "Invalid or empty input text"})
+
+        cascade = {**RESULT, "transformers": None, "tiers": ["textblob", "nltk"]}
+        self.assertEqual(compact(cascade), cascade)
+        degraded = {**cascade, "degraded": True}
+        self.assertEqual(compact(degraded), degraded)
+
+        chunked = {**RESULT, "transformers": {"label": "Negative", "confidence": 0.75, "chunks": [
+            {"start": 0, "end": 10, "label": "Negative", "confidence": 0.75}
+        ]}}
+        self.assertEqual(compact(chunked), chunked)
+
+    def test_negotiate(self):
+        self.assertEqual(negotiate(None), JSON)
+        self.assertEqual(negotiate("*/*"), JSON)
+        self.assertEqual(negotiate("application/msgpack"), MSGPACK)
+        self.assertEqual(negotiate("application/x-msgpack, application/json"), MSGPACK)
+        self.assertEqual(negotiate("application/json, application/msgpack"), JSON)
+        self.assertEqual(negotiate("application/json;q=0.5, application/msgpack;q=0.9"), MSGPACK)
+        self.assertEqual(negotiate("application/msgpack;q=0"), JSON)
+        with patch("result_format.msgpack", None):
+            self.assertEqual(negotiate("application/msgpack"), JSON)
+
+    def test_encode(self):
+        payload = {"results": [compact(RESULT, include_text=False)]}
+        expected = {"results": [{"textblob": "Positive", "nltk": "Neutral",
+                                 "transformers": {"label": "Positive", "confidence": 0.99987656}}]}
+        self.assertEqual(json.loads(encode(payload)), expected)
+        with patch("result_format.orjson", None):
+            decoded = json.loads(encode(payload))
+        self.assertAlmostEqual(decoded["results"][0]["transformers"]["confidence"], 0.99987656, places=7)
+        packed = encode(payload, MSGPACK)
+        self.assertLess(len(packed), len(encode(payload)))
+        decoded = msgpack.unpackb(packed)
+        self.assertAlmostEqual(decoded["results"][0]["transformers"]["confidence"], 0.99987656, places=6)
+
+    def test_encode_without_orjson_keeps_float32_digits(self):
+        result = {**RESULT, "transformers": {"label": "Positive", "confidence": 0.95}}
+        with patch("result_format.orjson", None):
+            self.assertIn(b'"confidence":0.95}', encode(compact(result)))
+        self.assertEqual(json.loads(encode(compact(result)))["transformers"]["confidence"], 0.95)
+        decoded = msgpack.unpackb(encode(compact(result), MSGPACK))
+        self.assertAlmostEqual(decoded["transformers"]["confidence"], 0.95, places=6)
+
+if __name__ == '__main__':
+    unittest.main()
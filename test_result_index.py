@@ -0,0 +1,100 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch, MagicMock
+from result_index import ResultIndex, write_index, build, index_key, main
+
+MODEL = "test-model"
+
+def fake_pipeline():
+    pipeline = MagicMock()
+    pipeline.model.name_or_path = MODEL
+    return pipeline
+
+async def fake_analyze(text, transformers_pipeline, mode=None):
+    if "unsupported" in text:
+        return {"error": "Unsupported language. Only English, Spanish, and French are supported."}
+    label = "Positive" if "love" in text else "Negative"
+    return {"text": text, "textblob": label, "nltk": label, "transformers": {"label": label, "confidence": 0.95}}
+
+class TestResultIndex(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "results.idx")
+
+    def test_lookup_round_trip(self):
+        records = [
+            (index_key(f"text {i}", MODEL), "Positive", "Neutral", "Negative", 0.5 + i / 1000)
+            for i in range(100)
+        ]
+        self.assertEqual(write_index(self.path, MODEL, records), 100)
+        index = ResultIndex(self.path)
+        self.assertEqual(len(index), 100)
+        self.assertEqual(index.get("text 7", MODEL), {
+            "text": "text 7",
+            "textblob": "Positive",
+            "nltk": "Neutral",
+            "transformers": {"label": "Negative", "confidence": 0.507}
+        })
+        self.assertIsNone(index.get("text 100", MODEL))
+        self.assertIsNone(index.get("text 7", "other-model"))
+        self.assertEqual(len(list(index.records())), 100)
+
+    def test_rejects_other_files(self):
+        with open(self.path, "wb") as f:
+            f.write(b"not an index at all")
+        with self.assertRaises(ValueError):
+            ResultIndex(self.path)
+
+    def test_reloads_rebuilt_file(self):
+        write_index(self.path, MODEL, [(index_key("old", MODEL), "Positive", "Positive", "Positive", 0.9)])
+        index = ResultIndex(self.path, reload_interval=0.001)
+        write_index(self.path, MODEL, [(index_key("new", MODEL), "Negative", "Negative", "Negative", 0.8)])
+        os.utime(self.path, ns=(1, 1))  # Make the rebuild visible even within one mtime tick
+        with patch("result_index.time.monotonic", return_value=index._checked_at + 1):
+            self.assertIsNotNone(index.get("new", MODEL))
+        self.assertIsNone(index.get("old", MODEL))
+
+    def test_lookup_during_reload_uses_one_file(self):
+        write_index(self.path, MODEL, [(index_key("old", MODEL), "Positive", "Positive", "Positive", 0.9)])
+        index = ResultIndex(self.path, reload_interval=0)
+        write_index(self.path, MODEL, [(index_key("new", MODEL), "Negative", "Positive", "Negative", 0.8)])
+        find = ResultIndex._find
+
+        def find_then_reload(table, key):
+            position = find(table, key)
+            index._table = index._load()  # Another thread reloads while this lookup is in flight
+            return position
+
+        with patch.object(ResultIndex, "_find", side_effect=find_then_reload):
+            result = index.get("old", MODEL)
+        self.assertEqual(result["transformers"]["label"], "Positive")
+        self.assertEqual(index.labels, ["Negative", "Positive"])
+
+    @patch("sentiment_analysis.analyze_sentiment_combined", side_effect=fake_analyze)
+    def test_build_is_incremental(self, mock_analyze):
+        report = build(self.path, ["I love it", "I hate it", "", "unsupported text", "I love it"], fake_pipeline())
+        self.assertEqual(report, {"read": 5, "kept": 0, "scored": 3, "written": 2})
+
+        report = build(self.path, ["I love it", "A new text"], fake_pipeline())
+        self.assertEqual(report, {"read": 2, "kept": 2, "scored": 1, "written": 3})
+        self.assertEqual(mock_analyze.call_args[0][0], "A new text")
+
+        index = ResultIndex(self.path)
+        self.assertEqual(index.get("I love it", MODEL)["transformers"]["label"], "Positive")
+        self.assertEqual(index.get("A new text", MODEL)["textblob"], "Negative")
+        self.assertIsNone(index.get("unsupported text", MODEL))
+
+    @patch("sentiment_analysis.analyze_sentiment_combined", side_effect=fake_analyze)
+    def test_main_builds_from_jsonl(self, mock_analyze):
+        corpus = self.path + ".jsonl"
+        with open(corpus, "w", encoding="utf-8") as f:
+            f.write('{"body": "I love it"}\n{"other": 1}\n{"body": "I hate it"}\n')
+        with patch("builtins.print"):
+            main(["build", "-i", corpus, "--input-format", "jsonl", "--field", "body", "--index", self.path],
+                 transformers_pipeline=fake_pipeline())
+        self.assertEqual(len(ResultIndex(self.path)), 2)
+
+if __name__ == '__main__':
+    unittest.main()
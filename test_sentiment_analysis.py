@@ -1,6 +1,6 @@
 import unittest
 from unittest.mock import patch, MagicMock
-from module2 import analyze_sentiment_combined, get_textblob_sentiment, get_nltk_sentiment, get_transformers_sentiment
+from module2 import analyze_sentiment_combined, analyze_sentiment_batch, get_textblob_sentiment, get_nltk_sentiment, get_transformers_sentiment, needs_transformer
 import asyncio
 
 class TestSentimentAnalysis(unittest.TestCase):
@@ -46,5 +46,120 @@ class TestSentimentAnalysis(unittest.TestCase):
         result = await analyze_sentiment_combined("!", MagicMock())
         self.assertIn("textblob", result)  # Ensure the result is processed
 
+    @patch("module2.detect_language", return_value=True)
+    def test_analyze_sentiment_combined_cached(self, mock_detect):
+        mock_pipeline = MagicMock()
+        mock_pipeline.return_value = [{"label": "POSITIVE", "score": 0.95}]
+        first = asyncio.run(analyze_sentiment_combined("A cached review text", mock_pipeline))
+        second = asyncio.run(analyze_sentiment_combined("A cached review text", mock_pipeline))
+        self.assertEqual(first, second)
+        mock_pipeline.assert_called_once()
+
+    @patch("module2.detect_language", return_value=True)
+    def test_analyze_sentiment_batch_dedupes_and_keeps_order(self, mock_detect):
+        mock_pipeline = MagicMock()
+        mock_pipeline.side_effect = lambda texts, batch_size, **kwargs: [
+            {"label": "POSITIVE" if "love" in text else "NEGATIVE", "score": 0.9} for text in texts
+        ]
+        texts = ["I love batches", "", "I hate batches", "I love batches"]
+        results = asyncio.run(analyze_sentiment_batch(texts, mock_pipeline))
+        self.assertEqual(len(results), 4)
+        self.assertEqual(results[0]["transformers"]["label"], "Positive")
+        self.assertIn("error", results[1])
+        self.assertEqual(results[2]["transformers"]["label"], "Negative")
+        self.assertEqual(results[3], results[0])
+        self.assertEqual(len(mock_pipeline.call_args[0][0]), 2)
+
+    def test_analyze_sentiment_uses_result_index(self):
+        mock_pipeline = MagicMock()
+        mock_pipeline.model.name_or_path = "test-model"
+        indexed = {"text": "A catalog text", "textblob": "Neutral", "nltk": "Neutral",
+                   "transformers": {"label": "Positive", "confidence": 0.8}}
+        mock_index = MagicMock()
+        mock_index.get.side_effect = lambda text, model_id: indexed if text == "A catalog text" else None
+        with patch("module2.get_result_index", return_value=mock_index), \
+                patch("module2.detect_language_many", side_effect=lambda texts: [True] * len(texts)):
+            self.assertEqual(asyncio.run(analyze_sentiment_combined("A catalog text", mock_pipeline)), indexed)
+            mock_pipeline.assert_not_called()
+            mock_pipeline.side_effect = lambda texts, batch_size, **kwargs: [{"label": "NEGATIVE", "score": 0.6} for _ in texts]
+            results = asyncio.run(analyze_sentiment_batch(["A catalog text", "Something unindexed"], mock_pipeline))
+        self.assertEqual(results[0], indexed)
+        self.assertEqual(mock_pipeline.call_args[0][0], ["Something unindexed"])
+        mock_index.get.assert_called_with("Something unindexed", "test-model")
+
+    def test_needs_transformer(self):
+        self.assertFalse(needs_transformer(0.8, 0.9, vader_band=0.5, textblob_band=0.1))
+        self.assertTrue(needs_transformer(0.8, 0.3, vader_band=0.5, textblob_band=0.1))  # Inside the VADER band
+        self.assertTrue(needs_transformer(0.05, 0.9, vader_band=0.5, textblob_band=0.1))  # Inside the TextBlob band
+        self.assertTrue(needs_transformer(-0.8, 0.9, vader_band=0.5, textblob_band=0.1))  # Disagreement
+        self.assertTrue(needs_transformer(None, 0.9))  # A lexicon tier failed
+
+    @patch("module2.detect_language", return_value=True)
+    def test_analyze_sentiment_combined_cascade_skips_transformer(self, mock_detect):
+        mock_pipeline = MagicMock()
+        result = asyncio.run(analyze_sentiment_combined(
+            "I love this wonderful product, it is amazing!", mock_pipeline, mode="cascade"))
+        self.assertEqual(result["tiers"], ["textblob", "nltk"])
+        self.assertEqual(result["textblob"], "Positive")
+        self.assertIsNone(result["transformers"])
+        mock_pipeline.assert_not_called()
+
+    @patch("module2.detect_language", return_value=True)
+    def test_analyze_sentiment_combined_lexicon_mode_is_degraded_and_not_cached(self, mock_detect):
+        mock_pipeline = MagicMock()
+        text = "A lexicon-only answer for a wonderful product"
+        result = asyncio.run(analyze_sentiment_combined(text, mock_pipeline, mode="lexicon"))
+        self.assertTrue(result["degraded"])
+        self.assertIsNone(result["transformers"])
+        mock_pipeline.assert_not_called()
+        mock_pipeline.return_value = [{"label": "POSITIVE", "score": 0.95}]
+        full = asyncio.run(analyze_sentiment_combined(text, mock_pipeline))
+        self.assertNotIn("degraded", full)
+        # Once a full result is cached, degraded requests are answered with it
+        self.assertEqual(asyncio.run(analyze_sentiment_combined(text, mock_pipeline, mode="lexicon")), full)
+
+    @patch("module2.detect_language_many", side_effect=lambda texts: [True] * len(texts))
+    def test_analyze_sentiment_batch_lexicon_mode(self, mock_detect):
+        mock_pipeline = MagicMock()
+        results = asyncio.run(analyze_sentiment_batch(["A great batch text", "A terrible batch text"],
+                                                      mock_pipeline, mode="lexicon"))
+        self.assertEqual([result["textblob"] for result in results], ["Positive", "Negative"])
+        self.assertTrue(all(result["degraded"] for result in results))
+        mock_pipeline.assert_not_called()
+
+    @patch("module2.detect_language_many", side_effect=lambda texts: [True] * len(texts))
+    def test_analyze_sentiment_batch_cascade_escalates_uncertain(self, mock_detect):
+        mock_pipeline = MagicMock()
+        mock_pipeline.side_effect = lambda texts, batch_size, **kwargs: [{"label": "NEGATIVE", "score": 0.7} for _ in texts]
+        texts = ["I love this wonderful product, it is amazing!", "The parcel came on a Tuesday"]
+        results = asyncio.run(analyze_sentiment_batch(texts, mock_pipeline, mode="cascade"))
+        self.assertEqual(results[0]["tiers"], ["textblob", "nltk"])
+        self.assertEqual(results[1]["tiers"], ["textblob", "nltk", "transformers"])
+        self.assertEqual(results[1]["transformers"], {"label": "Negative", "confidence": 0.7})
+        self.assertEqual(mock_pipeline.call_args[0][0], [texts[1]])
+
+    def test_get_transformers_sentiment_long_text_is_chunked(self):
+        mock_pipeline = MagicMock()
+        mock_pipeline.tokenizer = None
+        mock_pipeline.side_effect = lambda texts, batch_size, **kwargs: [{"label": "POSITIVE", "score": 0.9} for _ in texts]
+        long_text = "This phone is great. " * 400
+        label, confidence, chunks = asyncio.run(get_transformers_sentiment(long_text, mock_pipeline, include_chunks=True))
+        self.assertEqual(label, "Positive")
+        self.assertAlmostEqual(confidence, 0.9)
+        self.assertGreater(len(chunks), 1)
+        mock_pipeline.assert_called_once()  # Every chunk in one batched call
+        self.assertEqual(len(mock_pipeline.call_args[0][0]), len(chunks))
+
+    def test_get_transformers_sentiment_truncates_dense_chunks(self):
+        # Without a tokenizer, chunks are sized by words; a text of dense tokens can exceed the model limit
+        mock_pipeline = MagicMock()
+        mock_pipeline.tokenizer = None
+        mock_pipeline.side_effect = lambda texts, batch_size, **kwargs: [{"label": "NEGATIVE", "score": 0.8} for _ in texts]
+        dense_text = " ".join(["e=mc^2/(h*nu)!?"] * 600)
+        label, confidence = asyncio.run(get_transformers_sentiment(dense_text, mock_pipeline))
+        self.assertEqual((label, confidence), ("Negative", 0.8))
+        self.assertIs(mock_pipeline.call_args.kwargs["truncation"], True)
+        self.assertEqual(mock_pipeline.call_args.kwargs["max_length"], 512)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+from unittest.mock import patch
+import os
+import socket
+import time
+import urllib.request
+from server_launcher import Launcher, analyzer_processes_per_worker, create_listener, threads_per_worker
+
+def pid_app(environ, start_response):
+    body = str(os.getpid()).encode()
+    start_response("200 OK", [("Content-Type", "text/plain"), ("Content-Length", str(len(body)))])
+    return [body]
+
+class TestServerLauncher(unittest.TestCase):
+    @patch("server_launcher.os.cpu_count", return_value=32)
+    def test_threads_per_worker_divides_cores(self, mock_cpu_count):
+        self.assertEqual(threads_per_worker(8, threads=0), 4)
+        self.assertEqual(threads_per_worker(64, threads=0), 1)
+        self.assertEqual(threads_per_worker(8, threads=2), 2)
+
+    def test_analyzer_processes_divided_across_workers(self):
+        self.assertEqual(analyzer_processes_per_worker(8, processes=32), 4)
+        self.assertEqual(analyzer_processes_per_worker(64, processes=32), 1)
+        self.assertEqual(analyzer_processes_per_worker(1, processes=32), 32)
+
+    def test_create_listener(self):
+        listener = create_listener("127.0.0.1", 0)
+        try:
+            self.assertEqual(listener.getsockopt(socket.SOL_SOCKET, socket.SO_ACCEPTCONN), 1)
+        finally:
+            listener.close()
+
+    def test_workers_share_listener_and_stop_gracefully(self):
+        listener = create_listener("127.0.0.1", 0)
+        port = listener.getsockname()[1]
+        launcher = Launcher(pid_app, listener, workers=2, graceful_timeout=5)
+        try:
+            pids = {launcher.spawn() for _ in range(2)}
+            served_by = None
+            for _ in range(50):
+                try:
+                    with urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=2) as response:
+                        served_by = int(response.read())
+                    break
+                except OSError:
+                    time.sleep(0.1)
+            self.assertIn(served_by, pids)
+        finally:
+            for pid in list(launcher.children):
+                launcher.stop_worker(pid)
+            listener.close()
+        self.assertEqual(launcher.children, set())
+
+if __name__ == '__main__':
+    unittest.main()
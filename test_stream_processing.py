@@ -0,0 +1,122 @@
+import unittest
+from unittest.mock import patch, MagicMock
+from io import StringIO, BytesIO
+import json
+import os
+import tempfile
+from stream_processing import (
+    read_records, read_lines, process_stream, analyze_stream, ndjson_lines, read_checkpoint, write_checkpoint, checkpoint_output_bytes,
+    ResultWriter, InvalidRecord
+)
+
+async def fake_analyze_batch(texts, transformers_pipeline):
+    return [{"text": text, "textblob": "Positive", "nltk": "Positive",
+             "transformers": {"label": "Positive", "confidence": 0.9}} for text in texts]
+
+class TestReadRecords(unittest.TestCase):
+    def test_read_text_lines(self):
+        self.assertEqual(list(read_records(StringIO("one\ntwo\r\n"), "text")), ["one", "two"])
+
+    def test_read_jsonl_field(self):
+        stream = StringIO('{"body": "one"}\n\n{"other": 1}\nnot json\n')
+        records = list(read_records(stream, "jsonl", field="body"))
+        self.assertEqual(records[0], "one")
+        self.assertIsInstance(records[1], InvalidRecord)
+        self.assertIsInstance(records[2], InvalidRecord)
+
+    def test_read_jsonl_bare_strings(self):
+        self.assertEqual(list(read_records(StringIO('"one"\n{"text": "two"}\n'), "jsonl")), ["one", "two"])
+
+    def test_read_lines_skips_oversized_lines(self):
+        lines = list(read_lines(BytesIO(b"short\n" + b"x" * 50 + b"\n\xc3\xa9t\xc3\xa9"), max_line_bytes=10))
+        self.assertEqual(lines[0], "short\n")
+        self.assertIsInstance(lines[1], InvalidRecord)
+        self.assertEqual(lines[2], "\u00e9t\u00e9")
+
+    def test_read_csv_column(self):
+        stream = StringIO('id,review\n1,"Great, really"\n2,Bad\n')
+        self.assertEqual(list(read_records(stream, "csv", column="review")), ["Great, really", "Bad"])
+        with self.assertRaises(ValueError):
+            list(read_records(StringIO("id\n1\n"), "csv", column="missing"))
+
+class TestProcessStream(unittest.TestCase):
+    @patch("stream_processing.analyze_sentiment_batch", side_effect=fake_analyze_batch)
+    def test_results_in_input_order(self, mock_analyze):
+        output = StringIO()
+        texts = [f"text {i}" for i in range(25)]
+        written = process_stream(texts, ResultWriter(output), MagicMock(), batch_size=4, workers=3, progress=None)
+        self.assertEqual(written, 25)
+        lines = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual([line["index"] for line in lines], list(range(25)))
+        self.assertEqual([line["text"] for line in lines], texts)
+
+    @patch("stream_processing.analyze_sentiment_batch", side_effect=fake_analyze_batch)
+    def test_invalid_records_keep_their_position(self, mock_analyze):
+        output = StringIO()
+        process_stream(["ok", InvalidRecord("Invalid JSON"), "x" * 20000], ResultWriter(output),
+                       MagicMock(), batch_size=10, progress=None)
+        lines = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual(lines[0]["text"], "ok")
+        self.assertEqual(lines[1]["error"], "Invalid JSON")
+        self.assertIn("exceeds", lines[2]["error"])
+
+    @patch("stream_processing.analyze_sentiment_batch", side_effect=fake_analyze_batch)
+    def test_resume_from_checkpoint(self, mock_analyze):
+        with tempfile.TemporaryDirectory() as tmp:
+            checkpoint = os.path.join(tmp, "progress.json")
+            write_checkpoint(checkpoint, 3)
+            self.assertEqual(read_checkpoint(checkpoint), 3)
+            output = StringIO()
+            texts = [f"text {i}" for i in range(5)]
+            written = process_stream(texts, ResultWriter(output), MagicMock(),
+                                     start_offset=read_checkpoint(checkpoint),
+                                     checkpoint_path=checkpoint, progress=None)
+            self.assertEqual(written, 5)
+            self.assertEqual(read_checkpoint(checkpoint), 5)
+            self.assertEqual(checkpoint_output_bytes(checkpoint), len(output.getvalue()))
+            lines = [json.loads(line) for line in output.getvalue().splitlines()]
+            self.assertEqual([line["index"] for line in lines], [3, 4])
+
+    @patch("stream_processing.analyze_sentiment_batch", side_effect=fake_analyze_batch)
+    def test_analyze_stream_reads_only_as_capacity_frees(self, mock_analyze):
+        reads = []
+
+        def records():
+            for i in range(20):
+                reads.append(i)
+                yield f"text {i}"
+
+        reads_at_yield = []
+        with patch("stream_processing.inference_backlogged", return_value=True):
+            for results in analyze_stream(records(), MagicMock(), batch_size=2, workers=4):
+                reads_at_yield.append(len(reads))
+        # A backlogged scheduler: each batch completes before the next is read
+        self.assertEqual(reads_at_yield, [2, 4, 6, 8, 10, 12, 14, 16, 18, 20])
+
+        reads.clear()
+        stream = analyze_stream(records(), MagicMock(), batch_size=2, workers=1)
+        next(stream)
+        self.assertLessEqual(len(reads), 6)  # At most workers * 2 + 1 batches read ahead
+        stream.close()
+
+    def test_ndjson_lines(self):
+        result = {"text": "hi", "textblob": "Neutral", "nltk": "Neutral",
+                  "transformers": {"label": "Positive", "confidence": 0.5}}
+        lines = ndjson_lines(7, [result, {"error": "Invalid JSON"}], include_text=False).splitlines()
+        self.assertEqual(json.loads(lines[0]), {"index": 7, "textblob": "Neutral", "nltk": "Neutral",
+                                                "transformers": {"label": "Positive", "confidence": 0.5}})
+        self.assertEqual(json.loads(lines[1]), {"index": 8, "error": "Invalid JSON"})
+
+    def test_csv_writer(self):
+        output = StringIO()
+        writer = ResultWriter(output, "csv")
+        writer.write(0, {"text": "hi", "textblob": "Neutral", "nltk": "Neutral",
+                         "transformers": {"label": "Positive", "confidence": 0.5}})
+        writer.write(1, {"error": "Invalid or empty input text"})
+        rows = output.getvalue().splitlines()
+        self.assertEqual(rows[0].split(",")[0], "index")
+        self.assertIn("Positive", rows[1])
+        self.assertIn("Invalid or empty input text", rows[2])
+
+if __name__ == '__main__':
+    unittest.main()
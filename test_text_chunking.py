@@ -0,0 +1,42 @@
+import unittest
+from text_chunking import needs_chunking, split_text, aggregate
+
+class FakeTokenizer:
+    """
+    Stands in for a fast tokenizer: one token per character.
+    """
+
+    def __call__(self, text, add_special_tokens=False, return_offsets_mapping=False):
+        return {"offset_mapping": [(i, i + 1) for i in range(len(text))]}
+
+class TestTextChunking(unittest.TestCase):
+    def test_short_text_is_one_chunk(self):
+        self.assertFalse(needs_chunking("short", max_tokens=10))
+        self.assertEqual(split_text("one two three", max_tokens=10), [(0, 13, 3)])
+
+    def test_windows_overlap_and_cover_the_text(self):
+        text = " ".join(f"w{i}" for i in range(100))
+        chunks = split_text(text, max_tokens=30, overlap_tokens=6)  # 20 words, 4 words overlap
+        self.assertEqual(chunks[0][0], 0)
+        self.assertEqual(chunks[-1][1], len(text))
+        self.assertTrue(all(count <= 20 for _, _, count in chunks))
+        for (_, previous_end, _), (start, _, _) in zip(chunks, chunks[1:]):
+            self.assertLess(start, previous_end)
+
+    def test_windows_end_on_sentences(self):
+        text = "Great phone. " * 10
+        chunks = split_text(text, tokenizer=FakeTokenizer(), max_tokens=40, overlap_tokens=0)
+        self.assertTrue(all(text[end - 1] == "." for _, end, _ in chunks[:-1]))
+        self.assertTrue(all(count <= 40 for _, _, count in chunks))
+
+    def test_aggregate(self):
+        results = [{"label": "POSITIVE", "score": 0.9}, {"label": "NEGATIVE", "score": 0.99}]
+        weighted = aggregate(results, [300, 100], "length_weighted")
+        self.assertEqual(weighted["label"], "POSITIVE")
+        self.assertAlmostEqual(weighted["score"], 0.675)
+        self.assertEqual(aggregate(results, [300, 100], "max_confidence"), {"label": "NEGATIVE", "score": 0.99})
+        with self.assertRaises(ValueError):
+            aggregate(results, [1, 1], "median")
+
+if __name__ == '__main__':
+    unittest.main()
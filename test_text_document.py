@@ -0,0 +1,84 @@
+import unittest
+import pickle
+from unittest.mock import patch, MagicMock
+from text_document import Document, DocumentCache, DOCUMENT_BYTES_PER_CHAR, get_document, text_of
+
+class TestDocument(unittest.TestCase):
+    def test_forms_are_computed_once(self):
+        document = Document("Great phone. Bad battery!")
+        tokenizer = MagicMock(return_value=["Great phone .", "Bad battery !"])
+        self.assertEqual(document.lower_tokens(tokenizer), ["great", "phone", ".", "bad", "battery", "!"])
+        self.assertEqual(document.sentences(tokenizer), ["Great phone .", "Bad battery !"])
+        document.lower_tokens(tokenizer)
+        tokenizer.assert_called_once_with("Great phone. Bad battery!")
+        self.assertEqual(document.words, ["Great", "phone.", "Bad", "battery!"])
+        self.assertIs(document.lower_words, document.lower_words)
+
+    def test_memo(self):
+        document = Document("text")
+        compute = MagicMock(return_value=[(0, 4, 1)])
+        self.assertEqual(document.memo(("chunk_spans", "model"), compute), [(0, 4, 1)])
+        document.memo(("chunk_spans", "model"), compute)
+        compute.assert_called_once_with("text")
+
+    def test_pickles_only_the_text(self):
+        document = Document("Great phone")
+        document.memo("tokenizer output", lambda text: object())
+        data = pickle.dumps(document)
+        self.assertNotIn(b"tokenizer output", data)
+        # Unpickling goes through the receiving process's document LRU
+        self.assertIs(pickle.loads(data), get_document("Great phone"))
+
+    def test_text_of(self):
+        self.assertEqual(text_of(Document("a")), "a")
+        self.assertEqual(text_of("a"), "a")
+
+class TestDocumentCache(unittest.TestCase):
+    def test_lru(self):
+        cache = DocumentCache(max_size=2)
+        first = cache.get("one")
+        self.assertIs(cache.get("one"), first)
+        cache.get("two")
+        cache.get("three")
+        self.assertIsNot(cache.get("one"), first)  # Evicted as least recently used
+        self.assertEqual(cache.stats()["size"], 2)
+        self.assertEqual((cache.stats()["hits"], cache.stats()["misses"]), (1, 4))
+
+    def test_bounded_by_bytes(self):
+        cache = DocumentCache(max_size=100, max_bytes=25 * DOCUMENT_BYTES_PER_CHAR)
+        first = cache.get("a" * 10)
+        cache.get("b" * 10)
+        cache.get("c" * 10)
+        self.assertLessEqual(cache.stats()["bytes"], 25 * DOCUMENT_BYTES_PER_CHAR)
+        self.assertIsNot(cache.get("a" * 10), first)
+        oversized = cache.get("d" * 30)
+        self.assertIsNot(cache.get("d" * 30), oversized)  # Too large to keep
+
+    def test_get_document(self):
+        self.assertIs(get_document("shared text"), get_document("shared text"))
+        with patch("text_document.DOCUMENT_CACHE_SIZE", 0):
+            self.assertIsNot(get_document("shared text"), get_document("shared text"))
+
+class TestSharedDocument(unittest.TestCase):
+    @patch("module2.get_result_cache", return_value=None)
+    @patch("module2.get_single_flight", return_value=None)
+    @patch("module2.detect_language", return_value=True)
+    def test_analyzers_share_one_tokenization(self, mock_detect, mock_flights, mock_cache):
+        import asyncio
+        from module2 import analyze_sentiment_combined
+        from textblob_engine import get_textblob_engine
+        from analyzer_executors import get_analyzer_executor
+
+        mock_pipeline = MagicMock(return_value=[{"label": "POSITIVE", "score": 0.9}])
+        text = "A shared document review, really good!"
+        engine = get_textblob_engine()
+        with patch.object(engine, "_tokenize", wraps=engine._tokenize) as mock_tokenize, \
+                patch.dict(get_analyzer_executor().kinds, {"textblob": "thread"}):
+            first = asyncio.run(analyze_sentiment_combined(text, mock_pipeline))
+            second = asyncio.run(analyze_sentiment_combined(text, mock_pipeline))
+        self.assertEqual(first, second)
+        self.assertEqual(first["textblob"], "Positive")
+        mock_tokenize.assert_called_once_with(text)  # The second request reuses the cached Document
+
+if __name__ == '__main__':
+    unittest.main()
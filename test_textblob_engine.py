@@ -0,0 +1,75 @@
+import unittest
+from unittest.mock import patch
+from textblob import TextBlob
+from textblob_engine import TextBlobEngine, get_textblob_engine, polarity_many, compare, main
+from text_document import Document
+
+REFERENCE_TEXTS = [
+    "I love this product!",
+    "This is the worst purchase I have ever made.",
+    "The package arrived on Tuesday.",
+    "It is NOT good, but the price was GREAT!!!",
+    "kind of ok I guess?",
+    "Never so happy in my life",
+    "It's not a good phone",
+    "The screen is really not good",
+    "The screen is very very bad",
+    "Terribly slow and extremely disappointing",
+    "At least it works... :)",
+    "Worst. Product. Ever :-(",
+    "Oh sure, that went well ( ! )",
+    "I <3 it, xD",
+    "Shipping: 3-5 business days. Color: blue.",
+    "Mr. Smith said it isn't bad at all.\n\nThe U.S. version is fine",
+    "\"Amazing\" they said. It wasn't.",
+    "",
+    "     ",
+    "Me encanta este producto",
+    "#BAD product 123",
+]
+
+class TestTextBlobEngine(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.engine = TextBlobEngine()
+
+    def test_polarity_matches_textblob(self):
+        for text in REFERENCE_TEXTS:
+            self.assertEqual(self.engine.polarity(text), TextBlob(text).sentiment.polarity, text)
+
+    def test_polarity_many_matches_textblob(self):
+        texts = REFERENCE_TEXTS + REFERENCE_TEXTS
+        expected = [TextBlob(text).sentiment.polarity for text in texts]
+        self.assertEqual(self.engine.polarity_many(texts), expected)
+
+    def test_documents_are_tokenized_once(self):
+        documents = [Document(text) for text in REFERENCE_TEXTS]
+        expected = [TextBlob(text).sentiment.polarity for text in REFERENCE_TEXTS]
+        self.assertEqual(self.engine.polarity_many(documents), expected)
+        tokenizer = self.engine._tokenize
+        with patch.object(self.engine, "_tokenize", side_effect=AssertionError("tokenized again")):
+            self.assertEqual(self.engine.polarity_many(documents), expected)
+        self.assertEqual(documents[0].lower_tokens(tokenizer), ["i", "love", "this", "product", "!"])
+
+    def test_polarity_many_scores_repeated_texts_once(self):
+        with patch.object(self.engine, "polarity", wraps=self.engine.polarity) as mock_polarity:
+            self.engine.polarity_many(["same text", "same text", "other text"])
+        self.assertEqual(mock_polarity.call_count, 2)
+
+    def test_shared_engine(self):
+        self.assertIs(get_textblob_engine(), get_textblob_engine())
+        self.assertEqual(polarity_many(["I love this product!"]), [TextBlob("I love this product!").sentiment.polarity])
+
+    def test_compare_reports_parity(self):
+        report = compare(REFERENCE_TEXTS, self.engine)
+        self.assertEqual(report["texts"], len(REFERENCE_TEXTS))
+        self.assertEqual(report["mismatches"], [])
+        with patch.object(self.engine, "polarity", return_value=2.0):
+            self.assertEqual(len(compare(["I love this product!"], self.engine)["mismatches"]), 1)
+
+    def test_main_exits_cleanly_on_generated_corpus(self):
+        with patch("builtins.print"):
+            self.assertEqual(main(["--count", "20"]), 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+from nltk.sentiment import SentimentIntensityAnalyzer
+from vader_engine import VaderEngine, get_vader_engine, polarity_scores_many
+from text_document import Document
+
+REFERENCE_TEXTS = [
+    "I love this product!",
+    "This is the worst purchase I have ever made.",
+    "The package arrived on Tuesday.",
+    "It is NOT good, but the price was GREAT!!!",
+    "kind of ok I guess?",
+    "Never so happy in my life",
+    "At least it works... :)",
+    "Shipping: 3-5 business days. Color: blue.",
+    "The bomb! Absolutely the best.",
+    "x y z",
+    "",
+    "     ",
+    "Me encanta este producto",
+    "Meh, it wasn't terrible??",
+    "#BAD product 123",
+]
+
+class TestVaderEngine(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.reference = SentimentIntensityAnalyzer()
+        cls.engine = VaderEngine(cls.reference)
+
+    def test_polarity_scores_matches_nltk(self):
+        for text in REFERENCE_TEXTS:
+            self.assertEqual(self.engine.polarity_scores(text), self.reference.polarity_scores(text), text)
+
+    def test_polarity_scores_many_matches_nltk(self):
+        texts = REFERENCE_TEXTS + REFERENCE_TEXTS
+        expected = [self.reference.polarity_scores(text) for text in texts]
+        self.assertEqual(self.engine.polarity_scores_many(texts), expected)
+
+    def test_documents_match_nltk(self):
+        documents = [Document(text) for text in REFERENCE_TEXTS]
+        expected = [self.reference.polarity_scores(text) for text in REFERENCE_TEXTS]
+        self.assertEqual(self.engine.polarity_scores_many(documents), expected)
+        self.assertEqual(documents[0].lower_words, ["i", "love", "this", "product!"])
+
+    def test_fast_path_for_texts_without_lexicon_words(self):
+        engine = VaderEngine(self.reference)
+        engine.polarity_scores("The package arrived on Tuesday.")
+        self.assertEqual(engine.fast_path_hits, 1)
+        engine.polarity_scores("I love this product!")
+        self.assertEqual(engine.fast_path_hits, 1)
+
+    def test_polarity_scores_many_returns_independent_dicts(self):
+        first, second = self.engine.polarity_scores_many(["same text", "same text"])
+        first["compound"] = 1.0
+        self.assertEqual(second["compound"], 0.0)
+
+    def test_shared_engine(self):
+        self.assertIs(get_vader_engine(), get_vader_engine())
+        self.assertEqual(polarity_scores_many(["I love this product!"])[0]["compound"],
+                         self.reference.polarity_scores("I love this product!")["compound"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import re
+import logging
+from decouple import config
+
+logger = logging.getLogger(__name__)
+
+# Constants
+CHUNK_MAX_TOKENS = config("CHUNK_MAX_TOKENS", default=510, cast=int)  # 512 minus the [CLS]/[SEP] special tokens
+CHUNK_OVERLAP_TOKENS = config("CHUNK_OVERLAP_TOKENS", default=64, cast=int)
+CHUNK_AGGREGATION = config("CHUNK_AGGREGATION", default="length_weighted")  # "length_weighted" or "max_confidence"
+CHUNK_TOKENS_PER_WORD = config("CHUNK_TOKENS_PER_WORD", default=1.5, cast=float)  # Used without a tokenizer
+
+# Tokenizer arguments for every pipeline call. Chunks sized by the words-per-token
+# estimate can still exceed the model's limit; truncating one beats the model raising
+# and the whole text falling back to a neutral score.
+PIPELINE_TRUNCATION = {"truncation": True, "max_length": CHUNK_MAX_TOKENS + 2}
+
+AGGREGATIONS = ("length_weighted", "max_confidence")
+SENTENCE_END = ".!?"
+
+_WORD_PATTERN = re.compile(r"\S+")
+
+def needs_chunking(text, max_tokens=CHUNK_MAX_TOKENS):
+    """
+    Cheap pre-check: a text with no more characters than the token budget always fits.
+    """
+    return len(text) > max_tokens
+
+def split_text(text, tokenizer=None, max_tokens=CHUNK_MAX_TOKENS, overlap_tokens=CHUNK_OVERLAP_TOKENS):
+    """
+    Splits a text into overlapping windows of at most max_tokens tokens.
+
+    Windows end on a sentence boundary when one falls in their second half, so
+    sentences are rarely cut. Without a fast tokenizer, whitespace-separated
+    words stand in for tokens at CHUNK_TOKENS_PER_WORD tokens per word.
+
+    Args:
+        text (str): The text to split.
+        tokenizer (PreTrainedTokenizerFast): The model's tokenizer, used for exact token counts.
+        max_tokens (int): Tokens per window, excluding special tokens.
+        overlap_tokens (int): Tokens repeated at the start of the next window.
+
+    Returns:
+        list: (start, end, token_count) character spans, in order. A text that
+              fits is a single span.
+    """
+    offsets = _token_offsets(text, tokenizer)
+    if offsets is None:
+        offsets = [match.span() for match in _WORD_PATTERN.finditer(text)]
+        max_tokens = max(1, int(max_tokens / CHUNK_TOKENS_PER_WORD))
+        overlap_tokens = int(overlap_tokens / CHUNK_TOKENS_PER_WORD)
+    total = len(offsets)
+    if total <= max_tokens:
+        return [(0, len(text), total)]
+
+    chunks = []
+    first = 0
+    while True:
+        last = min(first + max_tokens, total)
+        if last < total:
+            for k in range(last - 1, first + max_tokens // 2, -1):
+                end = offsets[k][1]
+                if end and text[end - 1] in SENTENCE_END:
+                    last = k + 1
+                    break
+        chunks.append((offsets[first][0], offsets[last - 1][1], last - first))
+        if last >= total:
+            return chunks
+        first = max(last - overlap_tokens, first + 1)
+
+def _token_offsets(text, tokenizer):
+    """
+    Returns the character span of each token, or None if the tokenizer cannot report them.
+    """
+    if tokenizer is None:
+        return None
+    try:
+        offsets = tokenizer(text, add_special_tokens=False, return_offsets_mapping=True)["offset_mapping"]
+    except Exception as e:  # Slow tokenizers raise NotImplementedError for offsets
+        logger.debug(f"Falling back to word-based chunking: {e!r}")
+        return None
+    return offsets if isinstance(offsets, list) else None
+
+def aggregate(results, weights, method=CHUNK_AGGREGATION):
+    """
+    Combines per-chunk pipeline results into one document result.
+
+    "length_weighted" sums each label's confidence weighted by chunk length and
+    returns the label with the largest share, its confidence being that share.
+    "max_confidence" returns the single most confident chunk.
+
+    Args:
+        results (list): Pipeline results per chunk, e.g. {"label": "POSITIVE", "score": 0.9}.
+        weights (list): The token count of each chunk.
+        method (str): "length_weighted" or "max_confidence".
+
+    Returns:
+        dict: A pipeline-style result, {"label": ..., "score": ...}.
+
+    Raises:
+        ValueError: If the aggregation method is unknown.
+    """
+    if method == "max_confidence":
+        best = max(results, key=lambda result: result["score"])
+        return {"label": best["label"], "score": best["score"]}
+    if method != "length_weighted":
+        raise ValueError(f"Unsupported chunk aggregation: {method}")
+
+    totals = {}
+    for result, weight in zip(results, weights):
+        totals[result["label"]] = totals.get(result["label"], 0.0) + result["score"] * weight
+    label = max(totals, key=totals.get)
+    return {"label": label, "score": totals[label] / (sum(weights) or 1)}
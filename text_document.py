@@ -0,0 +1,182 @@
+import logging
+import threading
+from collections import OrderedDict
+from decouple import config
+
+logger = logging.getLogger(__name__)
+
+# Constants
+DOCUMENT_CACHE_SIZE = config("DOCUMENT_CACHE_SIZE", default=4096, cast=int)  # 0 disables the document LRU
+DOCUMENT_CACHE_MAX_BYTES = config("DOCUMENT_CACHE_MAX_BYTES", default=64 * 1024 * 1024, cast=int)
+
+# Estimated memory per character of a document with every form memoized; measured
+# at about 38 bytes for a 10k-character text with its words, sentences and tokens
+DOCUMENT_BYTES_PER_CHAR = 40
+
+_MISSING = object()
+
+class Document:
+    """
+    A sanitized text and the tokenized forms the analyzers derive from it.
+
+    A Document computes each form lazily, at most once: the whitespace words
+    and their lowercased forms for VADER's lexicon pre-check, pattern's sentence
+    tokens for TextBlob, and the transformer chunker's spans. The analyzers use
+    different forms, so the saving comes mostly from repeated texts, whose
+    Document is reused from the document LRU. The transformer pipeline and
+    langdetect still take the plain text. Concurrent analyzers may occasionally
+    compute a form twice; both results are equal, so the race is harmless and
+    needs no lock.
+
+    Forms that depend on a tokenizer are memoized under a name the caller picks,
+    e.g. ("chunk_spans", model_id), so documents never hold on to tokenizers.
+    Pickling (for process executors) ships only the text, not the memoized forms;
+    the receiving process looks it up in its own document LRU, so a text is
+    tokenized once per pool process rather than once per request.
+    """
+
+    __slots__ = ("text", "_forms")
+
+    def __init__(self, text):
+        self.text = text
+        self._forms = {}
+
+    def __reduce__(self):
+        return get_document, (self.text,)
+
+    def __repr__(self):
+        return f"Document({self.text!r})"
+
+    def memo(self, name, compute):
+        """
+        Returns the form stored under name, computing it with compute(text) on first use.
+
+        Args:
+            name (hashable): The form's name.
+            compute (callable): Builds the form from the text.
+
+        Returns:
+            The memoized form.
+        """
+        value = self._forms.get(name, _MISSING)
+        if value is _MISSING:
+            value = self._forms[name] = compute(self.text)
+        return value
+
+    @property
+    def words(self):
+        """
+        The whitespace-separated words of the text.
+        """
+        return self.memo("words", str.split)
+
+    @property
+    def lower_words(self):
+        """
+        The lowercased words, aligned with words.
+        """
+        return self.memo("lower_words", lambda _: [word.lower() for word in self.words])
+
+    def sentences(self, tokenizer, name="sentences"):
+        """
+        Returns the text split into sentences by a sentence tokenizer such as pattern's
+        find_tokens, each sentence being its tokens joined by spaces.
+        """
+        return self.memo(name, tokenizer)
+
+    def lower_tokens(self, tokenizer, name="sentences"):
+        """
+        Returns the lowercased tokens of every sentence produced by tokenizer, in order.
+        """
+        return self.memo(
+            ("lower_tokens", name),
+            lambda _: [token.lower() for token in " ".join(self.sentences(tokenizer, name)).split()]
+        )
+
+def text_of(text):
+    """
+    Returns the string behind a Document, or the argument itself if it is already a string.
+    """
+    return text.text if isinstance(text, Document) else text
+
+class DocumentCache:
+    """
+    A thread-safe LRU of Documents, so repeated texts reuse their tokenized forms.
+
+    The LRU is bounded by count and by the estimated memory of its documents,
+    DOCUMENT_BYTES_PER_CHAR per character of text, since memoized token lists
+    make a long text far larger than its string.
+    """
+
+    def __init__(self, max_size=DOCUMENT_CACHE_SIZE, max_bytes=DOCUMENT_CACHE_MAX_BYTES):
+        self.max_size = max_size
+        self.max_bytes = max_bytes
+        self._documents = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, text):
+        """
+        Returns the cached Document for a text, creating and caching one on a miss.
+        """
+        with self._lock:
+            document = self._documents.get(text)
+            if document is not None:
+                self._documents.move_to_end(text)
+                self.hits += 1
+                return document
+            self.misses += 1
+            document = Document(text)
+            size = len(text) * DOCUMENT_BYTES_PER_CHAR
+            if size > self.max_bytes:
+                return document  # Never let one oversized text flush the whole LRU
+            self._documents[text] = document
+            self._bytes += size
+            while len(self._documents) > self.max_size or self._bytes > self.max_bytes:
+                evicted, _ = self._documents.popitem(last=False)
+                self._bytes -= len(evicted) * DOCUMENT_BYTES_PER_CHAR
+            return document
+
+    def stats(self):
+        with self._lock:
+            return {"size": len(self._documents), "bytes": self._bytes, "hits": self.hits, "misses": self.misses}
+
+    def clear(self):
+        with self._lock:
+            self._documents.clear()
+            self._bytes = 0
+
+_document_cache = None
+_document_cache_lock = threading.Lock()
+
+def get_document_cache():
+    """
+    Returns the process-wide document LRU, or None if DOCUMENT_CACHE_SIZE is 0.
+    """
+    global _document_cache
+    if DOCUMENT_CACHE_SIZE <= 0:
+        return None
+    if _document_cache is None:
+        with _document_cache_lock:
+            if _document_cache is None:
+                _document_cache = DocumentCache()
+    return _document_cache
+
+def get_document(text):
+    """
+    Returns the Document for a sanitized text, shared with earlier requests for the same text.
+
+    Args:
+        text (str): The sanitized text.
+
+    Returns:
+        Document: A cached Document, or a fresh one if the document LRU is disabled.
+
+    Environment Variables:
+        DOCUMENT_CACHE_SIZE (int): Number of documents kept. Defaults to 4096; 0 disables the LRU.
+        DOCUMENT_CACHE_MAX_BYTES (int): Estimated memory the kept documents may use. Defaults to 64 MiB.
+    """
+    cache = get_document_cache()
+    return Document(text) if cache is None else cache.get(text)
@@ -0,0 +1,217 @@
+import argparse
+import json
+import logging
+import sys
+import threading
+import time
+from textblob.en import sentiment as pattern_sentiment
+from textblob._text import EMOTICONS, PUNCTUATION
+from text_document import Document
+
+logger = logging.getLogger(__name__)
+
+class TextBlobEngine:
+    """
+    TextBlob's pattern polarity scorer with the lexicon flattened into one lookup table.
+
+    TextBlob(text).sentiment builds a blob, a PatternAnalyzer result type and a
+    dict per assessed word, and looks every token up through the lazily loaded
+    lexicon's nested {word: {pos: scores}} mapping. The engine keeps the
+    pattern tokenizer, so its tokens are the ones TextBlob sees, and replays
+    pattern's assessment rules (modifiers, negations, exclamation marks, the
+    sarcasm mark and emoticons) against precomputed tables:
+
+    - word -> (polarity, intensity, modifier word?) for the untagged scores,
+    - lowercase emoticon -> polarity, in pattern's match order.
+
+    Polarity is averaged in the same order with the same arithmetic, so results
+    are identical to TextBlob(text).sentiment.polarity. Subjectivity is not computed.
+    Given a Document, the engine reuses its lowercased sentence tokens, so a
+    text is tokenized once however often it is scored.
+    The tables are read-only after construction, so one engine can be shared by threads.
+    """
+
+    def __init__(self, lexicon=None, tokenizer=None):
+        lexicon = pattern_sentiment if lexicon is None else lexicon
+        len(lexicon)  # Loads the lazily loaded pattern lexicon
+        modifiers = lexicon.modifiers
+        self._scores = {
+            word: (tags[None][0], tags[None][2], any(tag in tags for tag in modifiers))
+            for word, tags in dict.items(lexicon) if None in tags
+        }
+        self._negations = frozenset(lexicon.negations)
+        self._modifier = lexicon.modifier
+        self._tokenize = tokenizer or lexicon.tokenizer
+        self._emoticons = {}
+        for (_, polarity), emoticons in EMOTICONS.items():
+            for emoticon in emoticons:
+                emoticon = emoticon.lower()
+                # Pattern only tries emoticons on short, non-alphabetic, non-punctuation tokens
+                if emoticon.isalpha() is False and len(emoticon) <= 5 and emoticon not in PUNCTUATION:
+                    self._emoticons.setdefault(emoticon, polarity)
+
+    def polarity(self, text):
+        """
+        Returns the TextBlob polarity of a text or Document, from -1.0 to 1.0.
+        """
+        if isinstance(text, Document):
+            words = text.lower_tokens(self._tokenize)
+        else:
+            words = [word.lower() for word in " ".join(self._tokenize(text)).split()]
+        # Each assessment is [polarity, intensity, negated]
+        assessments = []
+        scores = self._scores
+        negations = self._negations
+        modifier = None  # Preceding known word that may modify the next one ("really good")
+        negation = None  # Preceding negation ("not good")
+        for word in words:
+            score = scores.get(word)
+            if score is not None:
+                polarity, intensity, is_modifier = score
+                if modifier is None:
+                    assessments.append([polarity, intensity, False])
+                else:
+                    last = assessments[-1]
+                    last[0] = max(-1.0, min(polarity * last[1], +1.0))
+                    last[1] = intensity
+                if negation is not None:
+                    last = assessments[-1]
+                    last[1] = 1.0 / last[1]
+                    last[2] = True
+                modifier = word if is_modifier else None
+                negation = word if word in negations else None
+                continue
+            if word in negations:
+                negation = word
+            elif negation and len(word.strip("'")) > 1:
+                negation = None
+            if negation is not None and modifier is not None and self._modifier(modifier):
+                assessments[-1][2] = True  # "really not good"
+                negation = None
+            elif modifier and len(word) > 2:
+                modifier = None
+            if word == "!" and assessments:
+                assessments[-1][0] = max(-1.0, min(assessments[-1][0] * 1.25, +1.0))
+            if word == "(!)":
+                assessments.append([0.0, 1.0, False])
+            emoticon = self._emoticons.get(word)
+            if emoticon is not None:
+                assessments.append([emoticon, 1.0, False])
+        total = 0
+        for polarity, _, negated in assessments:
+            total += polarity * -0.5 if negated else polarity
+        return total / float(len(assessments) or 1)
+
+    def polarity_many(self, texts):
+        """
+        Returns the TextBlob polarity of each text, scoring repeated texts once.
+
+        Args:
+            texts (list): The texts or Documents to score.
+
+        Returns:
+            list: A polarity per text, in input order.
+        """
+        scored = {}
+        results = []
+        for text in texts:
+            key = text.text if isinstance(text, Document) else text
+            polarity = scored.get(key)
+            if polarity is None:
+                polarity = scored[key] = self.polarity(text)
+            results.append(polarity)
+        return results
+
+_textblob_engine = None
+_textblob_engine_lock = threading.Lock()
+
+def get_textblob_engine():
+    """
+    Returns the process-wide TextBlob engine, loading the pattern lexicon on first use.
+    """
+    global _textblob_engine
+    if _textblob_engine is None:
+        with _textblob_engine_lock:
+            if _textblob_engine is None:
+                _textblob_engine = TextBlobEngine()
+    return _textblob_engine
+
+def polarity_many(texts):
+    """
+    Scores many texts with the shared TextBlob engine.
+
+    Args:
+        texts (list): The texts to score.
+
+    Returns:
+        list: A polarity per text, identical to TextBlob(text).sentiment.polarity.
+    """
+    return get_textblob_engine().polarity_many(texts)
+
+def compare(texts, engine=None):
+    """
+    Scores a corpus with TextBlob and with the engine, checking parity and timing both.
+
+    Args:
+        texts (list): The reference corpus.
+        engine (TextBlobEngine): Defaults to the shared engine.
+
+    Returns:
+        dict: Text and character counts, seconds taken by each scorer, the
+              speedup and the texts whose polarities differ.
+    """
+    from textblob import TextBlob
+
+    engine = engine or get_textblob_engine()
+    start = time.perf_counter()
+    expected = [TextBlob(text).sentiment.polarity for text in texts]
+    textblob_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    actual = [engine.polarity(text) for text in texts]
+    engine_seconds = time.perf_counter() - start
+    return {
+        "texts": len(texts),
+        "characters": sum(len(text) for text in texts),
+        "textblob_seconds": textblob_seconds,
+        "engine_seconds": engine_seconds,
+        "speedup": textblob_seconds / engine_seconds if engine_seconds else 0.0,
+        "mismatches": [
+            {"text": text, "textblob": want, "engine": got}
+            for text, want, got in zip(texts, expected, actual) if want != got
+        ]
+    }
+
+def main(argv=None):
+    """
+    Benchmarks the engine against TextBlob on a reference corpus; exits non-zero on any mismatch.
+
+    Without --input, the corpus is the review-like traffic generated by benchmark.py.
+    """
+    parser = argparse.ArgumentParser(description="TextBlob engine parity benchmark")
+    parser.add_argument("-i", "--input", help="JSONL corpus to score (default: generated review texts)")
+    parser.add_argument("--text-field", default="text")
+    parser.add_argument("-n", "--count", type=int, default=2000, help="Number of generated texts")
+    args = parser.parse_args(argv)
+
+    if args.input:
+        with open(args.input, encoding="utf-8") as stream:
+            texts = [json.loads(line)[args.text_field] for line in stream if line.strip()]
+    else:
+        from benchmark import generate_texts
+        texts = [text for _, text in generate_texts(args.count)]
+
+    get_textblob_engine().polarity("warm up")
+    report = compare(texts)
+    print(f"{report['texts']} texts, {report['characters']} characters")
+    print(f"TextBlob: {report['textblob_seconds'] * 1000:.1f} ms "
+          f"({report['textblob_seconds'] / max(report['characters'], 1) * 1e9:.1f} ns/char)")
+    print(f"Engine:   {report['engine_seconds'] * 1000:.1f} ms "
+          f"({report['engine_seconds'] / max(report['characters'], 1) * 1e9:.1f} ns/char, "
+          f"{report['speedup']:.1f}x)")
+    print(f"Mismatches: {len(report['mismatches'])}")
+    for mismatch in report["mismatches"][:10]:
+        print(json.dumps(mismatch, ensure_ascii=False))
+    return 1 if report["mismatches"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+import logging
+import string
+import threading
+from nltk.sentiment import SentimentIntensityAnalyzer
+from text_document import Document
+
+logger = logging.getLogger(__name__)
+
+class VaderEngine:
+    """
+    A long-lived VADER analyzer with a batch scoring path.
+
+    SentimentIntensityAnalyzer reads and parses the whole lexicon file when it
+    is constructed, so the engine builds it once and shares it; scoring only
+    reads the lexicon and is safe to call from several threads.
+
+    VADER only assigns valence to tokens found in the lexicon, either verbatim
+    or with leading/trailing punctuation removed. The batch path checks every
+    token against a precomputed set of lexicon keys first. Texts with no hit
+    get the neutral result directly, and all other texts are scored by NLTK
+    itself, so results are identical to SentimentIntensityAnalyzer.polarity_scores.
+    Given a Document, the pre-check reuses its split and lowercased words.
+    """
+
+    def __init__(self, analyzer=None):
+        self.analyzer = analyzer or SentimentIntensityAnalyzer()
+        self._lexicon_keys = frozenset(self.analyzer.lexicon)
+        self.fast_path_hits = 0
+
+    def polarity_scores(self, text):
+        """
+        Returns VADER's neg/neu/pos/compound scores for a text or Document.
+        """
+        if isinstance(text, Document):
+            token_count = self._lexicon_miss_token_count(text.words, text.lower_words)
+            text = text.text
+        else:
+            words = text.split()
+            token_count = self._lexicon_miss_token_count(words, (word.lower() for word in words))
+        if token_count is not None:
+            self.fast_path_hits += 1
+            return _neutral_scores(token_count)
+        return self.analyzer.polarity_scores(text)
+
+    def polarity_scores_many(self, texts):
+        """
+        Returns VADER's scores for each text, scoring repeated texts once.
+
+        Args:
+            texts (list): The texts or Documents to score.
+
+        Returns:
+            list: A scores dict per text, in input order.
+        """
+        scored = {}
+        results = []
+        for text in texts:
+            key = text.text if isinstance(text, Document) else text
+            scores = scored.get(key)
+            if scores is None:
+                scores = scored[key] = self.polarity_scores(text)
+            results.append(dict(scores))
+        return results
+
+    def _lexicon_miss_token_count(self, words, lower_words):
+        """
+        Returns the number of VADER tokens in a text's words if none of them can
+        match the lexicon, or None if the text needs full scoring.
+        """
+        lexicon_keys = self._lexicon_keys
+        token_count = 0
+        for word, lowered in zip(words, lower_words):
+            if len(word) <= 1:
+                continue  # SentiText drops single characters
+            token_count += 1
+            if lowered in lexicon_keys or lowered.strip(string.punctuation) in lexicon_keys:
+                return None
+        return token_count
+
+def _neutral_scores(token_count):
+    neu = 1.0 if token_count else 0.0
+    return {"neg": 0.0, "neu": neu, "pos": 0.0, "compound": 0.0}
+
+_vader_engine = None
+_vader_engine_lock = threading.Lock()
+
+def get_vader_engine():
+    """
+    Returns the process-wide VADER engine, loading the lexicon on first use.
+    """
+    global _vader_engine
+    if _vader_engine is None:
+        with _vader_engine_lock:
+            if _vader_engine is None:
+                _vader_engine = VaderEngine()
+    return _vader_engine
+
+def polarity_scores_many(texts):
+    """
+    Scores many texts with the shared VADER engine.
+
+    Args:
+        texts (list): The texts to score.
+
+    Returns:
+        list: A dict of neg/neu/pos/compound scores per text, identical to NLTK's polarity_scores.
+    """
+    return get_vader_engine().polarity_scores_many(texts)